@@ -0,0 +1,180 @@
+"""
+访问日志批量写入模块
+请求路径上只把日志放入内存队列（不访问数据库），
+由后台任务按批量大小或时间间隔批量插入 access_logs 表
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import insert
+
+import models
+from database import SessionLocal
+from logging_config import log_exception
+
+logger = logging.getLogger("firefly")
+
+# 队列容量上限，超出后丢弃新日志并计数
+ACCESS_LOG_QUEUE_SIZE = int(os.getenv("ACCESS_LOG_QUEUE_SIZE", "10000"))
+# 单次批量插入的条数，队列达到该数量时立即触发写入
+ACCESS_LOG_BATCH_SIZE = int(os.getenv("ACCESS_LOG_BATCH_SIZE", "200"))
+# 最长写入间隔（秒）
+ACCESS_LOG_FLUSH_INTERVAL = float(os.getenv("ACCESS_LOG_FLUSH_INTERVAL", "2"))
+if ACCESS_LOG_BATCH_SIZE < 1:
+    ACCESS_LOG_BATCH_SIZE = 1
+if ACCESS_LOG_FLUSH_INTERVAL < 0.1:
+    ACCESS_LOG_FLUSH_INTERVAL = 0.1
+
+
+class AccessLogWriter:
+    """
+    访问日志写入器
+
+    enqueue 可在事件循环或线程池中调用，只做一次加锁的 deque 追加；
+    run 为后台任务，flush 用于关闭时排空队列。
+    """
+
+    def __init__(
+        self,
+        max_queue: int = ACCESS_LOG_QUEUE_SIZE,
+        batch_size: int = ACCESS_LOG_BATCH_SIZE,
+        flush_interval: float = ACCESS_LOG_FLUSH_INTERVAL
+    ):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        # 串行化批量写入（后台任务与关闭时的排空）
+        self._write_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_flush_at: Optional[float] = None
+
+    def enqueue(self, entry: Dict[str, Any]) -> bool:
+        """
+        放入一条日志（AccessLog 字段字典）
+
+        Returns:
+            是否成功入队（队列已满时丢弃并返回 False）
+        """
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                return False
+            self._queue.append(entry)
+            self.enqueued += 1
+            reached_batch = len(self._queue) >= self.batch_size
+
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None:
+            # 后台任务未运行（如脚本环境或未执行 lifespan）时直接同步写入，避免日志滞留
+            self.flush()
+        elif reached_batch:
+            # 达到批量大小时唤醒后台任务（可能从线程池中调用）
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass
+        return True
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        """从队列头部取出一批日志"""
+        with self._lock:
+            count = min(len(self._queue), self.batch_size)
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """批量插入一批日志，失败时丢弃该批并计数"""
+        db = SessionLocal()
+        try:
+            db.execute(insert(models.AccessLog), batch)
+            db.commit()
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as exc:
+            db.rollback()
+            self.failed += len(batch)
+            log_exception(logger, f"批量写入访问日志失败，丢弃 {len(batch)} 条", exc)
+        finally:
+            db.close()
+
+    def flush(self) -> int:
+        """
+        同步写入队列中的全部日志
+
+        Returns:
+            本次处理的条数
+        """
+        total = 0
+        with self._write_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    break
+                self._write_batch(batch)
+                total += len(batch)
+            self.last_flush_at = time.time()
+        return total
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        """后台循环：达到批量大小或超过写入间隔时批量写入，停止时排空队列"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        logger.info(
+            "访问日志写入任务启动，批量=%s，间隔=%ss，队列上限=%s",
+            self.batch_size, self.flush_interval, self.max_queue
+        )
+        try:
+            while not stop_event.is_set():
+                waiters = [
+                    asyncio.ensure_future(self._wakeup.wait()),
+                    asyncio.ensure_future(stop_event.wait())
+                ]
+                try:
+                    await asyncio.wait(waiters, timeout=self.flush_interval, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    for waiter in waiters:
+                        waiter.cancel()
+                self._wakeup.clear()
+                try:
+                    await asyncio.to_thread(self.flush)
+                except Exception as exc:
+                    logger.error("访问日志写入失败: %s", exc)
+        finally:
+            self._wakeup = None
+            self._loop = None
+            # 关闭时排空队列
+            await asyncio.to_thread(self.flush)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取写入统计"""
+        with self._lock:
+            queued = len(self._queue)
+        return {
+            "queued": queued,
+            "max_queue": self.max_queue,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_flush_at": datetime.utcfromtimestamp(self.last_flush_at).isoformat() if self.last_flush_at else None
+        }
+
+
+# 全局访问日志写入器
+access_log_writer = AccessLogWriter()
@@ -1,14 +1,23 @@
 """
 认证模块
-提供密码哈希和 JWT Token 生成功能
+提供密码哈希、JWT Token 生成，以及统一的当前用户认证依赖
 """
+import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
-from jose import jwt
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError, jwt
 from passlib.context import CryptContext
+from sqlalchemy.orm import Session, make_transient_to_detached
 
-from database import settings
+import models
+from cache import SimpleCache
+from database import get_db, settings
 
 # 密码加密上下文，使用 PBKDF2-SHA256 算法
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
@@ -71,3 +80,205 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         algorithm=settings.ALGORITHM
     )
     return encoded_jwt
+
+
+# ============== 当前用户认证 ==============
+
+# 已解码 token 缓存的最大条目数
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "1024"))
+# 管理员信息缓存时间（秒），修改密码或 2FA 时主动失效
+AUTH_ADMIN_CACHE_TTL = int(os.getenv("AUTH_ADMIN_CACHE_TTL", "300"))
+
+# auto_error=False：未携带 token 时由 get_current_user 返回统一的 401
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+
+# 管理员信息缓存：只在本进程内保存（含密码哈希和 TOTP 密钥，不写入共享存储），
+# 失效操作仍通过广播同步到其他 worker
+admin_cache = SimpleCache(default_ttl=AUTH_ADMIN_CACHE_TTL, name="admins", shared_store=False)
+
+# 缓存的 Admin 字段
+_ADMIN_COLUMNS = tuple(column.key for column in models.Admin.__table__.columns)
+
+
+class TokenCache:
+    """
+    已解码 JWT 缓存
+
+    以 token 字符串为键，条目在 token 的 exp 时刻失效，超出容量时按 LRU 淘汰。
+    只缓存签名校验通过的 token，同一个 token 在有效期内只解码一次。
+    """
+
+    def __init__(self, max_entries: int = AUTH_TOKEN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """获取已解码的 payload，不存在或已过期时返回 None"""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            payload, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return payload
+
+    def set(self, token: str, payload: Dict[str, Any]) -> None:
+        """缓存解码结果（没有 exp 的 token 不缓存）"""
+        expires_at = payload.get("exp")
+        if not isinstance(expires_at, (int, float)) or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (payload, float(expires_at))
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        with self._lock:
+            size = len(self._entries)
+        total = self.hits + self.misses
+        return {
+            "size": size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total * 100, 2) if total > 0 else 0
+        }
+
+
+token_cache = TokenCache()
+
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    解码并校验 JWT 访问令牌（带缓存）
+
+    Args:
+        token: JWT 字符串
+
+    Returns:
+        dict: token 的 payload
+
+    Raises:
+        JWTError: 签名无效或已过期
+    """
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        token_cache.set(token, payload)
+    return payload
+
+
+def get_token_username(request: Request) -> Optional[str]:
+    """
+    获取请求携带的 token 对应的用户名（不校验用户是否存在）
+
+    已经过 get_current_user 认证的请求直接读取 request.state，
+    否则从 Authorization 头解码；token 无效时返回 None。
+    """
+    username = getattr(request.state, "username", None)
+    if username is not None:
+        return username
+    authorization = request.headers.get("Authorization")
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    try:
+        return decode_access_token(authorization.split(" ")[1]).get("sub")
+    except JWTError:
+        return None
+
+
+def get_admin_by_username(db: Session, username: str) -> Optional[models.Admin]:
+    """
+    按用户名获取管理员（带缓存）
+
+    缓存中保存字段快照，命中时重建实例并以 merge(load=False) 挂到当前会话，
+    不产生查询；路由对返回对象的修改会照常在 commit 时写回数据库。
+    """
+    snapshot = admin_cache.get(username)
+    if snapshot is not None:
+        user = models.Admin(**snapshot)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    user = db.query(models.Admin).filter(models.Admin.username == username).first()
+    if user is not None:
+        admin_cache.set(username, {column: getattr(user, column) for column in _ADMIN_COLUMNS})
+    return user
+
+
+def invalidate_admin_cache(username: Optional[str] = None) -> None:
+    """
+    使管理员信息缓存失效（修改密码、2FA 设置或恢复码后调用）
+
+    Args:
+        username: 用户名，为空时清空全部
+    """
+    if username:
+        admin_cache.delete(username)
+    else:
+        admin_cache.clear()
+
+
+def get_current_user(
+    request: Request,
+    token: Optional[str] = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> models.Admin:
+    """
+    验证 JWT Token 并获取当前用户
+
+    解码结果与用户名写入 request.state，同一请求内的访问日志等不再重复解码。
+
+    Raises:
+        HTTPException: 认证失败时抛出 401 错误
+    """
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="未提供有效的认证信息",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    try:
+        payload = decode_access_token(token)
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="认证信息已过期或无效",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    username: Optional[str] = payload.get("sub")
+    if username is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="无效的认证信息",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    request.state.token_payload = payload
+    request.state.username = username
+
+    user = get_admin_by_username(db, username)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="用户不存在",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
@@ -0,0 +1,450 @@
+"""
+自动保存缓冲模块
+编辑器每隔一段时间提交一次自动保存，请求路径上只把内容写入本机共享缓冲，
+不改写数据库中的大字段，由后台任务合并写入 post_autosaves 表：
+- 同一文章在缓冲中只保留最新一份，连续的自动保存只落库一次
+- 停止编辑 AUTOSAVE_FLUSH_DELAY 秒后写入
+- 持续编辑时，内容最多在缓冲中停留 AUTOSAVE_MAX_DELAY 秒（进程异常退出时最多丢失这么久的自动保存）
+- 缓冲超过 AUTOSAVE_BUFFER_MAX_BYTES 时立即全部写入
+- 关闭时排空缓冲
+
+缓冲是 CACHE_SHARED_DIR 目录下的 SQLite 文件，同一主机上的所有 worker 共用：
+任一 worker 都能读取、清除其他 worker 收到的自动保存，到期条目由先认领的 worker 写入。
+清除自动保存或显式保存文章时，在 post_autosaves 中写入清除标记（data 为空字符串，
+saved_at 为清除时间）；写入时只覆盖 saved_at 更早的记录，因此清除之前的自动保存
+（包括其他 worker 正在写入的）不会再出现。
+
+AUTOSAVE_BUFFER=off 或共享目录不可用时不使用缓冲，每次自动保存直接写入数据库。
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.orm import Session
+
+import models
+from cache import CACHE_SHARED_DIR
+from database import SessionLocal
+from logging_config import log_exception
+
+logger = logging.getLogger("firefly")
+
+# 缓冲方式：shared（本机共享 SQLite 文件）或 off（不缓冲，直接写入数据库）
+AUTOSAVE_BUFFER = os.getenv("AUTOSAVE_BUFFER", "shared").strip().lower()
+# 停止编辑多久后写入数据库（秒）
+AUTOSAVE_FLUSH_DELAY = float(os.getenv("AUTOSAVE_FLUSH_DELAY", "10"))
+if AUTOSAVE_FLUSH_DELAY < 0.5:
+    AUTOSAVE_FLUSH_DELAY = 0.5
+# 自动保存在缓冲中停留的最长时间（秒），即异常退出时可能丢失的上限
+AUTOSAVE_MAX_DELAY = float(os.getenv("AUTOSAVE_MAX_DELAY", "60"))
+if AUTOSAVE_MAX_DELAY < AUTOSAVE_FLUSH_DELAY:
+    AUTOSAVE_MAX_DELAY = AUTOSAVE_FLUSH_DELAY
+# 缓冲内容的字节数上限，默认 32MB
+AUTOSAVE_BUFFER_MAX_BYTES = int(os.getenv("AUTOSAVE_BUFFER_MAX_BYTES", str(32 * 1024 * 1024)))
+# 后台任务检查缓冲的间隔（秒）
+AUTOSAVE_CHECK_INTERVAL = 1.0
+# 认领后超过该时间（秒）仍未写入完成的条目（如认领的 worker 已退出）可被重新认领
+AUTOSAVE_CLAIM_TIMEOUT = 60.0
+
+# 清除标记：post_autosaves.data 为空字符串表示自动保存已被清除或被显式保存取代
+AUTOSAVE_TOMBSTONE = ""
+
+AUTOSAVE_FILENAME = "autosave.sqlite3"
+
+# pending_autosave_totals 只有一行，由触发器在增删改缓冲条目的同一事务中维护条目数与字节数，
+# 检查缓冲上限时无需扫描整个缓冲表；首次创建时按已有条目初始化
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS pending_autosaves (
+        post_id TEXT PRIMARY KEY,
+        data TEXT NOT NULL,
+        saved_at TEXT NOT NULL,
+        first_at REAL NOT NULL,
+        last_at REAL NOT NULL,
+        claimed_at REAL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS pending_autosave_totals (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        entries INTEGER NOT NULL,
+        bytes INTEGER NOT NULL
+    )
+    """,
+    """
+    INSERT OR IGNORE INTO pending_autosave_totals (id, entries, bytes)
+    SELECT 1, COUNT(*), TOTAL(LENGTH(data)) FROM pending_autosaves
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS pending_autosaves_insert AFTER INSERT ON pending_autosaves
+    BEGIN
+        UPDATE pending_autosave_totals SET entries = entries + 1, bytes = bytes + LENGTH(NEW.data) WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS pending_autosaves_update AFTER UPDATE OF data ON pending_autosaves
+    BEGIN
+        UPDATE pending_autosave_totals SET bytes = bytes + LENGTH(NEW.data) - LENGTH(OLD.data) WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS pending_autosaves_delete AFTER DELETE ON pending_autosaves
+    BEGIN
+        UPDATE pending_autosave_totals SET entries = entries - 1, bytes = bytes - LENGTH(OLD.data) WHERE id = 1;
+    END
+    """
+]
+
+
+class _PendingStore:
+    """
+    共享缓冲文件的连接管理
+
+    每个线程使用独立连接；进程 fork 后自动重建连接。
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, AUTOSAVE_FILENAME)
+        self._local = threading.local()
+        conn = self.connection()
+        # 建表、初始化合计与创建触发器在同一事务中完成，避免其他进程在此期间写入的条目漏计
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def connection(self) -> sqlite3.Connection:
+        """获取当前线程的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+
+def write_autosave_tombstone(db: Session, post_id: str, cleared_at: Optional[datetime] = None) -> None:
+    """
+    写入自动保存清除标记（不提交事务）
+
+    saved_at 早于清除时间的自动保存之后不会再写入。
+    """
+    table = models.PostAutosave.__table__
+    values = {"data": AUTOSAVE_TOMBSTONE, "saved_at": cleared_at or datetime.utcnow()}
+    result = db.execute(update(table).where(table.c.post_id == post_id).values(**values))
+    if not result.rowcount:
+        db.execute(
+            insert(table).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite"),
+            [{"post_id": post_id, **values}]
+        )
+
+
+class AutosaveBuffer:
+    """
+    自动保存写入缓冲
+
+    put / get / take 可在线程池中调用（同步路由）；run 为后台任务，flush 用于关闭时排空缓冲。
+    """
+
+    def __init__(
+        self,
+        directory: str = CACHE_SHARED_DIR,
+        mode: str = AUTOSAVE_BUFFER,
+        flush_delay: float = AUTOSAVE_FLUSH_DELAY,
+        max_delay: float = AUTOSAVE_MAX_DELAY,
+        max_bytes: int = AUTOSAVE_BUFFER_MAX_BYTES
+    ):
+        self.directory = directory
+        self.mode = mode
+        self.flush_delay = flush_delay
+        self.max_delay = max_delay
+        self.max_bytes = max_bytes
+        self._store: Optional[_PendingStore] = None
+        self._store_ready = False
+        self._store_lock = threading.Lock()
+        # 串行化本进程的批量写入（后台任务与关闭时的排空）
+        self._write_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.received = 0
+        self.coalesced = 0
+        self.written = 0
+        self.skipped = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_flush_at: Optional[float] = None
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """共享缓冲连接，未启用或不可用时返回 None（直接写入数据库）"""
+        if not self._store_ready:
+            with self._store_lock:
+                if not self._store_ready:
+                    if self.mode == "shared":
+                        try:
+                            self._store = _PendingStore(self.directory)
+                        except Exception as exc:
+                            logger.warning(f"自动保存缓冲初始化失败，直接写入数据库: {exc}")
+                            self._store = None
+                    self._store_ready = True
+        return self._store.connection() if self._store is not None else None
+
+    def put(self, post_id: str, data: str) -> Tuple[datetime, bool]:
+        """
+        放入一份自动保存（JSON 字符串），覆盖该文章尚未写入的旧内容
+
+        Returns:
+            (保存时间（UTC）, 缓冲中是否已有该文章的自动保存)
+        """
+        saved_at = datetime.utcnow()
+        self.received += 1
+        conn = self._connection()
+        if conn is None:
+            self._write([{"b_id": post_id, "b_data": data, "b_saved_at": saved_at}])
+            return saved_at, False
+
+        now = time.time()
+        # 覆盖时保留首次写入时间，并取消进行中的认领（写入完成后不会删除新内容）
+        existed = conn.execute(
+            "UPDATE pending_autosaves SET data = ?, saved_at = ?, last_at = ?, claimed_at = NULL WHERE post_id = ?",
+            (data, saved_at.isoformat(), now, post_id)
+        ).rowcount > 0
+        if existed:
+            self.coalesced += 1
+        else:
+            conn.execute(
+                "INSERT INTO pending_autosaves (post_id, data, saved_at, first_at, last_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(post_id) DO UPDATE SET data = excluded.data, saved_at = excluded.saved_at, "
+                "last_at = excluded.last_at, claimed_at = NULL",
+                (post_id, data, saved_at.isoformat(), now, now)
+            )
+
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None:
+            # 后台任务未运行（如脚本环境或未执行 lifespan）时直接写入，避免内容只留在缓冲中
+            self.flush()
+        elif self._totals(conn)[1] > self.max_bytes:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass
+        return saved_at, existed
+
+    @staticmethod
+    def _totals(conn: sqlite3.Connection) -> Tuple[int, int]:
+        """缓冲中的条目数与字节数（读取触发器维护的合计行）"""
+        row = conn.execute("SELECT entries, bytes FROM pending_autosave_totals WHERE id = 1").fetchone()
+        return (int(row[0]), int(row[1])) if row else (0, 0)
+
+    def get(self, post_id: str) -> Optional[Tuple[str, datetime]]:
+        """读取缓冲中尚未写入数据库的自动保存，返回 (JSON 字符串, 保存时间)"""
+        conn = self._connection()
+        if conn is None:
+            return None
+        row = conn.execute(
+            "SELECT data, saved_at FROM pending_autosaves WHERE post_id = ?", (post_id,)
+        ).fetchone()
+        return (row[0], datetime.fromisoformat(row[1])) if row else None
+
+    def pending_ids(self, post_ids: Iterable[str]) -> Set[str]:
+        """返回缓冲中有自动保存的文章 ID（一次查询）"""
+        post_ids = list(post_ids)
+        conn = self._connection()
+        if conn is None or not post_ids:
+            return set()
+        placeholders = ",".join("?" * len(post_ids))
+        return {
+            post_id for (post_id,) in conn.execute(
+                f"SELECT post_id FROM pending_autosaves WHERE post_id IN ({placeholders})", post_ids
+            )
+        }
+
+    def take(self, post_id: str) -> Optional[Tuple[str, datetime]]:
+        """
+        取出并移除缓冲中的自动保存
+
+        用于清除自动保存或显式保存文章；其他 worker 已认领、正在写入的同一条目
+        由调用方写入的清除标记拦截。
+        """
+        conn = self._connection()
+        if conn is None:
+            return None
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT data, saved_at FROM pending_autosaves WHERE post_id = ?", (post_id,)
+            ).fetchone()
+            if row:
+                conn.execute("DELETE FROM pending_autosaves WHERE post_id = ?", (post_id,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return (row[0], datetime.fromisoformat(row[1])) if row else None
+
+    def _claim_due(self, conn: sqlite3.Connection, force: bool) -> List[Dict[str, Any]]:
+        """认领需要写入的自动保存（force 时认领全部），其他 worker 不会重复认领"""
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            force = force or self._totals(conn)[1] > self.max_bytes
+            due_clause = "" if force else " AND (last_at <= ? OR first_at <= ?)"
+            params: Tuple = (now - AUTOSAVE_CLAIM_TIMEOUT,)
+            if not force:
+                params += (now - self.flush_delay, now - self.max_delay)
+            rows = conn.execute(
+                "SELECT post_id, data, saved_at FROM pending_autosaves "
+                "WHERE (claimed_at IS NULL OR claimed_at <= ?)" + due_clause,
+                params
+            ).fetchall()
+            conn.executemany(
+                "UPDATE pending_autosaves SET claimed_at = ? WHERE post_id = ?",
+                [(now, row[0]) for row in rows]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return [
+            {"b_id": post_id, "b_data": data, "b_saved_at": datetime.fromisoformat(saved_at), "_saved_at": saved_at}
+            for post_id, data, saved_at in rows
+        ]
+
+    def _write(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        批量写入 post_autosaves，只覆盖更早的记录（含清除标记）；失败时丢弃并计数
+
+        已有记录用一条批量 UPDATE 更新，缺失的再批量 INSERT（并发插入冲突时忽略），
+        已删除的文章直接跳过。
+        """
+        table = models.PostAutosave.__table__
+        stmt = update(table).where(
+            table.c.post_id == bindparam("b_id"),
+            table.c.saved_at <= bindparam("b_saved_at")
+        ).values(data=bindparam("b_data"), saved_at=bindparam("b_saved_at"))
+        db = SessionLocal()
+        try:
+            post_ids = [row["b_id"] for row in rows]
+            existing = {post_id for (post_id,) in db.query(table.c.post_id).filter(table.c.post_id.in_(post_ids))}
+            alive = {post_id for (post_id,) in db.query(models.Post.id).filter(models.Post.id.in_(post_ids))}
+            updates = [
+                {key: row[key] for key in ("b_id", "b_data", "b_saved_at")}
+                for row in rows if row["b_id"] in existing
+            ]
+            inserts = [
+                {"post_id": row["b_id"], "data": row["b_data"], "saved_at": row["b_saved_at"]}
+                for row in rows if row["b_id"] not in existing and row["b_id"] in alive
+            ]
+            updated = db.execute(stmt, updates).rowcount if updates else 0
+            if inserts:
+                db.execute(
+                    insert(table).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite"),
+                    inserts
+                )
+            db.commit()
+            written = max(updated, 0) + len(inserts)
+            self.written += written
+            self.skipped += len(rows) - written
+            self.batches += 1
+        except Exception as exc:
+            db.rollback()
+            self.failed += len(rows)
+            log_exception(logger, f"写入自动保存失败，丢弃 {len(rows)} 条", exc)
+        finally:
+            db.close()
+
+    def flush(self, force: bool = True) -> int:
+        """
+        同步写入缓冲中的自动保存
+
+        Args:
+            force: 是否忽略延迟，写入全部内容
+
+        Returns:
+            本次写入的条数
+        """
+        conn = self._connection()
+        if conn is None:
+            return 0
+        with self._write_lock:
+            rows = self._claim_due(conn, force)
+            if rows:
+                try:
+                    self._write(rows)
+                finally:
+                    # 只删除认领时的版本；认领期间被覆盖的新内容留待下次写入
+                    conn.executemany(
+                        "DELETE FROM pending_autosaves WHERE post_id = ? AND saved_at = ?",
+                        [(row["b_id"], row["_saved_at"]) for row in rows]
+                    )
+            self.last_flush_at = time.time()
+        return len(rows)
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        """后台循环：定期写入到期的自动保存，缓冲超限时立即写入，停止时排空缓冲"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        logger.info(
+            "自动保存写入任务启动，方式=%s，合并延迟=%ss，最长延迟=%ss",
+            self.mode, self.flush_delay, self.max_delay
+        )
+        try:
+            while not stop_event.is_set():
+                waiters = [
+                    asyncio.ensure_future(self._wakeup.wait()),
+                    asyncio.ensure_future(stop_event.wait())
+                ]
+                try:
+                    await asyncio.wait(waiters, timeout=AUTOSAVE_CHECK_INTERVAL, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    for waiter in waiters:
+                        waiter.cancel()
+                self._wakeup.clear()
+                try:
+                    await asyncio.to_thread(self.flush, False)
+                except Exception as exc:
+                    logger.error("自动保存写入失败: %s", exc)
+        finally:
+            self._wakeup = None
+            self._loop = None
+            # 关闭时排空缓冲（其他 worker 收到的条目一并写入）
+            await asyncio.to_thread(self.flush)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓冲统计（pending / buffered_bytes 为本机所有 worker 合计）"""
+        conn = self._connection()
+        pending, buffered_bytes = 0, 0
+        if conn is not None:
+            pending, buffered_bytes = self._totals(conn)
+        return {
+            "mode": self.mode if conn is not None else "off",
+            "pending": pending,
+            "buffered_bytes": int(buffered_bytes),
+            "max_bytes": self.max_bytes,
+            "flush_delay": self.flush_delay,
+            "max_delay": self.max_delay,
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "written": self.written,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_flush_at": datetime.utcfromtimestamp(self.last_flush_at).isoformat() if self.last_flush_at else None
+        }
+
+
+# 全局自动保存缓冲
+autosave_buffer = AutosaveBuffer()
@@ -0,0 +1,177 @@
+"""
+中间件基准测试
+
+对比两种中间件实现在并发请求下的延迟与吞吐：
+- legacy：原来的 4 个 @app.middleware("http")（BaseHTTPMiddleware）
+- asgi：合并后的纯 ASGI RequestContextMiddleware
+
+直接以 ASGI 协议驱动应用（不经过网络和服务器），只衡量中间件本身的开销。
+请求为 GET，不触发访问日志写入。
+
+用法（在 backend 目录下执行）：
+    python benchmarks/bench_middleware.py [--requests 5000] [--concurrency 1 50 200]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, Request  # noqa: E402
+
+from logging_config import set_request_id, reset_request_id  # noqa: E402
+from middleware import RequestContextMiddleware  # noqa: E402
+
+logger = logging.getLogger("firefly")
+
+PAYLOAD = {"items": [{"id": i, "title": f"文章 {i}"} for i in range(20)]}
+
+
+def build_base_app() -> FastAPI:
+    """构造只有一个 JSON 接口的应用"""
+    app = FastAPI()
+
+    @app.get("/api/ping")
+    async def ping():
+        return PAYLOAD
+
+    return app
+
+
+def build_legacy_app() -> FastAPI:
+    """按原有方式注册 4 个 BaseHTTPMiddleware 中间件"""
+    app = build_base_app()
+
+    @app.middleware("http")
+    async def standard_response_middleware(request: Request, call_next):
+        response = await call_next(request)
+        if not request.url.path.startswith("/api"):
+            return response
+        content_type = response.headers.get("content-type", "")
+        if "application/json" not in content_type.lower():
+            return response
+        if getattr(response, "body", None) is None:
+            return response
+        return response
+
+    @app.middleware("http")
+    async def log_requests(request: Request, call_next):
+        response = await call_next(request)
+        if request.method not in ["POST", "PUT", "DELETE"]:
+            return response
+        return response
+
+    @app.middleware("http")
+    async def error_response_logger(request: Request, call_next):
+        response = await call_next(request)
+        if response.status_code >= 500 and not getattr(request.state, "error_logged", False):
+            logger.error("5xx 响应: %s %s", request.method, request.url.path)
+        return response
+
+    @app.middleware("http")
+    async def request_id_middleware(request: Request, call_next):
+        request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
+        token = set_request_id(request_id)
+        request.state.request_id = request_id
+        try:
+            response = await call_next(request)
+        finally:
+            reset_request_id(token)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+    return app
+
+
+def build_asgi_app() -> FastAPI:
+    """注册合并后的纯 ASGI 中间件"""
+    app = build_base_app()
+
+    async def noop_writer(request, status_code):
+        return None
+
+    app.add_middleware(RequestContextMiddleware, access_log_writer=noop_writer)
+    return app
+
+
+async def call_once(app) -> float:
+    """以 ASGI 协议发送一次 GET 请求，返回耗时（秒）"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/ping",
+        "raw_path": b"/api/ping",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 12345),
+        "server": ("bench", 80),
+    }
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        return None
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+async def run(app, total: int, concurrency: int) -> dict:
+    """以固定并发发送 total 个请求"""
+    latencies = []
+    queue = iter(range(total))
+
+    async def worker():
+        for _ in queue:
+            latencies.append(await call_once(app))
+
+    for _ in range(min(100, total)):
+        await call_once(app)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="中间件基准测试")
+    parser.add_argument("--requests", type=int, default=5000, help="每组请求数")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 50, 200], help="并发数")
+    args = parser.parse_args()
+
+    apps = {"legacy": build_legacy_app(), "asgi": build_asgi_app()}
+    print(f"{'并发':>6} {'实现':>8} {'吞吐(req/s)':>12} {'p50(ms)':>9} {'p99(ms)':>9}")
+    for concurrency in args.concurrency:
+        for name, app in apps.items():
+            result = await run(app, args.requests, concurrency)
+            print(
+                f"{concurrency:>6} {name:>8} {result['rps']:>12.0f} "
+                f"{result['p50']:>9.2f} {result['p99']:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
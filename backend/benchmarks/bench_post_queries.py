@@ -0,0 +1,147 @@
+"""
+文章列表查询次数检查
+
+在内存 SQLite 中构造不同数量的文章（每篇带分类和 3 个标签），
+统计各列表接口生成数据时执行的 SQL 条数，并断言条数与文章数量无关
+（selectinload 每 500 个主键一条 IN 查询，超过 500 篇时按批次允许额外查询）：
+- posts：GET /api/posts 的 query_posts_page（all=true 与分页）
+- trash：回收站列表使用的 build_post_list_query + fetch_post_page
+- backup：build_full_backup_payload 的文章部分
+- lazy：不做预加载的旧写法，作为对照
+
+用法（在 backend 目录下执行）：
+    python benchmarks/bench_post_queries.py [--posts 10 100 1000]
+"""
+import argparse
+import math
+import os
+import sys
+from datetime import datetime, timedelta
+
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ.setdefault("SECRET_KEY", "bench-post-queries")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.dialects.mysql import LONGTEXT  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+
+
+@compiles(LONGTEXT, "sqlite")
+def compile_longtext(type_, compiler, **kw):
+    """SQLite 没有 LONGTEXT，按 TEXT 建表"""
+    return "TEXT"
+
+
+# selectinload 每条 IN 查询携带的主键数量（SQLAlchemy 默认值）
+SELECTIN_BATCH_SIZE = 500
+
+
+import models  # noqa: E402
+from database import Base, SessionLocal, engine  # noqa: E402
+from post_queries import build_post_list_query, fetch_post_page  # noqa: E402
+from routes.backup import build_full_backup_payload  # noqa: E402
+from routes.posts import query_posts_page  # noqa: E402
+
+
+class QueryCounter:
+    """统计执行的 SQL 条数"""
+
+    def __init__(self):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def measure(self, fn) -> int:
+        start = self.count
+        fn()
+        return self.count - start
+
+
+def seed(count: int) -> None:
+    """重建数据表并写入 count 篇文章（半数在回收站）"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    categories = [models.Category(name=f"分类{i}", slug=f"cat-{i}") for i in range(5)]
+    tags = [models.Tag(name=f"标签{i}", slug=f"tag-{i}") for i in range(10)]
+    db.add_all(categories + tags)
+    now = datetime(2024, 1, 1)
+    for i in range(count):
+        db.add(models.Post(
+            title=f"文章 {i}",
+            slug=f"post-{i}",
+            content="正文",
+            published_at=now - timedelta(hours=i),
+            category=categories[i % len(categories)],
+            tags=[tags[(i + k) % len(tags)] for k in range(3)],
+            deleted_at=now if i % 2 else None
+        ))
+    db.commit()
+    db.close()
+
+
+def run_with_session(fn):
+    """在新会话中执行 fn(db)，保证没有会话级缓存干扰"""
+    def runner():
+        db = SessionLocal()
+        try:
+            fn(db)
+        finally:
+            db.close()
+    return runner
+
+
+def lazy_list(db) -> None:
+    """旧写法：逐篇访问分类和标签触发懒加载"""
+    for p in db.query(models.Post).filter(models.Post.deleted_at == None).all():
+        _ = (p.category.name if p.category else None, [t.name for t in p.tags])
+
+
+def trash_list(db) -> None:
+    query = build_post_list_query(db, deleted_only=True, order_by=(models.Post.deleted_at.desc(),))
+    posts, _ = fetch_post_page(query, 1, 10, all=True)
+    for p in posts:
+        _ = (p.category.name if p.category else None, [t.name for t in p.tags])
+
+
+CASES = {
+    "posts(all)": lambda db: query_posts_page(db, 1, 10, True, False, []),
+    "posts(page)": lambda db: query_posts_page(db, 1, 10, False, False, []),
+    "trash": trash_list,
+    "backup": build_full_backup_payload,
+    "lazy": lazy_list,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="文章列表查询次数检查")
+    parser.add_argument("--posts", type=int, nargs="+", default=[10, 100, 1000], help="文章数量")
+    args = parser.parse_args()
+
+    counter = QueryCounter()
+    results = {}
+    print(f"{'文章数':>8} " + " ".join(f"{name:>12}" for name in CASES))
+    for count in args.posts:
+        seed(count)
+        results[count] = {name: counter.measure(run_with_session(fn)) for name, fn in CASES.items()}
+        print(f"{count:>8} " + " ".join(f"{results[count][name]:>12}" for name in CASES))
+
+    smallest = min(args.posts)
+    for name in CASES:
+        if name == "lazy":
+            continue
+        base = results[smallest][name]
+        for count in args.posts:
+            # 每多一批 selectinload 允许多一条查询
+            batches = max(1, math.ceil(count / SELECTIN_BATCH_SIZE)) - 1
+            assert results[count][name] <= base + batches, (
+                f"{name} 的查询次数随文章数量变化: {smallest} 篇 {base} 条, {count} 篇 {results[count][name]} 条"
+            )
+    print("预加载后各列表的查询次数与文章数量无关")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+文章查询行宽对比
+
+在内存 SQLite 中构造带大正文和自动保存内容的文章，对比两种表结构下
+只用到元数据的文章查询的耗时和内存峰值（tracemalloc）：
+- before：正文随文章加载，自动保存内容存放在 posts 表中并随文章加载（旧结构）
+- after：正文默认延迟加载，自动保存内容存放在 post_autosaves 表中
+
+查询：
+- trash：回收站列表（build_post_list_query + fetch_post_page，默认加载全部映射列）
+- orm：db.query(Post) 的默认加载（置顶切换、按分类/标签统计、密码校验等）
+- posts(summary)：GET /api/posts?view=summary，按字段加载，两种结构下相同，作为对照
+
+用法（在 backend 目录下执行）：
+    python benchmarks/bench_post_row_width.py [--posts 200] [--content-kb 20] [--autosave-kb 20]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ.setdefault("SECRET_KEY", "bench-post-row-width")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import literal_column, text  # noqa: E402
+from sqlalchemy.dialects.mysql import LONGBLOB, LONGTEXT  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+from sqlalchemy.orm import undefer  # noqa: E402
+
+
+@compiles(LONGTEXT, "sqlite")
+def compile_longtext(type_, compiler, **kw):
+    """SQLite 没有 LONGTEXT，按 TEXT 建表"""
+    return "TEXT"
+
+
+@compiles(LONGBLOB, "sqlite")
+def compile_longblob(type_, compiler, **kw):
+    """SQLite 没有 LONGBLOB，按 BLOB 建表"""
+    return "BLOB"
+
+
+import models  # noqa: E402
+from database import Base, SessionLocal, engine  # noqa: E402
+from post_queries import build_post_list_query, fetch_post_page, resolve_post_fields  # noqa: E402
+from routes.posts import query_posts_page  # noqa: E402
+
+REPEATS = 5
+
+
+def seed(count: int, content_kb: int, autosave_kb: int) -> None:
+    """建表并写入 count 篇文章（半数在回收站）；旧结构的自动保存列另行添加并填充"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE posts ADD COLUMN autosave_data TEXT"))
+
+    db = SessionLocal()
+    category = models.Category(name="分类", slug="cat")
+    tags = [models.Tag(name=f"标签{i}", slug=f"tag-{i}") for i in range(5)]
+    db.add_all([category] + tags)
+    content = "正文内容。" * (content_kb * 1024 // 15)
+    autosave = '{"content": "%s"}' % ("草稿内容。" * (autosave_kb * 1024 // 15))
+    now = datetime(2024, 1, 1)
+    for i in range(count):
+        post = models.Post(
+            title=f"文章 {i}",
+            slug=f"post-{i}",
+            content=content,
+            published_at=now - timedelta(hours=i),
+            category=category,
+            tags=tags[:3],
+            deleted_at=now if i % 2 else None
+        )
+        post.autosave = models.PostAutosave(data=autosave, saved_at=now)
+        db.add(post)
+    db.commit()
+    db.close()
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE posts SET autosave_data = :data"), {"data": autosave})
+
+
+def legacy(query):
+    """旧结构：正文和 posts 表中的自动保存内容随文章一起加载"""
+    return query.options(undefer(models.Post.content)).add_columns(literal_column("posts.autosave_data"))
+
+
+def trash_list(db, before: bool) -> None:
+    query = build_post_list_query(db, deleted_only=True, order_by=(models.Post.deleted_at.desc(),))
+    if before:
+        query = legacy(query)
+    rows, _ = fetch_post_page(query, 1, 10, all=True)
+    for row in rows:
+        p = row[0] if before else row
+        _ = (p.title, p.category.name if p.category else None, [t.name for t in p.tags])
+
+
+def orm_list(db, before: bool) -> None:
+    query = db.query(models.Post).filter(models.Post.deleted_at == None)
+    if before:
+        query = legacy(query)
+    for row in query.all():
+        p = row[0] if before else row
+        _ = (p.id, p.pinned, p.category_id)
+
+
+def summary_list(db, before: bool) -> None:
+    query_posts_page(db, 1, 10, True, False, [], fields=resolve_post_fields(view="summary"))
+
+
+CASES = {
+    "trash": trash_list,
+    "orm": orm_list,
+    "posts(summary)": summary_list,
+}
+
+
+def measure(fn, before: bool):
+    """返回 (最短耗时毫秒, 内存峰值 KB)"""
+    best = None
+    for _ in range(REPEATS):
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            fn(db, before)
+            elapsed = (time.perf_counter() - start) * 1000
+        finally:
+            db.close()
+        best = elapsed if best is None else min(best, elapsed)
+
+    db = SessionLocal()
+    try:
+        tracemalloc.start()
+        fn(db, before)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        db.close()
+    return best, peak / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="文章查询行宽对比")
+    parser.add_argument("--posts", type=int, default=200, help="文章数量")
+    parser.add_argument("--content-kb", type=int, default=20, help="每篇正文大小（KB）")
+    parser.add_argument("--autosave-kb", type=int, default=20, help="每篇自动保存内容大小（KB）")
+    args = parser.parse_args()
+
+    seed(args.posts, args.content_kb, args.autosave_kb)
+    print(f"{args.posts} 篇文章，正文 {args.content_kb}KB，自动保存 {args.autosave_kb}KB")
+    print(f"{'查询':<16} {'before ms':>10} {'after ms':>10} {'before KB':>12} {'after KB':>12}")
+    for name, fn in CASES.items():
+        before_ms, before_kb = measure(fn, True)
+        after_ms, after_kb = measure(fn, False)
+        print(f"{name:<16} {before_ms:>10.2f} {after_ms:>10.2f} {before_kb:>12.0f} {after_kb:>12.0f}")
+        if name != "posts(summary)":
+            assert after_kb < before_kb, f"{name} 的内存峰值没有下降: {before_kb:.0f}KB -> {after_kb:.0f}KB"
+    print("延迟加载正文、自动保存分表后，元数据查询不再读取大字段")
+
+
+if __name__ == "__main__":
+    main()
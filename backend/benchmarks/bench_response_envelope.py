@@ -0,0 +1,98 @@
+"""
+响应封装基准测试
+
+对比两种生成 code/msg/data 响应体的方式：
+- middleware：旧实现，先由 JSONResponse 编码，再在中间件中 json.loads、标准化后重新编码
+- envelope：EnvelopeJSONResponse 在序列化时直接生成统一结构，只编码一次
+
+用法（在 backend 目录下执行）：
+    python benchmarks/bench_response_envelope.py [--posts 10 100 1000] [--repeat 200]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+import response_utils  # noqa: E402
+from response_utils import EnvelopeJSONResponse, normalize_payload  # noqa: E402
+
+
+def build_posts(count: int) -> list:
+    """构造与 GET /api/posts?all=true 结构相同的文章列表"""
+    now = datetime(2024, 1, 1)
+    content = "Firefly 示例正文。" * 200
+    return jsonable_encoder([{
+        "id": f"00000000-0000-0000-0000-{i:012d}",
+        "title": f"示例文章 {i}",
+        "slug": f"post-{i}",
+        "description": "文章摘要" * 10,
+        "content": content,
+        "image": f"/uploads/cover-{i}.webp",
+        "published_at": now - timedelta(days=i),
+        "category": "随笔",
+        "tags": ["Python", "FastAPI", "Astro"],
+        "is_draft": False,
+        "pinned": i < 3,
+        "pin_order": i if i < 3 else 0,
+        "has_password": False,
+        "status": "published",
+        "scheduled_at": None,
+        "autosave_available": False,
+        "deleted_at": None,
+        "_pagination": {"page": 1, "page_size": count, "total": count, "total_pages": 1}
+    } for i in range(count)])
+
+
+def via_middleware(content) -> bytes:
+    """旧实现：编码 -> 解析 -> 标准化 -> 再编码"""
+    response = JSONResponse(content=content)
+    payload = json.loads(response.body)
+    normalized = normalize_payload(payload, "GET", response.status_code)
+    return JSONResponse(status_code=response.status_code, content=normalized).body
+
+
+def via_envelope(content) -> bytes:
+    """新实现：序列化时直接生成统一结构"""
+    return EnvelopeJSONResponse(content=content).body
+
+
+def measure(fn, content, repeat: int) -> float:
+    """返回单次调用的平均耗时（微秒）"""
+    fn(content)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(content)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="响应封装基准测试")
+    parser.add_argument("--posts", type=int, nargs="+", default=[10, 100, 1000], help="文章数量")
+    parser.add_argument("--repeat", type=int, default=200, help="每组重复次数")
+    args = parser.parse_args()
+
+    encoder = "orjson" if response_utils.orjson is not None else "json"
+    print(f"JSON 编码器: {encoder}")
+    print(f"{'文章数':>8} {'响应体(KB)':>12} {'middleware(us)':>16} {'envelope(us)':>14} {'节省':>8}")
+    for count in args.posts:
+        content = build_posts(count)
+        body = via_envelope(content)
+        assert json.loads(body) == json.loads(via_middleware(content))
+        repeat = max(1, args.repeat * 10 // max(count, 10))
+        old = measure(via_middleware, content, repeat)
+        new = measure(via_envelope, content, repeat)
+        print(
+            f"{count:>8} {len(body) / 1024:>12.1f} {old:>16.0f} {new:>14.0f} "
+            f"{(1 - new / old) * 100:>7.1f}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
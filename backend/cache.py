@@ -1,10 +1,20 @@
 """
 简单的内存缓存模块
 用于减少数据库查询压力，提升 API 响应速度
+
+多 worker 部署时可通过 CACHE_BACKEND / CACHE_BROADCAST_ENABLED 启用
+同一主机内的共享二级缓存与失效广播（见 cache_shared.py）
 """
+import asyncio
+import inspect
+import logging
+import os
+import sys
 import time
 import threading
-from typing import Any, Optional, Dict, Callable
+import uuid
+from collections import OrderedDict
+from typing import Any, Optional, Dict, Callable, Iterable, List, Set
 from functools import wraps
 import hashlib
 import json
@@ -18,48 +28,716 @@ DEFAULT_CACHE_TTL = {
     "frontend": 300,     # 前端缓存：5 分钟
 }
 
-# 缓存配置获取函数（延迟绑定，避免循环导入）
-_get_cache_ttl_from_db: Optional[Callable[[str], int]] = None
+# 单个缓存实例的容量上限（每个 worker 进程独立计算）
+# 条目数上限，0 表示不限制
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2000"))
+# 近似字节数上限，默认 64MB，0 表示不限制
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# 后台清理过期缓存的间隔（秒）
+CACHE_SWEEP_INTERVAL = int(os.getenv("CACHE_SWEEP_INTERVAL", "60"))
+if CACHE_SWEEP_INTERVAL < 5:
+    CACHE_SWEEP_INTERVAL = 5
+
+# 缓存后端：memory（仅进程内存）或 sqlite（进程内存 + 本机共享 SQLite 二级缓存）
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").strip().lower()
+# 共享缓存目录，同一主机上的所有 worker 需指向同一目录
+CACHE_SHARED_DIR = os.getenv("CACHE_SHARED_DIR", "cache_shared")
+# 是否在 worker 之间广播缓存失效（sqlite 后端始终启用）
+CACHE_BROADCAST_ENABLED = CACHE_BACKEND == "sqlite" or os.getenv(
+    "CACHE_BROADCAST_ENABLED", "false"
+).strip().lower() in ("1", "true", "yes", "y", "on")
+
+logger = logging.getLogger("firefly")
+
+# 已创建的缓存实例（用于统一清理与统计）
+_registry: List["SimpleCache"] = []
+
+# 共享存储与失效广播（首次使用时初始化）
+_shared_backend = None
+_bus = None
+_shared_ready = False
+_shared_lock = threading.Lock()
+
+
+def _init_shared() -> None:
+    """按配置打开共享缓存目录，失败时退回纯内存缓存"""
+    global _shared_backend, _bus, _shared_ready
+    if _shared_ready:
+        return
+    with _shared_lock:
+        if _shared_ready:
+            return
+        if CACHE_BROADCAST_ENABLED:
+            try:
+                from cache_shared import open_shared_cache
+                _shared_backend, _bus = open_shared_cache(
+                    CACHE_SHARED_DIR, with_backend=CACHE_BACKEND == "sqlite"
+                )
+            except Exception as exc:
+                logger.warning(f"共享缓存初始化失败，使用进程内缓存: {exc}")
+                _shared_backend, _bus = None, None
+        _shared_ready = True
+
 
+def get_shared_backend():
+    """获取共享二级缓存存储，未启用时返回 None"""
+    _init_shared()
+    return _shared_backend
 
-def set_cache_ttl_getter(getter: Callable[[str], int]) -> None:
-    """设置从数据库获取缓存 TTL 的函数"""
-    global _get_cache_ttl_from_db
-    _get_cache_ttl_from_db = getter
+
+def get_invalidation_bus():
+    """获取失效广播，未启用时返回 None"""
+    _init_shared()
+    return _bus
+
+
+def sync_remote_invalidations() -> int:
+    """
+    应用其他 worker 发布的缓存失效
+
+    版本号未变化时只读取一次 mmap，开销可忽略。
+
+    Returns:
+        应用的事件数量
+    """
+    bus = get_invalidation_bus()
+    if bus is None:
+        return 0
+    try:
+        events = bus.poll()
+    except Exception as exc:
+        logger.warning(f"读取缓存失效广播失败: {exc}")
+        return 0
+    if not events:
+        return 0
+    from cache_shared import FLUSH_NAMESPACE
+    global _content_loaded
+    caches = {cache.name: cache for cache in list(_registry)}
+    for seq, created_at, namespace, op, args in events:
+        if namespace == FLUSH_NAMESPACE:
+            # 错过了已清理的事件，无法确定哪些缓存失效：清空进程内缓存并重新读取内容版本
+            logger.warning("缓存失效广播落后过多，清空进程内缓存")
+            for cache in caches.values():
+                if cache.shared:
+                    cache._apply("clear", None)
+            invalidate_cache_ttls(broadcast=False)
+            _content_loaded = False
+            continue
+        if namespace == CACHE_TTL_NAMESPACE:
+            invalidate_cache_ttls(broadcast=False)
+            continue
+        if op in (CONTENT_WRITE_OP, CONTENT_TOUCH_OP):
+            _note_content_change(namespace, seq, created_at, written=op == CONTENT_WRITE_OP)
+            continue
+        cache = caches.get(namespace)
+        if cache is not None:
+            cache._apply(op, args)
+    return len(events)
+
+# 失效广播中 TTL 配置变更事件的命名空间
+CACHE_TTL_NAMESPACE = "cache_ttl"
+# 失效广播中公开内容写入事件的操作名（见 note_content_write）
+CONTENT_WRITE_OP = "write"
+# 只改变内容版本、不计入读写分离写入的事件操作名（见 note_content_touch）
+CONTENT_TOUCH_OP = "touch"
+
+
+def _worker_group_epoch() -> tuple:
+    """
+    未启用广播时内容版本的标识与起始时间
+
+    取父进程（uvicorn / gunicorn 主进程）的 PID 与启动时间：同一主进程启动的 worker 相同，
+    主进程重启后变化。无法读取时（非 Linux）退回本进程的随机标识。
+
+    Returns:
+        (标识, 起始时间戳)
+    """
+    try:
+        ppid = os.getppid()
+        with open(f"/proc/{ppid}/stat", "r") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/stat", "r") as f:
+            boot_time = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        started_at = boot_time + start_ticks / os.sysconf("SC_CLK_TCK")
+        epoch = hashlib.sha1(f"{ppid}:{boot_time}:{start_ticks}".encode()).hexdigest()[:8]
+        return epoch, started_at
+    except (OSError, ValueError, IndexError, StopIteration):
+        return uuid.uuid4().hex[:8], time.time()
+
+
+# 内容版本：每个命名空间（posts/categories/tags/settings）的公开内容写入时递增，
+# 用于生成 HTTP ETag / Last-Modified，并决定读请求能否走只读副本。
+# 启用失效广播时版本取自全主机共享的写入事件序号，各 worker 一致；
+# 否则为同一主进程下各 worker 共用的标识加本进程的写入计数
+_EPOCH, _EPOCH_STARTED_AT = _worker_group_epoch()
+_content_versions: Dict[str, int] = {}
+_content_modified: Dict[str, float] = {}
+# 最近一次公开内容写入的时间（不含 note_content_touch），决定读请求能否走只读副本
+_content_written: Dict[str, float] = {}
+_content_loaded = False
+_content_lock = threading.Lock()
+
+
+def _note_content_change(
+    namespace: str,
+    seq: Optional[int] = None,
+    changed_at: Optional[float] = None,
+    written: bool = True
+) -> None:
+    """
+    记录命名空间内容变化
+
+    Args:
+        namespace: 命名空间
+        seq: 广播事件序号，未启用广播时为 None
+        changed_at: 变化时间戳
+        written: 是否计为公开内容写入（False 时只改变版本）
+    """
+    changed_at = changed_at or time.time()
+    with _content_lock:
+        if written and changed_at > _content_written.get(namespace, 0.0):
+            _content_written[namespace] = changed_at
+        current = _content_versions.get(namespace, 0)
+        if seq is None:
+            seq = current + 1
+        elif seq <= current:
+            return
+        _content_versions[namespace] = seq
+        _content_modified[namespace] = changed_at
+
+
+def _load_content_versions(bus) -> None:
+    """启用广播时，首次使用前从事件表读取各命名空间最近一次写入，作为初始版本"""
+    global _content_loaded
+    if _content_loaded:
+        return
+    try:
+        written = bus.latest_events(CONTENT_WRITE_OP)
+        touched = bus.latest_events(CONTENT_TOUCH_OP)
+    except Exception as exc:
+        logger.warning(f"读取内容版本失败: {exc}")
+        return
+    for namespace, (seq, created_at) in written.items():
+        _note_content_change(namespace, seq, created_at)
+    for namespace, (seq, created_at) in touched.items():
+        _note_content_change(namespace, seq, created_at, written=False)
+    _content_loaded = True
+
+
+def _publish_content_change(namespaces, op: str) -> None:
+    """记录内容变化，启用广播时通知其他 worker"""
+    bus = get_invalidation_bus()
+    written = op == CONTENT_WRITE_OP
+    for namespace in namespaces:
+        if bus is None:
+            _note_content_change(namespace, written=written)
+            continue
+        try:
+            changed_at = time.time()
+            _note_content_change(namespace, bus.publish(namespace, op, None, changed_at), changed_at, written)
+        except Exception as exc:
+            logger.warning(f"广播内容变化失败 [{namespace}]: {exc}")
+
+
+def note_content_write(*namespaces: str) -> None:
+    """
+    记录公开内容的写入，启用广播时通知其他 worker
+
+    只由下方的失效函数在文章、分类、标签、设置发生写入时调用；
+    管理员缓存等与公开内容无关的失效不计入。
+    """
+    _publish_content_change(namespaces, CONTENT_WRITE_OP)
+
+
+def note_content_touch(*namespaces: str) -> None:
+    """
+    只改变内容版本（ETag），不计为公开内容写入
+
+    用于自动保存标志等响应中的附带字段变化：条件请求需要拿到新内容，
+    但这类变化频繁且不影响文章本身，读请求仍可走只读副本。
+    """
+    _publish_content_change(namespaces, CONTENT_TOUCH_OP)
+
+
+def get_last_content_change() -> float:
+    """最近一次公开内容写入（启用广播时含其他 worker）的时间戳，没有写入时为 0"""
+    sync_remote_invalidations()
+    with _content_lock:
+        return max(_content_written.values(), default=0.0)
+
+
+def get_content_version(namespace: str) -> tuple:
+    """
+    获取命名空间的内容版本
+
+    未启用广播时其他 worker 的写入不可见，版本额外按该类型的缓存 TTL 分段轮换，
+    使条件请求的陈旧时间不超过数据缓存本身；没有写入过的 worker 之间版本相同。
+
+    Returns:
+        (版本字符串, 最后修改时间戳)
+    """
+    sync_remote_invalidations()
+    bus = get_invalidation_bus()
+    if bus is not None:
+        _load_content_versions(bus)
+    with _content_lock:
+        modified = _content_modified.get(namespace, _EPOCH_STARTED_AT)
+        counter = _content_versions.get(namespace, 0)
+    if bus is not None:
+        return f"s{counter}", modified
+    ttl = max(get_cache_ttl(namespace), 1)
+    bucket = int(time.time() // ttl)
+    # 本进程有过写入时带上进程号，避免与其他 worker 的同名计数混淆
+    version = f"{_EPOCH}.{bucket}" if not counter else f"{_EPOCH}.{os.getpid()}.{counter}.{bucket}"
+    return version, max(modified, bucket * ttl)
+
+
+# 缓存 TTL 配置快照的重新加载间隔（秒），用于感知其他 worker 写入的设置
+CACHE_TTL_REFRESH_INTERVAL = int(os.getenv("CACHE_TTL_REFRESH_INTERVAL", "30"))
+
+# 缓存 TTL 配置加载函数（延迟绑定，避免循环导入），返回 {缓存类型: TTL}
+_cache_ttl_loader: Optional[Callable[[], Dict[str, int]]] = None
+
+# 缓存 TTL 配置快照
+_ttl_snapshot: Dict[str, int] = {}
+_ttl_loaded_at = 0.0
+_ttl_dirty = True
+_ttl_lock = threading.Lock()
+_ttl_stats = {
+    'lookups': 0,
+    'loads': 0,
+    'poll_refreshes': 0,
+    'write_refreshes': 0,
+    'failures': 0
+}
+
+
+def set_cache_ttl_loader(loader: Callable[[], Dict[str, int]]) -> None:
+    """设置一次性加载全部缓存 TTL 配置的函数"""
+    global _cache_ttl_loader, _ttl_dirty
+    _cache_ttl_loader = loader
+    _ttl_dirty = True
+
+
+def invalidate_cache_ttls(broadcast: bool = True) -> None:
+    """
+    标记缓存 TTL 快照失效（缓存设置被写入后调用）
+
+    下一次 get_cache_ttl 时重新加载，写入路径本身不查询数据库；
+    启用失效广播时同时通知其他 worker。
+    """
+    global _ttl_dirty
+    _ttl_dirty = True
+    if not broadcast:
+        return
+    bus = get_invalidation_bus()
+    if bus is not None:
+        try:
+            bus.publish(CACHE_TTL_NAMESPACE, "reload", None)
+        except Exception as exc:
+            logger.warning(f"广播缓存 TTL 配置变更失败: {exc}")
+
+
+def _refresh_cache_ttls() -> None:
+    """按需重新加载 TTL 快照，同一时刻只有一个线程加载，其余线程继续使用旧快照"""
+    global _ttl_snapshot, _ttl_loaded_at, _ttl_dirty
+    if not _ttl_lock.acquire(blocking=False):
+        return
+    try:
+        now = time.monotonic()
+        dirty = _ttl_dirty
+        if not dirty and now - _ttl_loaded_at < CACHE_TTL_REFRESH_INTERVAL:
+            return
+        initial = not _ttl_loaded_at
+        # 先清除标记，加载期间发生的写入会再次置位
+        _ttl_dirty = False
+        _ttl_loaded_at = now
+        try:
+            snapshot = _cache_ttl_loader()
+        except Exception as exc:
+            _ttl_stats['failures'] += 1
+            logger.warning(f"加载缓存 TTL 配置失败，继续使用旧配置: {exc}")
+            return
+        _ttl_snapshot = {k: v for k, v in snapshot.items() if v and v > 0}
+        _ttl_stats['loads'] += 1
+        if not initial:
+            _ttl_stats['write_refreshes' if dirty else 'poll_refreshes'] += 1
+    finally:
+        _ttl_lock.release()
 
 
 def get_cache_ttl(cache_type: str) -> int:
     """
     获取指定类型的缓存 TTL
 
-    优先从数据库读取，失败则使用默认值
+    读取进程内的配置快照：快照在缓存设置写入后或超过
+    CACHE_TTL_REFRESH_INTERVAL 时重新加载，未配置则使用默认值
     """
-    if _get_cache_ttl_from_db:
-        try:
-            ttl = _get_cache_ttl_from_db(cache_type)
-            if ttl and ttl > 0:
-                return ttl
-        except Exception:
-            pass
+    _ttl_stats['lookups'] += 1
+    if _cache_ttl_loader and (
+        _ttl_dirty or time.monotonic() - _ttl_loaded_at >= CACHE_TTL_REFRESH_INTERVAL
+    ):
+        _refresh_cache_ttls()
+    ttl = _ttl_snapshot.get(cache_type)
+    if ttl:
+        return ttl
     return DEFAULT_CACHE_TTL.get(cache_type, 300)
 
 
+def get_cache_ttl_stats() -> Dict[str, Any]:
+    """获取缓存 TTL 快照的统计信息"""
+    return {
+        **_ttl_stats,
+        'refresh_interval': CACHE_TTL_REFRESH_INTERVAL,
+        'age_seconds': round(time.monotonic() - _ttl_loaded_at, 1) if _ttl_loaded_at else None,
+        'snapshot': dict(_ttl_snapshot)
+    }
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    估算缓存值占用的内存字节数
+
+    只做近似统计（递归累加容器和元素的 sys.getsizeof），
+    用于容量控制而非精确计量。
+    """
+    size = sys.getsizeof(value)
+    if _depth >= 8:
+        return size
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += estimate_size(item, _depth + 1)
+    return size
+
+
+def _resolve_tags(tags, result) -> Optional[Iterable[str]]:
+    """标签可以是固定集合，也可以是根据加载结果计算标签的函数"""
+    if callable(tags):
+        return tags(result)
+    return tags
+
+
+class _InFlightCall:
+    """正在执行的加载调用"""
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    同步请求合并（single-flight）
+
+    同一个键同时只允许一个调用者执行加载函数，
+    其余调用者等待并共享该次结果（或异常）。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _InFlightCall] = {}
+
+    def in_flight(self, key: str) -> bool:
+        """判断指定键是否正在加载"""
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key: str, fn: Callable[[], Any]) -> tuple:
+        """
+        执行或等待加载
+
+        Returns:
+            (结果, 是否复用了其他调用者的结果)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result, False
+
+
+class AsyncSingleFlight:
+    """异步请求合并，语义同 SingleFlight，按事件循环隔离"""
+
+    def __init__(self):
+        self._calls: Dict[tuple, "asyncio.Future"] = {}
+
+    def in_flight(self, key: str) -> bool:
+        """判断指定键是否正在加载"""
+        return (id(asyncio.get_running_loop()), key) in self._calls
+
+    async def do(self, key: str, fn: Callable[[], Any]) -> tuple:
+        """
+        执行或等待加载（fn 为返回协程的函数）
+
+        Returns:
+            (结果, 是否复用了其他调用者的结果)
+        """
+        loop = asyncio.get_running_loop()
+        call_key = (id(loop), key)
+        future = self._calls.get(call_key)
+        if future is not None:
+            # shield 避免等待者被取消时连带取消共享的结果
+            return await asyncio.shield(future), True
+
+        future = loop.create_future()
+        self._calls[call_key] = future
+        try:
+            result = await fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            # 标记异常已被读取，避免无人等待时出现 "never retrieved" 警告
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            self._calls.pop(call_key, None)
+
+
 class SimpleCache:
     """
     简单的内存缓存实现
-    支持 TTL（过期时间）和手动清除
+    支持 TTL（过期时间）、按标签失效和手动清除，
+    按条目数与近似字节数限制容量，超出时按 LRU 淘汰；
+    get_or_load / aget_or_load 提供请求合并与过期后继续返回旧值（stale-while-revalidate）
     """
 
-    def __init__(self, default_ttl: int = 300):
+    def __init__(
+        self,
+        default_ttl: int = 300,
+        name: str = "default",
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        backend=None,
+        shared: bool = True,
+        shared_store: bool = True
+    ):
         """
         初始化缓存
 
         Args:
             default_ttl: 默认缓存时间（秒），默认 5 分钟
+            name: 缓存名称（用于统计，同时作为共享存储和失效广播的命名空间）
+            max_entries: 最大条目数，默认读取 CACHE_MAX_ENTRIES，0 表示不限制
+            max_bytes: 最大近似字节数，默认读取 CACHE_MAX_BYTES，0 表示不限制
+            backend: 二级缓存存储（CacheBackend），默认按 CACHE_BACKEND 配置
+            shared: 是否参与共享存储与失效广播（进程私有的缓存设为 False）
+            shared_store: 是否把缓存值写入共享存储（含敏感数据的缓存设为 False，只广播失效）
         """
-        self._cache: Dict[str, Dict[str, Any]] = {}
+        # 按访问顺序排列，最久未使用的在最前面
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # 标签 -> 缓存键集合，用于按依赖关系精确失效
+        self._tag_index: Dict[str, Set[str]] = {}
         self._lock = threading.RLock()
         self.default_ttl = default_ttl
+        self.name = name
+        self.max_entries = CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._rejected = 0
+        self._coalesced = 0
+        self._stale_hits = 0
+        self._refreshes = 0
+        self._shared_hits = 0
+        self._shared_errors = 0
+        # 本进程失效操作的计数，用于丢弃失效期间从共享存储读到的旧值
+        self._generation = 0
+        self._flight = SingleFlight()
+        self._async_flight = AsyncSingleFlight()
+        self._backend = backend
+        self.shared = shared
+        self.shared_store = shared_store
+        _registry.append(self)
+
+    def _get_backend(self):
+        """当前使用的二级缓存存储"""
+        if self._backend is not None:
+            return self._backend
+        return get_shared_backend() if self.shared and self.shared_store else None
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        查找缓存项（调用方不能持有锁）
+
+        本进程未命中时在锁外读取共享存储，避免磁盘读取阻塞其他线程；
+        读取期间如有失效（本进程的失效操作或新的广播事件），不写回本进程缓存。
+        返回的缓存项可能在调用方加锁前被删除，调用方需在锁内确认它仍是当前缓存项。
+        """
+        with self._lock:
+            item = self._cache.get(key)
+            if item is not None:
+                return item
+            generation = self._generation
+        backend = self._get_backend()
+        if backend is None:
+            return None
+        bus = get_invalidation_bus()
+        try:
+            bus_version = bus.version() if bus is not None else None
+            entry = backend.get(self.name, key)
+        except Exception as exc:
+            with self._lock:
+                self._shared_errors += 1
+            logger.warning(f"读取共享缓存失败 [{self.name}]: {exc}")
+            return None
+        if entry is None:
+            return None
+        size = estimate_size(entry['value']) + len(key)
+        with self._lock:
+            if generation != self._generation or (bus is not None and bus.version() != bus_version):
+                return None
+            item = self._cache.get(key)
+            if item is not None:
+                # 其他线程已写入本进程缓存
+                return item
+            self._shared_hits += 1
+            return self._store_local(
+                key, entry['value'], entry['expires_at'], entry['stale_until'], entry['tags'], size
+            )
+
+    def _store_local(
+        self,
+        key: str,
+        value: Any,
+        expires_at: float,
+        stale_until: float,
+        tags: Iterable[str],
+        size: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """写入本进程缓存（调用方需持有锁），超过容量上限时返回 None"""
+        if size is None:
+            size = estimate_size(value) + len(key)
+        self._remove(key)
+        if self.max_bytes and size > self.max_bytes:
+            # 单个值超过容量上限，不缓存
+            self._rejected += 1
+            return None
+        tag_set = frozenset(tags or ())
+        item = {
+            'value': value,
+            'expires_at': expires_at,
+            'stale_until': stale_until,
+            'tags': tag_set,
+            'size': size
+        }
+        self._cache[key] = item
+        self._bytes += size
+        for tag in tag_set:
+            self._tag_index.setdefault(tag, set()).add(key)
+        self._evict_overflow()
+        return item
+
+    def _apply(self, op: str, args: Any) -> int:
+        """
+        在本进程缓存上执行失效操作
+
+        Args:
+            op: delete / delete_pattern / invalidate_tags / clear
+            args: 操作参数
+
+        Returns:
+            删除的缓存数量
+        """
+        with self._lock:
+            self._generation += 1
+            if op == "delete":
+                if args in self._cache:
+                    self._remove(args)
+                    return 1
+                return 0
+            if op == "delete_pattern":
+                keys_to_delete = [k for k in self._cache.keys() if k.startswith(args)]
+            elif op == "invalidate_tags":
+                keys_to_delete = set()
+                for tag in args:
+                    keys_to_delete.update(self._tag_index.get(tag, ()))
+            elif op == "clear":
+                count = len(self._cache)
+                self._cache.clear()
+                self._tag_index.clear()
+                self._bytes = 0
+                return count
+            else:
+                return 0
+            for key in keys_to_delete:
+                self._remove(key)
+            return len(keys_to_delete)
+
+    def _propagate(self, op: str, args: Any) -> None:
+        """把失效操作同步到共享存储并广播给其他 worker（内容版本见 note_content_write）"""
+        if not self.shared:
+            return
+        backend = self._get_backend()
+        bus = get_invalidation_bus()
+        try:
+            if backend is not None:
+                if op == "delete":
+                    backend.delete(self.name, args)
+                elif op == "delete_pattern":
+                    backend.delete_pattern(self.name, args)
+                elif op == "invalidate_tags":
+                    backend.invalidate_tags(self.name, args)
+                elif op == "clear":
+                    backend.clear(self.name)
+            if bus is not None:
+                bus.publish(self.name, op, args)
+        except Exception as exc:
+            with self._lock:
+                self._shared_errors += 1
+            logger.warning(f"同步缓存失效失败 [{self.name}]: {exc}")
+
+    def _remove(self, key: str) -> None:
+        """删除缓存项并同步清理标签索引（调用方需持有锁）"""
+        item = self._cache.pop(key, None)
+        if not item:
+            return
+        self._bytes -= item['size']
+        for tag in item['tags']:
+            keys = self._tag_index.get(tag)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self._tag_index[tag]
+
+    def _evict_overflow(self) -> None:
+        """淘汰最久未使用的缓存直到满足容量限制（调用方需持有锁）"""
+        while self._cache and (
+            (self.max_entries and len(self._cache) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            oldest_key = next(iter(self._cache))
+            self._remove(oldest_key)
+            self._evictions += 1
 
     def get(self, key: str) -> Optional[Any]:
         """
@@ -71,19 +749,66 @@ class SimpleCache:
         Returns:
             缓存的值，如果不存在或已过期则返回 None
         """
+        if self.shared:
+            sync_remote_invalidations()
+        item = self._lookup(key)
         with self._lock:
-            if key not in self._cache:
+            if item is None or self._cache.get(key) is not item:
+                self._misses += 1
                 return None
 
-            item = self._cache[key]
-            if item['expires_at'] < time.time():
-                # 缓存已过期，删除并返回 None
-                del self._cache[key]
+            now = time.time()
+            if item['expires_at'] < now:
+                if item['stale_until'] < now:
+                    # 缓存已过期，删除并返回 None
+                    self._remove(key)
+                    self._expirations += 1
+                # 仍处于 stale 窗口内的条目保留给 get_or_load 使用
+                self._misses += 1
                 return None
 
+            self._cache.move_to_end(key)
+            self._hits += 1
             return item['value']
 
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+    def get_entry(self, key: str) -> Optional[tuple]:
+        """
+        获取缓存值及其新鲜度
+
+        Returns:
+            (值, 是否未过期)；不存在或已超出 stale 窗口时返回 None
+        """
+        if self.shared:
+            sync_remote_invalidations()
+        item = self._lookup(key)
+        with self._lock:
+            if item is None or self._cache.get(key) is not item:
+                self._misses += 1
+                return None
+
+            now = time.time()
+            if item['stale_until'] < now:
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._cache.move_to_end(key)
+            fresh = item['expires_at'] >= now
+            if fresh:
+                self._hits += 1
+            else:
+                self._stale_hits += 1
+            return item['value'], fresh
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None,
+        stale_ttl: int = 0
+    ) -> None:
         """
         设置缓存值
 
@@ -91,13 +816,140 @@ class SimpleCache:
             key: 缓存键
             value: 要缓存的值
             ttl: 过期时间（秒），如果不指定则使用默认值
+            tags: 缓存标签（该缓存依赖的数据），用于 invalidate_tags 精确失效
+            stale_ttl: 过期后仍可返回旧值的时长（秒），期间由一个调用者在后台刷新
         """
+        size = estimate_size(value) + len(key)
+        expires_at = time.time() + (ttl if ttl is not None else self.default_ttl)
+        stale_until = expires_at + max(stale_ttl, 0)
+        tag_set = frozenset(tags or ())
         with self._lock:
-            expires_at = time.time() + (ttl if ttl is not None else self.default_ttl)
-            self._cache[key] = {
-                'value': value,
-                'expires_at': expires_at
-            }
+            item = self._store_local(key, value, expires_at, stale_until, tag_set, size)
+        if item is None:
+            return
+
+        backend = self._get_backend()
+        if backend is None:
+            return
+        try:
+            backend.set(self.name, key, value, tag_set, expires_at, stale_until)
+        except Exception as exc:
+            with self._lock:
+                self._shared_errors += 1
+            logger.warning(f"写入共享缓存失败 [{self.name}]: {exc}")
+
+    def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None,
+        stale_ttl: int = 0
+    ) -> Any:
+        """
+        读取缓存，未命中时调用 loader 加载并写入缓存
+
+        同一个键并发未命中时只有一个调用者执行 loader，其余调用者共享结果。
+        设置 stale_ttl 时，过期但仍在窗口内的值会被直接返回，并在后台线程中刷新一次；
+        此时 loader 不能依赖请求级资源（如请求的数据库会话）。
+
+        Args:
+            key: 缓存键
+            loader: 无参加载函数
+            ttl: 过期时间（秒）
+            tags: 缓存标签，或根据加载结果返回标签的函数
+            stale_ttl: stale-while-revalidate 窗口（秒）
+
+        Returns:
+            缓存值或新加载的值
+        """
+        entry = self.get_entry(key)
+        if entry is not None:
+            value, fresh = entry
+            if not fresh and not self._flight.in_flight(key):
+                threading.Thread(
+                    target=self._background_refresh,
+                    args=(key, loader, ttl, tags, stale_ttl),
+                    name=f"cache-refresh-{self.name}",
+                    daemon=True
+                ).start()
+            return value
+
+        def load():
+            result = loader()
+            if result is not None:
+                self.set(key, result, ttl, tags=_resolve_tags(tags, result), stale_ttl=stale_ttl)
+            return result
+
+        result, shared = self._flight.do(key, load)
+        if shared:
+            with self._lock:
+                self._coalesced += 1
+        return result
+
+    def _background_refresh(self, key, loader, ttl, tags, stale_ttl) -> None:
+        """后台刷新 stale 条目，失败时保留旧值直至 stale 窗口结束"""
+        def load():
+            result = loader()
+            if result is not None:
+                self.set(key, result, ttl, tags=_resolve_tags(tags, result), stale_ttl=stale_ttl)
+            return result
+
+        try:
+            self._flight.do(key, load)
+            with self._lock:
+                self._refreshes += 1
+        except Exception:
+            pass
+
+    async def aget_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None,
+        stale_ttl: int = 0
+    ) -> Any:
+        """
+        get_or_load 的异步版本，loader 为返回协程的无参函数
+
+        stale 条目的刷新在当前事件循环中以后台任务执行。
+        """
+        entry = self.get_entry(key)
+        if entry is not None:
+            value, fresh = entry
+            if not fresh and not self._async_flight.in_flight(key):
+                asyncio.get_running_loop().create_task(
+                    self._abackground_refresh(key, loader, ttl, tags, stale_ttl)
+                )
+            return value
+
+        async def load():
+            result = await loader()
+            if result is not None:
+                self.set(key, result, ttl, tags=_resolve_tags(tags, result), stale_ttl=stale_ttl)
+            return result
+
+        result, shared = await self._async_flight.do(key, load)
+        if shared:
+            with self._lock:
+                self._coalesced += 1
+        return result
+
+    async def _abackground_refresh(self, key, loader, ttl, tags, stale_ttl) -> None:
+        """异步后台刷新 stale 条目"""
+        async def load():
+            result = await loader()
+            if result is not None:
+                self.set(key, result, ttl, tags=_resolve_tags(tags, result), stale_ttl=stale_ttl)
+            return result
+
+        try:
+            await self._async_flight.do(key, load)
+            with self._lock:
+                self._refreshes += 1
+        except Exception:
+            pass
 
     def delete(self, key: str) -> bool:
         """
@@ -107,13 +959,11 @@ class SimpleCache:
             key: 缓存键
 
         Returns:
-            是否成功删除
+            是否成功删除（本进程缓存中是否存在）
         """
-        with self._lock:
-            if key in self._cache:
-                del self._cache[key]
-                return True
-            return False
+        deleted = self._apply("delete", key) > 0
+        self._propagate("delete", key)
+        return deleted
 
     def delete_pattern(self, pattern: str) -> int:
         """
@@ -123,18 +973,31 @@ class SimpleCache:
             pattern: 键的前缀模式
 
         Returns:
-            删除的缓存数量
+            删除的缓存数量（本进程）
         """
-        with self._lock:
-            keys_to_delete = [k for k in self._cache.keys() if k.startswith(pattern)]
-            for key in keys_to_delete:
-                del self._cache[key]
-            return len(keys_to_delete)
+        count = self._apply("delete_pattern", pattern)
+        self._propagate("delete_pattern", pattern)
+        return count
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """
+        删除带有任一指定标签的缓存
+
+        Args:
+            *tags: 缓存标签
+
+        Returns:
+            删除的缓存数量（本进程）
+        """
+        tag_list = list(tags)
+        count = self._apply("invalidate_tags", tag_list)
+        self._propagate("invalidate_tags", tag_list)
+        return count
 
     def clear(self) -> None:
         """清除所有缓存"""
-        with self._lock:
-            self._cache.clear()
+        self._apply("clear", None)
+        self._propagate("clear", None)
 
     def cleanup_expired(self) -> int:
         """
@@ -147,10 +1010,11 @@ class SimpleCache:
             now = time.time()
             keys_to_delete = [
                 k for k, v in self._cache.items()
-                if v['expires_at'] < now
+                if v['stale_until'] < now
             ]
             for key in keys_to_delete:
-                del self._cache[key]
+                self._remove(key)
+            self._expirations += len(keys_to_delete)
             return len(keys_to_delete)
 
     def stats(self) -> Dict[str, Any]:
@@ -164,25 +1028,76 @@ class SimpleCache:
             now = time.time()
             total = len(self._cache)
             expired = sum(1 for v in self._cache.values() if v['expires_at'] < now)
+            lookups = self._hits + self._misses
             return {
+                'name': self.name,
                 'total_keys': total,
                 'expired_keys': expired,
-                'active_keys': total - expired
+                'active_keys': total - expired,
+                'total_tags': len(self._tag_index),
+                'approx_bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'rejected': self._rejected,
+                'coalesced': self._coalesced,
+                'stale_hits': self._stale_hits,
+                'refreshes': self._refreshes,
+                'shared_hits': self._shared_hits,
+                'shared_errors': self._shared_errors
             }
 
 
 # 全局缓存实例
 # 文章列表缓存：5 分钟
-posts_cache = SimpleCache(default_ttl=300)
+posts_cache = SimpleCache(default_ttl=300, name="posts")
 
 # 分类缓存：10 分钟
-categories_cache = SimpleCache(default_ttl=600)
+categories_cache = SimpleCache(default_ttl=600, name="categories")
 
 # 标签缓存：10 分钟
-tags_cache = SimpleCache(default_ttl=600)
+tags_cache = SimpleCache(default_ttl=600, name="tags")
 
 # 设置缓存：30 分钟
-settings_cache = SimpleCache(default_ttl=1800)
+settings_cache = SimpleCache(default_ttl=1800, name="settings")
+
+
+def cleanup_all_expired() -> int:
+    """清理所有缓存实例中的过期项（以及共享存储中的过期项和旧失效事件），返回清理数量"""
+    count = sum(cache.cleanup_expired() for cache in list(_registry))
+    backend = get_shared_backend()
+    bus = get_invalidation_bus()
+    try:
+        if backend is not None:
+            count += backend.cleanup_expired()
+        if bus is not None:
+            bus.prune()
+    except Exception as exc:
+        logger.warning(f"清理共享缓存失败: {exc}")
+    return count
+
+
+def get_all_cache_stats() -> List[Dict[str, Any]]:
+    """获取所有缓存实例的统计信息"""
+    return [cache.stats() for cache in list(_registry)]
+
+
+def get_shared_cache_stats() -> Dict[str, Any]:
+    """获取共享缓存与失效广播的状态"""
+    bus = get_invalidation_bus()
+    backend = get_shared_backend()
+    return {
+        'backend': CACHE_BACKEND if backend is not None else "memory",
+        'broadcast_enabled': bus is not None,
+        'shared_dir': CACHE_SHARED_DIR if bus is not None else None,
+        'bus': bus.stats() if bus is not None else None,
+        'skipped_sensitive': getattr(backend, "skipped_sensitive", 0),
+        'skipped_unserializable': getattr(backend, "skipped_unserializable", 0)
+    }
 
 
 def make_cache_key(*args, **kwargs) -> str:
@@ -200,56 +1115,167 @@ def make_cache_key(*args, **kwargs) -> str:
     return hashlib.md5(key_data.encode()).hexdigest()
 
 
-def cached(cache: SimpleCache, key_prefix: str = '', ttl: Optional[int] = None):
+def cached(
+    cache: SimpleCache,
+    key_prefix: str = '',
+    ttl: Optional[int] = None,
+    stale_ttl: int = 0
+):
     """
     缓存装饰器
 
+    同时支持同步函数和异步函数。并发未命中同一个键时只执行一次被装饰函数，
+    设置 stale_ttl 后过期值会在窗口内继续返回，并由一次后台调用刷新。
+
     Args:
         cache: 缓存实例
         key_prefix: 缓存键前缀
         ttl: 过期时间（秒）
+        stale_ttl: stale-while-revalidate 窗口（秒），0 表示关闭
 
     Returns:
         装饰器函数
     """
+    def build_key(args, kwargs) -> str:
+        # 生成缓存键（忽略第一个参数，通常为 self / db）
+        key = make_cache_key(*args[1:], **kwargs)
+        return f"{key_prefix}:{key}" if key_prefix else key
+
     def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            # 生成缓存键
-            cache_key = f"{key_prefix}:{make_cache_key(*args[1:], **kwargs)}" if key_prefix else make_cache_key(*args[1:], **kwargs)
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await cache.aget_or_load(
+                    build_key(args, kwargs),
+                    lambda: func(*args, **kwargs),
+                    ttl,
+                    stale_ttl=stale_ttl
+                )
 
-            # 尝试从缓存获取
-            cached_value = cache.get(cache_key)
-            if cached_value is not None:
-                return cached_value
+            return async_wrapper
 
-            # 执行函数并缓存结果
-            result = func(*args, **kwargs)
-            cache.set(cache_key, result, ttl)
-            return result
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return cache.get_or_load(
+                build_key(args, kwargs),
+                lambda: func(*args, **kwargs),
+                ttl,
+                stale_ttl=stale_ttl
+            )
 
         return wrapper
     return decorator
 
 
+# 文章缓存标签
+# 列表类缓存统一带有 POSTS_LIST_TAG，同时带有列表中每篇文章及其分类、标签的标签
+POSTS_LIST_TAG = "posts:list"
+
+
+def post_cache_tag(post_id: str) -> str:
+    """文章缓存标签"""
+    return f"post:{post_id}"
+
+
+def category_cache_tag(category_id: str) -> str:
+    """分类缓存标签"""
+    return f"category:{category_id}"
+
+
+def tag_cache_tag(tag_id: str) -> str:
+    """标签缓存标签"""
+    return f"tag:{tag_id}"
+
+
 def invalidate_posts_cache():
     """清除所有文章相关缓存"""
     posts_cache.clear()
+    note_content_write("posts")
+
+
+def invalidate_post_cache(post_id: str, include_lists: bool = True, content_changed: bool = True) -> int:
+    """
+    清除依赖指定文章的缓存
+
+    Args:
+        post_id: 文章 ID
+        include_lists: 是否同时清除所有列表缓存
+            （文章增删、排序字段变化会影响所有分页结果）
+        content_changed: 是否为公开内容的写入；自动保存标志变化等附带字段变化时为 False，
+            只改变 ETag 版本，不使读请求转到主库
+
+    Returns:
+        删除的缓存数量
+    """
+    tags = [post_cache_tag(post_id)]
+    if include_lists:
+        tags.append(POSTS_LIST_TAG)
+    count = posts_cache.invalidate_tags(*tags)
+    if content_changed:
+        note_content_write("posts")
+    else:
+        note_content_touch("posts")
+    return count
+
+
+def invalidate_posts_by_ids(post_ids: Iterable[str], include_lists: bool = True) -> int:
+    """
+    一次清除依赖多篇文章的缓存（批量操作使用）
+
+    Args:
+        post_ids: 文章 ID 列表
+        include_lists: 是否同时清除所有列表缓存
+
+    Returns:
+        删除的缓存数量
+    """
+    tags = [post_cache_tag(post_id) for post_id in post_ids]
+    if not tags and not include_lists:
+        return 0
+    if include_lists:
+        tags.append(POSTS_LIST_TAG)
+    count = posts_cache.invalidate_tags(*tags)
+    note_content_write("posts")
+    return count
+
+
+def invalidate_post_lists_cache() -> int:
+    """清除所有文章列表缓存"""
+    count = posts_cache.invalidate_tags(POSTS_LIST_TAG)
+    note_content_write("posts")
+    return count
+
+
+def invalidate_category_posts_cache(category_id: str) -> int:
+    """清除依赖指定分类的文章缓存（如分类改名）"""
+    count = posts_cache.invalidate_tags(category_cache_tag(category_id))
+    note_content_write("posts")
+    return count
+
+
+def invalidate_tag_posts_cache(tag_id: str) -> int:
+    """清除依赖指定标签的文章缓存（如标签改名）"""
+    count = posts_cache.invalidate_tags(tag_cache_tag(tag_id))
+    note_content_write("posts")
+    return count
 
 
 def invalidate_categories_cache():
     """清除所有分类相关缓存"""
     categories_cache.clear()
+    note_content_write("categories")
 
 
 def invalidate_tags_cache():
     """清除所有标签相关缓存"""
     tags_cache.clear()
+    note_content_write("tags")
 
 
 def invalidate_settings_cache():
     """清除所有设置相关缓存"""
     settings_cache.clear()
+    note_content_write("settings")
 
 
 def invalidate_all_cache():
@@ -258,3 +1284,4 @@ def invalidate_all_cache():
     categories_cache.clear()
     tags_cache.clear()
     settings_cache.clear()
+    note_content_write("posts", "categories", "tags", "settings")
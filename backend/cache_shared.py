@@ -0,0 +1,473 @@
+"""
+跨进程共享缓存模块
+
+同一台主机上的多个 worker 进程通过 CACHE_SHARED_DIR 目录共享：
+- SQLiteCacheBackend：共享的二级缓存存储（SQLite，WAL 模式）。值以 JSON 保存
+  （不使用 pickle，共享文件被改写时不会执行任意代码），带有非空密码字段的值不写入
+- InvalidationBus：失效广播。失效事件写入 SQLite 事件表，
+  并更新 mmap 映射的 8 字节版本号；其他进程读取缓存前只需比较版本号，
+  变化时再拉取新事件并应用到本进程的内存缓存。
+  进程落后太久、需要的事件已被清理时，返回 FLUSH_NAMESPACE 事件，由调用方清空进程内缓存
+"""
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    # 可选依赖：安装后使用 orjson 序列化共享缓存值
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger("firefly")
+
+SHARED_DB_FILENAME = "cache.sqlite3"
+VERSION_FILENAME = "invalidation.ver"
+_VERSION_FORMAT = "<Q"
+_VERSION_SIZE = struct.calcsize(_VERSION_FORMAT)
+
+# 失效事件保留时长（秒），超过后由清理任务删除
+EVENT_RETENTION_SECONDS = 3600
+# 进程错过已清理的事件时，poll 返回的全量失效事件的命名空间
+FLUSH_NAMESPACE = "*"
+
+# 不写入共享存储的字段：缓存值中任一字典带有非空的此类字段时，只保留在进程内存中
+SENSITIVE_FIELDS = frozenset({"password"})
+
+# JSON 中 datetime / date 的标记，读取时还原为原类型
+_DATETIME_TAG = "__datetime__"
+_DATE_TAG = "__date__"
+
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {_DATETIME_TAG: value.isoformat()}
+    if isinstance(value, date):
+        return {_DATE_TAG: value.isoformat()}
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"无法序列化的缓存值类型: {type(value).__name__}")
+
+
+def _restore(value: Any) -> Any:
+    if isinstance(value, dict):
+        if len(value) == 1:
+            if _DATETIME_TAG in value:
+                return datetime.fromisoformat(value[_DATETIME_TAG])
+            if _DATE_TAG in value:
+                return date.fromisoformat(value[_DATE_TAG])
+        return {key: _restore(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_restore(item) for item in value]
+    return value
+
+
+def dumps_value(value: Any) -> bytes:
+    """把缓存值序列化为 JSON（datetime / date 带类型标记），无法序列化时抛出 TypeError"""
+    if orjson is not None:
+        return orjson.dumps(
+            value, default=_encode_default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(value, default=_encode_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads_value(payload: bytes) -> Any:
+    """还原 dumps_value 序列化的缓存值"""
+    return _restore(orjson.loads(payload) if orjson is not None else json.loads(payload))
+
+
+def has_sensitive_fields(value: Any) -> bool:
+    """缓存值中是否带有非空的敏感字段（如文章访问密码）"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in SENSITIVE_FIELDS and item:
+                return True
+            if isinstance(item, (dict, list, tuple)) and has_sensitive_fields(item):
+                return True
+        return False
+    if isinstance(value, (list, tuple)):
+        return any(isinstance(item, (dict, list, tuple)) and has_sensitive_fields(item) for item in value)
+    return False
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS cache_entries (
+        namespace TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value BLOB NOT NULL,
+        tags TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        stale_until REAL NOT NULL,
+        PRIMARY KEY (namespace, key)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS cache_entry_tags (
+        namespace TEXT NOT NULL,
+        tag TEXT NOT NULL,
+        key TEXT NOT NULL,
+        PRIMARY KEY (namespace, tag, key)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_cache_entries_stale ON cache_entries (stale_until)",
+    """
+    CREATE TABLE IF NOT EXISTS cache_events (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        pid INTEGER NOT NULL,
+        namespace TEXT NOT NULL,
+        op TEXT NOT NULL,
+        args TEXT NOT NULL,
+        created_at REAL NOT NULL
+    )
+    """,
+)
+
+
+class _SQLiteStore:
+    """
+    共享 SQLite 文件的连接管理
+
+    每个线程使用独立连接；进程 fork 后自动重建连接。
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.path = os.path.join(directory, SHARED_DB_FILENAME)
+        self._local = threading.local()
+        conn = self.connection()
+        for statement in _SCHEMA:
+            conn.execute(statement)
+
+    def connection(self) -> sqlite3.Connection:
+        """获取当前线程的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+
+class CacheBackend:
+    """
+    共享缓存存储接口
+
+    SimpleCache 始终在进程内存中保留一级缓存，
+    配置了后端时未命中会回退到后端读取，写入与失效同步到后端。
+    """
+
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存项，返回 {value, tags, expires_at, stale_until}，不存在或超出 stale 窗口返回 None"""
+        raise NotImplementedError
+
+    def set(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        tags: Iterable[str],
+        expires_at: float,
+        stale_until: float
+    ) -> None:
+        """写入缓存项（不能共享的值只删除旧的缓存项）"""
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str) -> None:
+        """删除缓存项"""
+        raise NotImplementedError
+
+    def delete_pattern(self, namespace: str, prefix: str) -> None:
+        """删除指定前缀的缓存项"""
+        raise NotImplementedError
+
+    def invalidate_tags(self, namespace: str, tags: Iterable[str]) -> None:
+        """删除带有任一标签的缓存项"""
+        raise NotImplementedError
+
+    def clear(self, namespace: str) -> None:
+        """清空命名空间"""
+        raise NotImplementedError
+
+    def cleanup_expired(self) -> int:
+        """清理所有超出 stale 窗口的缓存项，返回清理数量"""
+        raise NotImplementedError
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    基于本机 SQLite 文件的共享缓存存储
+
+    值以 JSON 序列化（见 dumps_value）；带有敏感字段或无法序列化为 JSON 的值不共享，
+    只保留在写入进程的内存中。
+    """
+
+    def __init__(self, store: _SQLiteStore):
+        self._store = store
+        self.skipped_sensitive = 0
+        self.skipped_unserializable = 0
+
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        row = self._store.connection().execute(
+            "SELECT value, tags, expires_at, stale_until FROM cache_entries "
+            "WHERE namespace = ? AND key = ? AND stale_until >= ?",
+            (namespace, key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            value = loads_value(row[0])
+        except ValueError:
+            # 旧版本写入的非 JSON 数据，按未命中处理
+            return None
+        return {
+            "value": value,
+            "tags": json.loads(row[1]),
+            "expires_at": row[2],
+            "stale_until": row[3]
+        }
+
+    def set(self, namespace, key, value, tags, expires_at, stale_until) -> None:
+        payload = None
+        if has_sensitive_fields(value):
+            self.skipped_sensitive += 1
+        else:
+            try:
+                payload = dumps_value(value)
+            except TypeError as exc:
+                self.skipped_unserializable += 1
+                logger.debug(f"缓存值无法序列化为 JSON，不写入共享存储 [{namespace}:{key}]: {exc}")
+        if payload is None:
+            # 删除旧的共享值，避免其他 worker 读到过期内容
+            self.delete(namespace, key)
+            return
+        tag_list = sorted(set(tags))
+        conn = self._store.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "DELETE FROM cache_entry_tags WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries "
+                "(namespace, key, value, tags, expires_at, stale_until) VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, payload, json.dumps(tag_list), expires_at, stale_until)
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO cache_entry_tags (namespace, tag, key) VALUES (?, ?, ?)",
+                [(namespace, tag, key) for tag in tag_list]
+            )
+
+    def _delete_keys(self, conn: sqlite3.Connection, namespace: str, where: str, params: tuple) -> None:
+        # 先取出键，再分别删除缓存项和标签索引（条件本身可能依赖标签索引）
+        keys = [
+            (namespace, row[0]) for row in conn.execute(
+                f"SELECT key FROM cache_entries WHERE namespace = ? AND {where}",
+                (namespace,) + params
+            )
+        ]
+        if not keys:
+            return
+        conn.executemany("DELETE FROM cache_entry_tags WHERE namespace = ? AND key = ?", keys)
+        conn.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", keys)
+
+    def delete(self, namespace: str, key: str) -> None:
+        conn = self._store.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._delete_keys(conn, namespace, "key = ?", (key,))
+
+    def delete_pattern(self, namespace: str, prefix: str) -> None:
+        conn = self._store.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # substr 比较避免 LIKE 对 % 和 _ 的转义问题
+            self._delete_keys(conn, namespace, "substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+    def invalidate_tags(self, namespace: str, tags: Iterable[str]) -> None:
+        tag_list = list(tags)
+        if not tag_list:
+            return
+        placeholders = ",".join("?" * len(tag_list))
+        conn = self._store.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._delete_keys(
+                conn,
+                namespace,
+                f"key IN (SELECT key FROM cache_entry_tags WHERE namespace = ? AND tag IN ({placeholders}))",
+                (namespace, *tag_list)
+            )
+
+    def clear(self, namespace: str) -> None:
+        conn = self._store.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM cache_entry_tags WHERE namespace = ?", (namespace,))
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+
+    def cleanup_expired(self) -> int:
+        now = time.time()
+        conn = self._store.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "DELETE FROM cache_entry_tags WHERE (namespace, key) IN "
+                "(SELECT namespace, key FROM cache_entries WHERE stale_until < ?)",
+                (now,)
+            )
+            cursor = conn.execute("DELETE FROM cache_entries WHERE stale_until < ?", (now,))
+            return cursor.rowcount
+
+
+class InvalidationBus:
+    """
+    主机内的缓存失效广播
+
+    publish 追加事件并更新 mmap 版本号；poll 只在版本号变化时查询事件表，
+    返回其他进程发布的、尚未应用的事件。
+    """
+
+    def __init__(self, store: _SQLiteStore):
+        self._store = store
+        self._lock = threading.Lock()
+        version_path = os.path.join(store.directory, VERSION_FILENAME)
+        fd = os.open(version_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < _VERSION_SIZE:
+                os.ftruncate(fd, _VERSION_SIZE)
+            self._mm = mmap.mmap(fd, _VERSION_SIZE)
+        finally:
+            os.close(fd)
+        # 启动时跳过历史事件，只应用之后发布的失效
+        row = store.connection().execute("SELECT COALESCE(MAX(seq), 0) FROM cache_events").fetchone()
+        self._applied_seq = row[0]
+        # 本进程启动时的事件序号，作为各命名空间内容版本的初始值
+        self.start_seq = row[0]
+        self._seen_version = self.version()
+        self.published = 0
+        self.received = 0
+        self.polls = 0
+        self.flushes = 0
+
+    def version(self) -> int:
+        """当前版本号（最近一次发布的事件序号）"""
+        return struct.unpack_from(_VERSION_FORMAT, self._mm, 0)[0]
+
+    def publish(self, namespace: str, op: str, args: Any, created_at: Optional[float] = None) -> int:
+        """
+        发布失效事件
+
+        Args:
+            created_at: 事件时间戳，默认为当前时间
+
+        Returns:
+            事件序号
+        """
+        conn = self._store.connection()
+        cursor = conn.execute(
+            "INSERT INTO cache_events (pid, namespace, op, args, created_at) VALUES (?, ?, ?, ?, ?)",
+            (os.getpid(), namespace, op, json.dumps(args), created_at or time.time())
+        )
+        seq = cursor.lastrowid
+        struct.pack_into(_VERSION_FORMAT, self._mm, 0, seq)
+        with self._lock:
+            self.published += 1
+        return seq
+
+    def poll(self) -> List[Tuple[int, float, str, str, Any]]:
+        """
+        拉取其他进程发布的新事件
+
+        版本号只用于判断“是否有变化”（并发发布时可能被较小序号覆盖），
+        事件本身按 _applied_seq 之后的序号完整读取，不会遗漏。
+
+        Returns:
+            [(seq, created_at, namespace, op, args), ...]
+        """
+        version = self.version()
+        if version == self._seen_version:
+            return []
+        with self._lock:
+            if version == self._seen_version:
+                return []
+            self.polls += 1
+            rows = self._store.connection().execute(
+                "SELECT seq, pid, namespace, op, args, created_at FROM cache_events WHERE seq > ? ORDER BY seq",
+                (self._applied_seq,)
+            ).fetchall()
+            pid = os.getpid()
+            events = []
+            if rows and rows[0][0] > self._applied_seq + 1:
+                # 本进程落后太久，中间的事件已被清理：要求调用方清空全部进程内缓存
+                self.flushes += 1
+                events.append((rows[0][0] - 1, time.time(), FLUSH_NAMESPACE, "clear", None))
+            for seq, event_pid, namespace, op, args, created_at in rows:
+                self._applied_seq = seq
+                if event_pid != pid:
+                    events.append((seq, created_at, namespace, op, json.loads(args)))
+            self._seen_version = version
+            self.received += len(events)
+            return events
+
+    def latest_events(self, op: str) -> Dict[str, Tuple[int, float]]:
+        """各命名空间最近一次指定操作的事件，返回 {命名空间: (序号, 时间戳)}"""
+        rows = self._store.connection().execute(
+            "SELECT namespace, seq, created_at FROM cache_events WHERE seq IN "
+            "(SELECT MAX(seq) FROM cache_events WHERE op = ? GROUP BY namespace)",
+            (op,)
+        ).fetchall()
+        return {namespace: (seq, created_at) for namespace, seq, created_at in rows}
+
+    def prune(self, retention: int = EVENT_RETENTION_SECONDS) -> int:
+        """
+        删除过旧的事件，返回删除数量
+
+        每个命名空间、每种操作最近的一条事件始终保留（内容版本的初始值取自最近的写入事件）。
+        """
+        cursor = self._store.connection().execute(
+            "DELETE FROM cache_events WHERE created_at < ? AND seq NOT IN "
+            "(SELECT MAX(seq) FROM cache_events GROUP BY namespace, op)",
+            (time.time() - retention,)
+        )
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """广播统计信息"""
+        return {
+            "version": self.version(),
+            "start_seq": self.start_seq,
+            "applied_seq": self._applied_seq,
+            "published": self.published,
+            "received": self.received,
+            "polls": self.polls,
+            "flushes": self.flushes
+        }
+
+
+def open_shared_cache(directory: str, with_backend: bool) -> Tuple[Optional[SQLiteCacheBackend], InvalidationBus]:
+    """
+    打开共享缓存目录
+
+    Args:
+        directory: 共享目录（同一主机上的所有 worker 需一致）
+        with_backend: 是否同时启用共享二级缓存存储
+
+    Returns:
+        (共享存储或 None, 失效广播)
+    """
+    store = _SQLiteStore(directory)
+    backend = SQLiteCacheBackend(store) if with_backend else None
+    return backend, InvalidationBus(store)
@@ -0,0 +1,97 @@
+"""
+HTTP 条件请求工具
+根据内容版本生成 ETag / Last-Modified，处理 If-None-Match / If-Modified-Since，
+内容未变化时直接返回 304，无需查询数据库和序列化响应
+
+多 worker 部署时应启用缓存失效广播（CACHE_BACKEND=sqlite 或 CACHE_BROADCAST_ENABLED），
+此时 ETag 取自共享的写入序号，各 worker 一致。未启用时每个 worker 只知道自己的写入：
+版本为主进程标识加按缓存 TTL 轮换的时间段，本进程写入后再带上进程号与写入计数，
+因此同一内容在不同 worker 上可能得到不同的 ETag（多返回 200），
+其他 worker 的写入最多在一个 TTL 内仍可能返回 304。
+"""
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+from cache import get_content_version
+
+# 公开内容允许缓存，但每次使用前必须向服务端验证
+PUBLIC_CACHE_CONTROL = "no-cache"
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """判断 If-None-Match 是否包含当前 ETag（弱比较，忽略 W/ 前缀）"""
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _not_modified_since(header: str, last_modified: float) -> bool:
+    """判断内容自 If-Modified-Since 以来是否未修改（HTTP 日期精度为秒）"""
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since is None:
+        return False
+    return int(last_modified) <= since.timestamp()
+
+
+def check_not_modified(
+    request: Request,
+    response: Response,
+    *namespaces: str
+) -> Optional[Response]:
+    """
+    处理公开内容接口的条件请求
+
+    ETag 由请求路径、查询参数和所依赖命名空间的内容版本计算，
+    版本随对应缓存的失效而变化（见 cache.get_content_version）。
+    需要在查询数据库之前调用；内容未变化时返回 304 响应，
+    否则把校验头写入 response 并返回 None。
+
+    Args:
+        request: 当前请求
+        response: 路由注入的 Response（用于附加响应头）
+        *namespaces: 响应内容依赖的缓存命名空间，如 "posts"、"categories"
+
+    Returns:
+        304 响应，或 None（继续正常处理）
+    """
+    versions = []
+    last_modified = 0.0
+    for namespace in namespaces:
+        version, modified = get_content_version(namespace)
+        versions.append(f"{namespace}={version}")
+        last_modified = max(last_modified, modified)
+
+    digest = hashlib.sha1(
+        f"{request.url.path}?{request.url.query}|{'|'.join(versions)}".encode()
+    ).hexdigest()[:32]
+    headers = {
+        "ETag": f'"{digest}"',
+        "Last-Modified": formatdate(int(last_modified), usegmt=True),
+        "Cache-Control": PUBLIC_CACHE_CONTROL
+    }
+
+    # If-None-Match 优先，存在时忽略 If-Modified-Since
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, headers["ETag"])
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        not_modified = bool(if_modified_since) and _not_modified_since(if_modified_since, last_modified)
+
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return None
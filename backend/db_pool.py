@@ -0,0 +1,139 @@
+"""
+数据库连接池监控模块
+提供带统计的 QueuePool，记录连接获取耗时、等待次数、超时次数与占用情况
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# 保留最近多少次获取耗时用于计算分位数
+POOL_LATENCY_SAMPLES = 1000
+
+
+def _percentile(samples, percent: float) -> float:
+    """计算已排序样本的分位数"""
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, max(0, int(round(len(samples) * percent / 100)) - 1))
+    return samples[index]
+
+
+class PoolMetrics:
+    """连接池统计数据"""
+
+    def __init__(self, samples: int = POOL_LATENCY_SAMPLES):
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=samples)
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_checkout_seconds = 0.0
+        self.peak_in_use = 0
+
+    def record_checkout(self, elapsed: float, waited: bool, in_use: int) -> None:
+        """记录一次成功获取连接"""
+        with self._lock:
+            self.checkouts += 1
+            self._latencies.append(elapsed)
+            if waited:
+                self.waits += 1
+                self.total_wait_seconds += elapsed
+            if elapsed > self.max_checkout_seconds:
+                self.max_checkout_seconds = elapsed
+            if in_use > self.peak_in_use:
+                self.peak_in_use = in_use
+
+    def record_timeout(self, elapsed: float) -> None:
+        """记录一次获取连接超时"""
+        with self._lock:
+            self.timeouts += 1
+            self.waits += 1
+            self.total_wait_seconds += elapsed
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取统计快照（耗时单位为毫秒）"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return {
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "total_wait_ms": round(self.total_wait_seconds * 1000, 2),
+                "checkout_ms": {
+                    "p50": round(_percentile(latencies, 50) * 1000, 3),
+                    "p95": round(_percentile(latencies, 95) * 1000, 3),
+                    "p99": round(_percentile(latencies, 99) * 1000, 3),
+                    "max": round(self.max_checkout_seconds * 1000, 3),
+                    "samples": len(latencies)
+                },
+                "peak_in_use": self.peak_in_use
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    带统计的 QueuePool
+
+    在连接获取（_do_get）前后计时：
+    - 获取时连接已全部占用（含溢出连接）记为一次等待
+    - 等待超过 pool_timeout 抛出 TimeoutError 时记为一次超时
+    统计数据存放在 PoolMetrics 中，dispose/recreate 重建连接池后保持累计
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        # max_overflow 为 -1 时不限制溢出连接，不会等待
+        exhausted = self._max_overflow > -1 and self.checkedout() >= self.size() + self._max_overflow
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - start)
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start, exhausted, self.checkedout())
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def get_pool_stats(engine) -> Dict[str, Any]:
+    """
+    获取引擎连接池的配置、当前占用与累计统计
+
+    Args:
+        engine: SQLAlchemy 引擎
+
+    Returns:
+        连接池状态字典；非 QueuePool（如 SQLite 内存库）只返回类型与状态描述
+    """
+    pool = engine.pool
+    stats: Dict[str, Any] = {
+        "pool_class": type(pool).__name__,
+        "status": pool.status()
+    }
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+            "recycle": pool._recycle,
+            "pre_ping": pool._pre_ping,
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0)
+        })
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        stats.update(metrics.snapshot())
+    return stats
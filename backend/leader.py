@@ -0,0 +1,149 @@
+"""
+后台任务主节点选举模块
+多个 uvicorn worker 共用一个文件锁（fcntl.flock），持有锁的 worker 为主节点，
+只有主节点运行定时发布、自动备份等周期任务；其他 worker 定期重试加锁。
+主节点进程退出（包括崩溃）时操作系统自动释放文件锁，其他 worker 在重试间隔内接管。
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from cache import CACHE_SHARED_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，按单 worker 处理
+    fcntl = None
+
+logger = logging.getLogger("firefly")
+
+# 主节点锁文件，同一主机上的所有 worker 需指向同一文件
+LEADER_LOCK_FILE = os.getenv("LEADER_LOCK_FILE", os.path.join(CACHE_SHARED_DIR, "leader.lock"))
+# 非主节点重试加锁的间隔（秒），即主节点退出后的最长接管时间
+LEADER_RETRY_INTERVAL = float(os.getenv("LEADER_RETRY_INTERVAL", "5"))
+if LEADER_RETRY_INTERVAL < 0.5:
+    LEADER_RETRY_INTERVAL = 0.5
+
+# 周期任务：接收停止事件的协程函数
+LeaderJob = Callable[[asyncio.Event], Awaitable[None]]
+
+
+class LeaderElector:
+    """
+    基于文件锁的主节点选举
+
+    run 为后台任务：成为主节点后启动全部周期任务，停止时先停止任务再释放锁。
+    无法使用文件锁（没有 fcntl 或锁文件无法创建）时直接作为主节点运行，
+    保证单 worker 部署的周期任务不受影响。
+    """
+
+    def __init__(self, lock_path: str = LEADER_LOCK_FILE, retry_interval: float = LEADER_RETRY_INTERVAL):
+        self.lock_path = lock_path
+        self.retry_interval = retry_interval
+        self._lock_file = None
+        self.is_leader = False
+        self.lock_mode = "flock" if fcntl is not None else "none"
+        self.elected_at: Optional[float] = None
+        self.attempts = 0
+
+    def try_acquire(self) -> bool:
+        """尝试成为主节点（不阻塞），返回当前是否为主节点"""
+        if self.is_leader:
+            return True
+        self.attempts += 1
+        if fcntl is None:
+            return self._become_leader()
+
+        try:
+            directory = os.path.dirname(self.lock_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            lock_file = open(self.lock_path, "a+")
+        except OSError as exc:
+            logger.warning("无法创建主节点锁文件 %s，按单 worker 运行周期任务: %s", self.lock_path, exc)
+            self.lock_mode = "none"
+            return self._become_leader()
+
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        # 记录持有者 PID，便于排查
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._lock_file = lock_file
+        return self._become_leader()
+
+    def _become_leader(self) -> bool:
+        self.is_leader = True
+        self.elected_at = time.time()
+        return True
+
+    def release(self) -> None:
+        """释放主节点身份"""
+        if self._lock_file is not None:
+            try:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+            except OSError:
+                pass
+            self._lock_file.close()
+            self._lock_file = None
+        self.is_leader = False
+        self.elected_at = None
+
+    async def run(self, stop_event: asyncio.Event, jobs: Sequence[LeaderJob]) -> None:
+        """
+        等待成为主节点后运行周期任务，直到 stop_event 被设置
+
+        Args:
+            stop_event: 停止事件
+            jobs: 只在主节点运行的周期任务
+        """
+        while not self.try_acquire():
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=self.retry_interval)
+                return
+            except asyncio.TimeoutError:
+                continue
+
+        logger.info("当前 worker (pid=%s) 成为主节点，启动 %d 个周期任务", os.getpid(), len(jobs))
+        running: List[Tuple[asyncio.Event, asyncio.Task]] = []
+        try:
+            for job in jobs:
+                job_stop = asyncio.Event()
+                running.append((job_stop, asyncio.create_task(job(job_stop))))
+            await stop_event.wait()
+        finally:
+            for job_stop, _ in running:
+                job_stop.set()
+            for _, task in running:
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                except Exception as exc:
+                    logger.error("周期任务退出异常: %s", exc)
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取选举状态"""
+        return {
+            "pid": os.getpid(),
+            "is_leader": self.is_leader,
+            "lock_mode": self.lock_mode,
+            "lock_file": self.lock_path if self.lock_mode == "flock" else None,
+            "retry_interval": self.retry_interval,
+            "attempts": self.attempts,
+            "elected_at": datetime.utcfromtimestamp(self.elected_at).isoformat() if self.elected_at else None
+        }
+
+
+# 全局主节点选举器
+leader_elector = LeaderElector()
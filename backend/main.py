@@ -7,13 +7,13 @@ import json
 import logging
 import os
 import time
-import uuid
 from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import Dict
 
 from fastapi import FastAPI, Depends, HTTPException, status, Request, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.staticfiles import StaticFiles
 from slowapi import _rate_limit_exceeded_handler
@@ -23,26 +23,31 @@ from sqlalchemy.orm import Session
 import auth
 import models
 from database import engine, Base, get_db, SessionLocal, settings as db_settings
-from routes import posts, categories, tags, friends, social, settings, dashboard, logs, search, upload, backup, analytics, auth as auth_routes, totp
+from routes import posts, categories, tags, friends, social, settings, dashboard, logs, search, upload, backup, analytics, auth as auth_routes, totp, system
 from exception_handlers import register_exception_handlers
+from migrations import migrate_schema
+from middleware import RequestContextMiddleware
+from access_log import access_log_writer
+from autosave import autosave_buffer
+from scheduler import publish_scheduler
+from leader import leader_elector
+from trash import TRASH_RETENTION_DAYS, trash_retention_worker
 from logging_config import (
     setup_logging,
-    set_request_id,
-    reset_request_id,
-    log_exception,
     get_logging_config_dict
 )
-from response_utils import build_error, normalize_payload, is_standard_payload
+from response_utils import build_error, EnvelopeJSONResponse, bind_request_method
 from rate_limiter import limiter, rate_limit_exceeded_handler, rate_limit_settings
 from routes import posts, categories, tags, friends, social, settings, dashboard, logs, search, upload, backup, \
-    analytics, auth as auth_routes, totp
-from cache import set_cache_ttl_getter
+    analytics, auth as auth_routes, totp, system
+from cache import set_cache_ttl_loader, cleanup_all_expired, DEFAULT_CACHE_TTL, CACHE_SWEEP_INTERVAL
 
 setup_logging()
 logger = logging.getLogger("firefly")
 
-# 创建数据库表（如果不存在）
+# 创建数据库表（如果不存在），并为已有表补齐新增的列
 Base.metadata.create_all(bind=engine)
+migrate_schema(engine)
 
 # 创建上传目录
 os.makedirs(db_settings.UPLOAD_DIR, exist_ok=True)
@@ -50,64 +55,107 @@ os.makedirs(db_settings.UPLOAD_DIR, exist_ok=True)
 os.makedirs(db_settings.BACKUP_DIR, exist_ok=True)
 
 
-def get_cache_ttl_from_db(cache_type: str) -> int:
-    """从数据库读取缓存 TTL 配置"""
-    key = f"cache_{cache_type}_ttl"
+def load_cache_ttls_from_db() -> Dict[str, int]:
+    """从数据库一次性读取全部缓存 TTL 配置（cache_<类型>_ttl）"""
+    keys = {f"cache_{cache_type}_ttl": cache_type for cache_type in DEFAULT_CACHE_TTL}
     db = SessionLocal()
     try:
-        row = db.query(models.SiteSetting).filter(
-            models.SiteSetting.key == key
-        ).first()
-        if row and row.value:
-            return int(row.value)
-    except Exception:
-        pass
+        rows = db.query(models.SiteSetting.key, models.SiteSetting.value).filter(
+            models.SiteSetting.key.in_(list(keys))
+        ).all()
     finally:
         db.close()
-    return 0
+
+    ttls: Dict[str, int] = {}
+    for key, value in rows:
+        try:
+            ttls[keys[key]] = int(value)
+        except (TypeError, ValueError):
+            continue
+    return ttls
 
 
-# 设置缓存 TTL 获取函数
-set_cache_ttl_getter(get_cache_ttl_from_db)
+# 设置缓存 TTL 加载函数（结果保存在进程内快照中）
+set_cache_ttl_loader(load_cache_ttls_from_db)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     # === 启动时执行 ===
-    stop_event = asyncio.Event()
-    app.state.scheduled_publish_stop = stop_event
-    app.state.scheduled_publish_task = asyncio.create_task(
-        scheduled_publish_worker(stop_event)
+    access_log_stop = asyncio.Event()
+    app.state.access_log_stop = access_log_stop
+    app.state.access_log_task = asyncio.create_task(
+        access_log_writer.run(access_log_stop)
     )
 
+    autosave_stop = asyncio.Event()
+    app.state.autosave_stop = autosave_stop
+    app.state.autosave_task = asyncio.create_task(
+        autosave_buffer.run(autosave_stop)
+    )
+
+    # 定时发布、自动备份、回收站自动清理只在主节点（持有主节点锁的 worker）运行
+    leader_jobs = [publish_scheduler.run]
     if AUTO_BACKUP_ENABLED:
-        backup_stop_event = asyncio.Event()
-        app.state.auto_backup_stop = backup_stop_event
-        app.state.auto_backup_task = asyncio.create_task(
-            auto_backup_worker(backup_stop_event)
-        )
+        leader_jobs.append(auto_backup_worker)
+    if TRASH_RETENTION_DAYS > 0:
+        leader_jobs.append(trash_retention_worker)
+    leader_stop = asyncio.Event()
+    app.state.leader_stop = leader_stop
+    app.state.leader_task = asyncio.create_task(
+        leader_elector.run(leader_stop, leader_jobs)
+    )
+
+    cache_sweep_stop = asyncio.Event()
+    app.state.cache_sweep_stop = cache_sweep_stop
+    app.state.cache_sweep_task = asyncio.create_task(
+        cache_sweeper_worker(cache_sweep_stop)
+    )
 
     yield  # 应用运行中
 
     # === 关闭时执行 ===
-    stop_event = getattr(app.state, "scheduled_publish_stop", None)
-    task = getattr(app.state, "scheduled_publish_task", None)
-    if stop_event:
-        stop_event.set()
-    if task:
+    # 停止主节点周期任务并释放主节点锁
+    leader_stop = getattr(app.state, "leader_stop", None)
+    leader_task = getattr(app.state, "leader_task", None)
+    if leader_stop:
+        leader_stop.set()
+    if leader_task:
+        try:
+            await leader_task
+        except asyncio.CancelledError:
+            pass
+
+    sweep_stop = getattr(app.state, "cache_sweep_stop", None)
+    sweep_task = getattr(app.state, "cache_sweep_task", None)
+    if sweep_stop:
+        sweep_stop.set()
+    if sweep_task:
+        try:
+            await sweep_task
+        except asyncio.CancelledError:
+            pass
+
+    # 写入缓冲中剩余的自动保存
+    autosave_stop = getattr(app.state, "autosave_stop", None)
+    autosave_task = getattr(app.state, "autosave_task", None)
+    if autosave_stop:
+        autosave_stop.set()
+    if autosave_task:
         try:
-            await task
+            await autosave_task
         except asyncio.CancelledError:
             pass
 
-    backup_stop = getattr(app.state, "auto_backup_stop", None)
-    backup_task = getattr(app.state, "auto_backup_task", None)
-    if backup_stop:
-        backup_stop.set()
-    if backup_task:
+    # 最后停止访问日志写入任务，排空队列中剩余的日志
+    access_log_stop = getattr(app.state, "access_log_stop", None)
+    access_log_task = getattr(app.state, "access_log_task", None)
+    if access_log_stop:
+        access_log_stop.set()
+    if access_log_task:
         try:
-            await backup_task
+            await access_log_task
         except asyncio.CancelledError:
             pass
 
@@ -165,11 +213,6 @@ app.add_middleware(
 # 挂载静态文件目录（用于图片上传）
 app.mount("/uploads", StaticFiles(directory=db_settings.UPLOAD_DIR), name="uploads")
 
-# 定时发布后台任务（秒）
-SCHEDULED_PUBLISH_INTERVAL = int(os.getenv("SCHEDULED_PUBLISH_INTERVAL", "60"))
-if SCHEDULED_PUBLISH_INTERVAL < 10:
-    SCHEDULED_PUBLISH_INTERVAL = 10
-
 # 自动备份配置
 AUTO_BACKUP_ENABLED = str(os.getenv("AUTO_BACKUP_ENABLED", str(db_settings.AUTO_BACKUP_ENABLED))).lower() in (
     "1", "true", "yes", "y", "on"
@@ -207,21 +250,19 @@ def read_backup_settings(db: Session) -> tuple[bool, int]:
     return enabled, interval_hours
 
 
-async def scheduled_publish_worker(stop_event: asyncio.Event):
-    """后台循环处理定时发布文章"""
-    logger.info("定时发布后台任务启动，间隔=%ss", SCHEDULED_PUBLISH_INTERVAL)
+async def cache_sweeper_worker(stop_event: asyncio.Event):
+    """后台循环清理过期缓存，避免过期条目一直占用内存"""
+    logger.info("缓存清理后台任务启动，间隔=%ss", CACHE_SWEEP_INTERVAL)
     while not stop_event.is_set():
         try:
-            db = SessionLocal()
-            try:
-                posts.process_scheduled_posts(db)
-            finally:
-                db.close()
+            removed = cleanup_all_expired()
+            if removed:
+                logger.debug("已清理过期缓存 %d 条", removed)
         except Exception as exc:
-            logger.error("定时发布处理失败: %s", exc)
+            logger.error("缓存清理失败: %s", exc)
 
         try:
-            await asyncio.wait_for(stop_event.wait(), timeout=SCHEDULED_PUBLISH_INTERVAL)
+            await asyncio.wait_for(stop_event.wait(), timeout=CACHE_SWEEP_INTERVAL)
         except asyncio.TimeoutError:
             continue
 
@@ -296,149 +337,42 @@ def save_access_log(
         status_code: int = None,
         detail: str = None
 ):
-    """保存访问日志到数据库"""
-    db = SessionLocal()
-    try:
-        log = models.AccessLog(
-            log_type=log_type,
-            username=username,
-            ip_address=get_client_ip(request),
-            user_agent=request.headers.get("User-Agent", "")[:500],
-            request_path=str(request.url.path),
-            request_method=request.method,
-            status_code=status_code,
-            detail=detail,
-            created_at=datetime.utcnow()
-        )
-        db.add(log)
-        db.commit()
-    except Exception as e:
-        log_exception(logger, "保存访问日志失败", e)
-    finally:
-        db.close()
-
-
-@app.middleware("http")
-async def standard_response_middleware(request: Request, call_next):
-    """统一 API 响应格式为 code/msg/data"""
-    response = await call_next(request)
-
-    if not request.url.path.startswith("/api"):
-        return response
-
-    if response.status_code == status.HTTP_204_NO_CONTENT:
-        return response
-
-    if isinstance(response, StreamingResponse):
-        return response
-
-    content_type = response.headers.get("content-type", "")
-    if "application/json" not in content_type.lower():
-        return response
-
-    body = getattr(response, "body", None)
-    if body is None:
-        return response
-
-    try:
-        payload = json.loads(body)
-    except Exception:
-        return response
-
-    if is_standard_payload(payload):
-        return response
-
-    normalized = normalize_payload(payload, request.method, response.status_code)
-    new_response = JSONResponse(status_code=response.status_code, content=normalized)
-
-    for key, value in response.headers.items():
-        if key.lower() not in ("content-length", "content-type"):
-            new_response.headers[key] = value
-
-    return new_response
-
-
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """记录写操作 API 请求的中间件（POST/PUT/DELETE）"""
-    # 跳过静态资源和文档接口
-    skip_paths = ["/docs", "/redoc", "/openapi.json", "/favicon.ico"]
-    if any(request.url.path.startswith(p) for p in skip_paths):
-        return await call_next(request)
-
-    # 执行请求
-    response = await call_next(request)
-
-    # 跳过登录接口（登录接口单独记录）
-    if request.url.path == "/token":
-        return response
-
-    # 只记录写操作（POST/PUT/DELETE），忽略 GET 请求
-    if request.method not in ["POST", "PUT", "DELETE"]:
-        return response
-
-    # 跳过日志相关接口（避免记录查看日志的操作）
-    if request.url.path.startswith("/logs"):
-        return response
-    # 跳过主题色保存（避免产生大量日志）
-    if request.url.path.endswith("/settings/by-key/theme_hue"):
-        return response
-
-    # 记录 API 访问日志
-    # 从 Authorization 头提取用户名
-    username = None
-    auth_header = request.headers.get("Authorization")
-    if auth_header and auth_header.startswith("Bearer "):
-        try:
-            token = auth_header.split(" ")[1]
-            from database import settings as db_settings
-            import jwt
-            payload = jwt.decode(token, db_settings.SECRET_KEY, algorithms=[db_settings.ALGORITHM])
-            username = payload.get("sub")
-        except:
-            pass
-
+    """保存访问日志（放入写入队列，由后台任务批量写入数据库）"""
+    access_log_writer.enqueue({
+        "log_type": log_type,
+        "username": username,
+        "ip_address": get_client_ip(request),
+        "user_agent": request.headers.get("User-Agent", "")[:500],
+        "request_path": str(request.url.path),
+        "request_method": request.method,
+        "status_code": status_code,
+        "detail": detail,
+        "created_at": datetime.utcnow()
+    })
+
+
+async def write_api_access_log(request: Request, status_code: int) -> None:
+    """记录写操作 API 访问日志（由 RequestContextMiddleware 在响应发送后调用，只入队不写库）"""
+    # 已认证请求直接复用 get_current_user 写入的用户名，否则走已解码 token 缓存
     save_access_log(
         log_type="api_access",
         request=request,
-        username=username,
-        status_code=response.status_code
+        username=auth.get_token_username(request),
+        status_code=status_code
     )
 
-    return response
 
-
-@app.middleware("http")
-async def error_response_logger(request: Request, call_next):
-    """记录所有 5xx 响应"""
-    response = await call_next(request)
-    if response.status_code >= 500 and not getattr(request.state, "error_logged", False):
-        logger.error(
-            "5xx 响应: %s %s status=%s",
-            request.method,
-            request.url.path,
-            response.status_code
-        )
-        request.state.error_logged = True
-    return response
-
-
-@app.middleware("http")
-async def request_id_middleware(request: Request, call_next):
-    """为每个请求生成并透传 request_id"""
-    request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
-    token = set_request_id(request_id)
-    request.state.request_id = request_id
-    try:
-        response = await call_next(request)
-    finally:
-        reset_request_id(token)
-    response.headers["X-Request-ID"] = request_id
-    return response
+# 请求上下文中间件：request_id、写操作访问日志、5xx 日志（纯 ASGI 实现）
+app.add_middleware(RequestContextMiddleware, access_log_writer=write_api_access_log)
 
 
 # 创建 API 路由主入口
-api_router = APIRouter(prefix="/api")
+# 默认响应类在序列化时生成 code/msg/data 统一结构
+api_router = APIRouter(
+    prefix="/api",
+    default_response_class=EnvelopeJSONResponse,
+    dependencies=[Depends(bind_request_method)]
+)
 
 # 注册子路由到 API 路由
 api_router.include_router(auth_routes.router)
@@ -455,6 +389,7 @@ api_router.include_router(upload.router)
 api_router.include_router(backup.router)
 api_router.include_router(analytics.router)
 api_router.include_router(totp.router)
+api_router.include_router(system.router)
 
 
 @api_router.post("/token", summary="用户登录", tags=["认证"])
@@ -602,6 +537,8 @@ async def login(
 
     # 提交数据库更改（last_totp_used 或 recovery_codes）
     db.commit()
+    if user.totp_enabled and user.totp_verified:
+        auth.invalidate_admin_cache(user.username)
 
     # 生成访问令牌
     access_token = auth.create_access_token(data={"sub": user.username})
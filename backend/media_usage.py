@@ -6,11 +6,14 @@ from typing import Dict, Iterable, Optional, Set
 from urllib.parse import urlparse, unquote
 import re
 
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.orm import Session, undefer
 
 import models
 
+# 刷新引用次数时单条 IN 查询携带的媒体数量上限
+MEDIA_REFRESH_BATCH_SIZE = 500
+
 # 匹配 /uploads/ 引用（支持绝对 URL 和相对路径）
 UPLOAD_URL_PATTERN = re.compile(
     r"(?:https?:)?//[^\s\"'<>]+/uploads/[^\s\"'<>]+|/uploads/[^\s\"'<>]+",
@@ -67,22 +70,21 @@ def collect_media_paths(content: Optional[str], image: Optional[str]) -> Dict[st
 
 
 def refresh_media_usage_counts(db: Session, media_ids: Iterable[str]) -> None:
-    """刷新指定媒体的引用次数"""
+    """刷新指定媒体的引用次数（按批分组统计，每批一条批量 UPDATE）"""
     media_id_list = [media_id for media_id in set(media_ids) if media_id]
-    if not media_id_list:
-        return
-
-    counts = dict(
-        db.query(models.PostMedia.media_id, func.count(models.PostMedia.id))
-        .filter(models.PostMedia.media_id.in_(media_id_list))
-        .group_by(models.PostMedia.media_id)
-        .all()
-    )
+    stmt = update(models.MediaFile.__table__).where(
+        models.MediaFile.__table__.c.id == bindparam("b_id")
+    ).values(usage_count=bindparam("b_count"))
 
-    for media_id in media_id_list:
-        db.query(models.MediaFile).filter(
-            models.MediaFile.id == media_id
-        ).update({"usage_count": counts.get(media_id, 0)})
+    for start in range(0, len(media_id_list), MEDIA_REFRESH_BATCH_SIZE):
+        batch = media_id_list[start:start + MEDIA_REFRESH_BATCH_SIZE]
+        counts = dict(
+            db.query(models.PostMedia.media_id, func.count(models.PostMedia.id))
+            .filter(models.PostMedia.media_id.in_(batch))
+            .group_by(models.PostMedia.media_id)
+            .all()
+        )
+        db.execute(stmt, [{"b_id": media_id, "b_count": counts.get(media_id, 0)} for media_id in batch])
 
 
 def sync_post_media(
@@ -148,7 +150,7 @@ def rebuild_media_usage(db: Session) -> Dict[str, int]:
     db.query(models.PostMedia).delete(synchronize_session=False)
     db.flush()
 
-    posts = db.query(models.Post).all()
+    posts = db.query(models.Post).options(undefer(models.Post.content)).all()
     relations: list = []
 
     for post in posts:
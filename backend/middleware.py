@@ -0,0 +1,87 @@
+"""
+请求上下文中间件
+以纯 ASGI 方式合并 request_id 透传、写操作访问日志与 5xx 响应日志，
+避免 BaseHTTPMiddleware 逐层创建任务和内存流的开销，且不影响流式响应
+"""
+import logging
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from logging_config import set_request_id, reset_request_id
+
+logger = logging.getLogger("firefly")
+
+# 不记录访问日志的路径前缀（静态资源和文档接口）
+ACCESS_LOG_SKIP_PREFIXES = ("/docs", "/redoc", "/openapi.json", "/favicon.ico")
+# 只记录写操作
+ACCESS_LOG_METHODS = ("POST", "PUT", "DELETE")
+
+AccessLogWriter = Callable[[Request, int], Awaitable[None]]
+
+
+def should_log_access(path: str, method: str) -> bool:
+    """判断请求是否需要记录访问日志（规则与原 log_requests 中间件一致）"""
+    if path.startswith(ACCESS_LOG_SKIP_PREFIXES):
+        return False
+    # 跳过登录接口（登录接口单独记录）
+    if path == "/token":
+        return False
+    if method not in ACCESS_LOG_METHODS:
+        return False
+    # 跳过日志相关接口（避免记录查看日志的操作）
+    if path.startswith("/logs"):
+        return False
+    # 跳过主题色保存（避免产生大量日志）
+    if path.endswith("/settings/by-key/theme_hue"):
+        return False
+    return True
+
+
+class RequestContextMiddleware:
+    """
+    请求上下文中间件
+
+    - 读取或生成 X-Request-ID，写入日志上下文、request.state 与响应头
+    - 5xx 响应且异常处理器未记录时输出错误日志
+    - 写操作请求完成后调用 access_log_writer 记录访问日志
+    """
+
+    def __init__(self, app: ASGIApp, access_log_writer: Optional[AccessLogWriter] = None):
+        self.app = app
+        self.access_log_writer = access_log_writer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("x-request-id") or str(uuid.uuid4())
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        token = set_request_id(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+
+            method = scope["method"]
+            path = scope["path"]
+            if status_code >= 500 and not state.get("error_logged", False):
+                logger.error("5xx 响应: %s %s status=%s", method, path, status_code)
+                state["error_logged"] = True
+
+            if self.access_log_writer is not None and should_log_access(path, method):
+                await self.access_log_writer(Request(scope), status_code)
+        finally:
+            reset_request_id(token)
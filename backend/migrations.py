@@ -0,0 +1,131 @@
+"""
+数据库结构迁移模块
+项目使用 Base.metadata.create_all 建表，已存在的表不会自动新增列；
+migrate_schema 对比模型与数据库，为已有表补齐模型中新增的列（ALTER TABLE ... ADD COLUMN）
+和索引（CREATE INDEX）。
+
+只自动补齐可空或带服务端默认值的列，其余列记录警告，需要手工迁移。
+已有相同列组合的索引（如 init.sql 中名称不同的索引）时不重复创建。
+补齐列之后执行数据迁移（如把 posts 中的自动保存内容移到 post_autosaves 并删除旧列）。
+"""
+import logging
+from typing import List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn
+
+import models  # noqa: F401  注册全部模型
+from database import Base
+
+logger = logging.getLogger("firefly")
+
+
+def migrate_schema(engine: Engine) -> List[str]:
+    """
+    为已存在的表补齐缺失的列和索引
+
+    多个 worker 同时启动时可能重复执行，列已被其他进程添加时忽略错误。
+
+    Args:
+        engine: 数据库引擎
+
+    Returns:
+        新增的列（"表名.列名"）和索引（"表名.索引名"）
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    preparer = engine.dialect.identifier_preparer
+    added: List[str] = []
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            name = f"{table.name}.{column.name}"
+            if not column.nullable and column.server_default is None:
+                logger.warning("数据库缺少非空列 %s，无法自动添加，请手工迁移", name)
+                continue
+            ddl = CreateColumn(column).compile(dialect=engine.dialect)
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {ddl}"))
+            except Exception as exc:
+                logger.warning("添加列 %s 失败（可能已由其他进程添加）: %s", name, exc)
+                continue
+            added.append(name)
+            logger.info("已为已有表添加列 %s", name)
+
+        existing_indexes = {
+            tuple(index["column_names"]) for index in inspector.get_indexes(table.name)
+        } | {
+            tuple(constraint["column_names"]) for constraint in inspector.get_unique_constraints(table.name)
+        } | {tuple(inspector.get_pk_constraint(table.name)["constrained_columns"])}
+        for index in sorted(table.indexes, key=lambda item: item.name or ""):
+            columns = tuple(column.name for column in index.columns)
+            if columns in existing_indexes:
+                continue
+            name = f"{table.name}.{index.name}"
+            try:
+                index.create(bind=engine)
+            except Exception as exc:
+                logger.warning("创建索引 %s 失败（可能已由其他进程创建）: %s", name, exc)
+                continue
+            existing_indexes.add(columns)
+            added.append(name)
+            logger.info("已为已有表创建索引 %s", name)
+
+    try:
+        moved = migrate_post_autosaves(engine)
+        if moved:
+            logger.info("已将 %d 条自动保存内容迁移到 post_autosaves", moved)
+    except Exception as exc:
+        logger.warning("迁移自动保存内容失败: %s", exc)
+    return added
+
+
+# 自动保存内容移到 post_autosaves 后从 posts 删除的旧列
+LEGACY_POST_AUTOSAVE_COLUMNS = ("autosave_data", "autosave_at")
+
+
+def migrate_post_autosaves(engine: Engine) -> int:
+    """
+    把旧版 posts.autosave_data / autosave_at 中的自动保存内容移到 post_autosaves 表，然后删除这两列
+
+    post_autosaves 中已有记录的文章不覆盖。旧列不再映射到模型；滚动升级时仍在运行的旧版本
+    worker 会读写这两列，应先停止全部旧 worker 再启动新版本。
+
+    Returns:
+        迁移的记录数
+    """
+    inspector = inspect(engine)
+    if "posts" not in inspector.get_table_names():
+        return 0
+    columns = {column["name"] for column in inspector.get_columns("posts")}
+
+    moved = 0
+    if "autosave_data" in columns:
+        saved_at = "COALESCE(p.autosave_at, p.updated_at, CURRENT_TIMESTAMP)" if "autosave_at" in columns \
+            else "COALESCE(p.updated_at, CURRENT_TIMESTAMP)"
+        with engine.begin() as conn:
+            moved = conn.execute(text(
+                "INSERT INTO post_autosaves (post_id, data, saved_at) "
+                f"SELECT p.id, p.autosave_data, {saved_at} FROM posts p "
+                "WHERE p.autosave_data IS NOT NULL AND p.autosave_data <> '' "
+                "AND NOT EXISTS (SELECT 1 FROM post_autosaves a WHERE a.post_id = p.id)"
+            )).rowcount or 0
+
+    preparer = engine.dialect.identifier_preparer
+    for name in LEGACY_POST_AUTOSAVE_COLUMNS:
+        if name not in columns:
+            continue
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE posts DROP COLUMN {preparer.quote(name)}"))
+            logger.info("已删除旧列 posts.%s", name)
+        except Exception as exc:
+            logger.warning("删除旧列 posts.%s 失败（可能已由其他进程删除）: %s", name, exc)
+    return moved
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table, Boolean, Float, Date, UniqueConstraint
-from sqlalchemy.dialects.mysql import LONGTEXT
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table, Boolean, Float, Date, Index, UniqueConstraint, LargeBinary, and_, exists
+from sqlalchemy.dialects.mysql import LONGBLOB, LONGTEXT
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import column_property, deferred, relationship
 from datetime import datetime, date
+import hashlib
 import uuid
 from database import Base
 
@@ -9,6 +11,29 @@ def generate_uuid():
     """生成 UUID 字符串"""
     return str(uuid.uuid4())
 
+
+def _hash_fields(*values):
+    """计算多个文本字段的 SHA-256（每个字段带长度前缀，None 与空字符串区分）"""
+    digest = hashlib.sha256()
+    for value in values:
+        if value is None:
+            digest.update(b"-;")
+        else:
+            encoded = value.encode("utf-8")
+            digest.update(b"%d:" % len(encoded) + encoded)
+    return digest.hexdigest()
+
+
+def post_content_hash(title, slug, description, content):
+    """文章版本内容哈希（版本快照保存的字段）"""
+    return _hash_fields(title, slug, description, content)
+
+
+def post_media_hash(content, image):
+    """文章媒体引用哈希（媒体引用从正文和封面中解析）"""
+    return _hash_fields(content, image)
+
+
 # 文章-标签 多对多关联表
 post_tags = Table(
     "post_tags",
@@ -21,13 +46,18 @@ post_tags = Table(
 class Post(Base):
     """文章表"""
     __tablename__ = "posts"
-    __table_args__ = {'comment': '文章表'}
+    __table_args__ = (
+        # 定时发布队列：按状态筛选后按 (scheduled_at, id) 分页
+        Index("ix_posts_status_scheduled", "status", "scheduled_at", "id"),
+        {'comment': '文章表'}
+    )
 
     id = Column(String(36), primary_key=True, default=generate_uuid, index=True, comment="文章唯一标识(UUID)")
     title = Column(String(255), nullable=False, index=True, comment="文章标题")
     slug = Column(String(255), unique=True, nullable=False, index=True, comment="文章URL别名")
     description = Column(Text, nullable=True, comment="文章摘要描述")
-    content = Column(LONGTEXT, nullable=False, comment="文章正文内容(Markdown)")
+    # 正文默认延迟加载，列表、计数、置顶等只用到元数据的查询不读取；需要正文时使用 undefer
+    content = deferred(Column(LONGTEXT, nullable=False, comment="文章正文内容(Markdown)"))
     image = Column(String(500), nullable=True, comment="文章封面图片URL")
     published_at = Column(DateTime, default=datetime.utcnow, comment="发布时间")
     category_id = Column(String(36), ForeignKey("categories.id"), comment="所属分类ID")
@@ -37,10 +67,14 @@ class Post(Base):
     password = Column(String(255), nullable=True, comment="文章访问密码(明文,可选)")
     status = Column(String(20), default="draft", index=True, comment="发布状态(draft/published/scheduled)")
     scheduled_at = Column(DateTime, nullable=True, comment="定时发布时间")
-    autosave_data = Column(LONGTEXT, nullable=True, comment="自动保存内容(JSON)")
-    autosave_at = Column(DateTime, nullable=True, comment="自动保存时间")
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment="最后更新时间")
     deleted_at = Column(DateTime, nullable=True, index=True, comment="软删除时间(NULL表示未删除)")
+    # 内容哈希：保存时据此跳过未变化内容的版本快照和媒体引用同步（由 ORM 事件自动维护）
+    content_hash = Column(String(64), nullable=True, comment="标题/Slug/摘要/正文哈希(SHA-256)")
+    media_hash = Column(String(64), nullable=True, comment="正文/封面哈希(SHA-256)")
+
+    # 列表接口使用的标志位，在 SQL 中计算，无需读取密码（默认延迟加载）
+    has_password = column_property(and_(password != None, password != ""), deferred=True)
 
     category = relationship("Category", back_populates="posts")
     tags = relationship("Tag", secondary=post_tags, back_populates="posts")
@@ -66,6 +100,60 @@ class Post(Base):
         cascade="all, delete-orphan",
         order_by="desc(ScheduledPublishLog.created_at)"
     )
+    autosave = relationship(
+        "PostAutosave",
+        back_populates="post",
+        uselist=False,
+        cascade="all, delete-orphan"
+    )
+
+
+# 版本快照与媒体引用依赖的字段
+POST_CONTENT_FIELDS = ("title", "slug", "description", "content")
+POST_MEDIA_FIELDS = ("content", "image")
+
+
+@event.listens_for(Post, "before_insert")
+def _set_post_hashes(mapper, connection, target):
+    """新增文章时计算内容哈希"""
+    target.content_hash = post_content_hash(*(getattr(target, field) for field in POST_CONTENT_FIELDS))
+    target.media_hash = post_media_hash(*(getattr(target, field) for field in POST_MEDIA_FIELDS))
+
+
+@event.listens_for(Post, "before_update")
+def _update_post_hashes(mapper, connection, target):
+    """相关字段通过 ORM 修改时重新计算内容哈希（集合 UPDATE 不触发，也不修改这些字段）"""
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in POST_CONTENT_FIELDS):
+        target.content_hash = post_content_hash(*(getattr(target, field) for field in POST_CONTENT_FIELDS))
+    if any(state.attrs[field].history.has_changes() for field in POST_MEDIA_FIELDS):
+        target.media_hash = post_media_hash(*(getattr(target, field) for field in POST_MEDIA_FIELDS))
+
+
+class PostAutosave(Base):
+    """文章自动保存表（与 posts 分表存放，文章查询不读取自动保存内容）"""
+    __tablename__ = "post_autosaves"
+    __table_args__ = {'comment': '文章自动保存'}
+
+    post_id = Column(String(36), ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True, comment="文章ID")
+    data = Column(LONGTEXT, nullable=False, comment="自动保存内容(JSON)，空字符串表示已清除")
+    saved_at = Column(DateTime, nullable=False, default=datetime.utcnow, comment="自动保存时间")
+
+    post = relationship("Post", back_populates="autosave")
+
+
+# 列表接口使用的标志位：是否存在自动保存（EXISTS 子查询，默认延迟加载；data 为空字符串的是清除标记）
+Post.has_autosave = column_property(
+    exists().where(PostAutosave.post_id == Post.id, PostAutosave.data != ""),
+    deferred=True
+)
+
+# 文章列表：与排序及游标分页的键 (pinned DESC, pin_order, published_at DESC, id DESC) 一致，
+# 分页时按索引顺序读取，无需排序（MySQL 8.0 起支持降序索引）
+Index(
+    "ix_posts_list_order",
+    Post.pinned.desc(), Post.pin_order, Post.published_at.desc(), Post.id.desc()
+)
 
 
 class ScheduledPublishLog(Base):
@@ -92,10 +180,19 @@ class PostRevision(Base):
     post_id = Column(String(36), ForeignKey("posts.id", ondelete="CASCADE"), nullable=False, index=True, comment="文章ID")
     title = Column(String(255), nullable=False, comment="版本标题")
     slug = Column(String(255), nullable=False, comment="版本Slug")
-    description = Column(Text, nullable=True, comment="版本摘要")
-    content = Column(LONGTEXT, nullable=False, comment="版本内容")
+    description = Column(Text, nullable=True, comment="版本摘要(仅未压缩版本)")
+    content = Column(LONGTEXT, nullable=False, comment="版本内容(仅未压缩版本，压缩版本为空字符串)")
     editor = Column(String(50), nullable=True, comment="编辑者用户名")
     created_at = Column(DateTime, default=datetime.utcnow, comment="版本创建时间")
+    # 压缩存储（见 revisions.py）：storage 为 NULL/full 时摘要和正文在 description/content 列中
+    storage = Column(String(10), nullable=True, comment="存储方式(full/key/delta)")
+    base_id = Column(String(36), nullable=True, comment="差异版本的基准版本ID")
+    chain_depth = Column(Integer, nullable=True, comment="距最近关键帧的差异层数")
+    data = deferred(Column(
+        LargeBinary().with_variant(LONGBLOB(), "mysql"),
+        nullable=True,
+        comment="压缩后的摘要和正文(关键帧)或差异(delta)"
+    ))
 
     post = relationship("Post", back_populates="revisions")
 
@@ -103,7 +200,11 @@ class PostRevision(Base):
 class MediaFile(Base):
     """媒体文件表"""
     __tablename__ = "media_files"
-    __table_args__ = {'comment': '媒体文件元数据'}
+    __table_args__ = (
+        # 媒体列表按 (created_at, id) 倒序分页
+        Index("ix_media_files_created_id", "created_at", "id"),
+        {'comment': '媒体文件元数据'}
+    )
 
     id = Column(String(36), primary_key=True, default=generate_uuid, index=True, comment="媒体ID(UUID)")
     filename = Column(String(255), nullable=False, comment="存储文件名")
@@ -249,7 +350,11 @@ class SocialLink(Base):
 class BackupRecord(Base):
     """数据备份记录表"""
     __tablename__ = "backup_records"
-    __table_args__ = {'comment': '数据备份记录'}
+    __table_args__ = (
+        # 备份历史按 (created_at, id) 倒序分页
+        Index("ix_backup_records_created_id", "created_at", "id"),
+        {'comment': '数据备份记录'}
+    )
 
     id = Column(String(36), primary_key=True, default=generate_uuid, index=True, comment="记录ID(UUID)")
     filename = Column(String(255), nullable=False, comment="备份文件名")
@@ -279,7 +384,12 @@ class SiteSetting(Base):
 class AccessLog(Base):
     """访问日志表"""
     __tablename__ = "access_logs"
-    __table_args__ = {'comment': '访问日志表'}
+    __table_args__ = (
+        # 日志列表按 (created_at, id) 倒序分页，可按日志类型筛选
+        Index("ix_access_logs_created_id", "created_at", "id"),
+        Index("ix_access_logs_type_created_id", "log_type", "created_at", "id"),
+        {'comment': '访问日志表'}
+    )
 
     id = Column(String(36), primary_key=True, default=generate_uuid, index=True, comment="日志ID(UUID)")
     log_type = Column(String(50), nullable=False, index=True, comment="日志类型(login_success/login_failed/api_access)")
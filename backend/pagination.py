@@ -0,0 +1,211 @@
+"""
+分页工具
+提供基于排序键的游标（keyset）分页，以及可缓存的总数统计。
+
+游标分页用 WHERE (排序键) 在上一页最后一条之后 代替 OFFSET，
+翻到多深都只扫描一页的数据；原有的 page/page_size 偏移分页保持不变。
+"""
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, false, literal, or_
+from sqlalchemy.orm import Query
+
+from cache import SimpleCache
+
+# 总数缓存时间（秒），用于没有精确失效机制的列表（日志、媒体、备份记录）
+PAGINATION_COUNT_CACHE_TTL = int(os.getenv("PAGINATION_COUNT_CACHE_TTL", "30"))
+
+# 列表总数缓存（进程内）
+count_cache = SimpleCache(default_ttl=PAGINATION_COUNT_CACHE_TTL, name="counts", shared=False)
+
+
+class InvalidCursorError(ValueError):
+    """游标无法解析或不属于当前列表"""
+
+
+def _encode_value(value: Any) -> Any:
+    """把排序键的值转换为可 JSON 序列化的形式"""
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    """还原 _encode_value 的结果"""
+    if isinstance(value, dict):
+        if set(value) != {"dt"}:
+            raise InvalidCursorError("无效的分页游标")
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+class KeysetPaginator:
+    """
+    游标分页器
+
+    按给定的排序键排序，游标记录上一页最后一条记录的排序键取值。
+    排序键的最后一项应为唯一列（通常是 id），保证顺序稳定。
+    NULL 按最小值处理（与 MySQL / SQLite 的排序规则一致）：
+    升序时排在最前，降序时排在最后。
+    """
+
+    def __init__(self, name: str, keys: Sequence[Tuple[Any, bool]]):
+        """
+        Args:
+            name: 列表名称，写入游标，防止游标在不同列表间混用
+            keys: [(ORM 列属性, 是否降序), ...]
+        """
+        self.name = name
+        self.keys = list(keys)
+
+    def order_by(self, query: Query) -> Query:
+        """替换查询的排序为分页器的排序键"""
+        return query.order_by(None).order_by(
+            *(column.desc() if descending else column.asc() for column, descending in self.keys)
+        )
+
+    def encode(self, item: Any) -> str:
+        """根据一条记录生成指向其之后位置的游标"""
+        values = [_encode_value(getattr(item, column.key)) for column, _ in self.keys]
+        raw = json.dumps({"k": self.name, "v": values}, separators=(",", ":"), ensure_ascii=False)
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def decode(self, cursor: str) -> List[Any]:
+        """
+        解析游标
+
+        Raises:
+            InvalidCursorError: 游标格式错误或属于其他列表
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            data = json.loads(raw)
+        except (ValueError, TypeError):
+            raise InvalidCursorError("无效的分页游标")
+        if not isinstance(data, dict) or data.get("k") != self.name:
+            raise InvalidCursorError("无效的分页游标")
+        values = data.get("v")
+        if not isinstance(values, list) or len(values) != len(self.keys):
+            raise InvalidCursorError("无效的分页游标")
+        try:
+            return [_decode_value(value) for value in values]
+        except (ValueError, TypeError):
+            raise InvalidCursorError("无效的分页游标")
+
+    def _after(self, values: Sequence[Any]):
+        """生成“排序位置在 values 之后”的条件：(k1 之后) OR (k1 相等 AND k2 之后) OR ..."""
+        conditions = []
+        equals = []
+        for (column, descending), value in zip(self.keys, values):
+            # 布尔值需包装为绑定参数，SQLAlchemy 不允许 True/False 直接参与大小比较
+            bound = None if value is None else literal(value, column.type)
+            if descending:
+                after = false() if value is None else or_(column < bound, column.is_(None))
+            else:
+                after = column.isnot(None) if value is None else column > bound
+            conditions.append(and_(*equals, after))
+            equals.append(column.is_(None) if value is None else column == bound)
+        return or_(*conditions)
+
+    def page(self, query: Query, cursor: Optional[str], limit: int) -> Tuple[List[Any], Optional[str]]:
+        """
+        获取一页数据
+
+        Args:
+            query: 已带筛选条件的查询（原有排序会被替换）
+            cursor: 上一页返回的游标，为空表示第一页
+            limit: 每页数量
+
+        Returns:
+            (记录列表, 下一页游标；没有更多数据时为 None)
+
+        Raises:
+            InvalidCursorError: 游标无效
+        """
+        query = self.order_by(query)
+        if cursor:
+            query = query.filter(self._after(self.decode(cursor)))
+        items = query.limit(limit + 1).all()
+        if len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        return items, self.encode(items[-1])
+
+
+def cached_count(
+    query: Query,
+    key: str,
+    cache: SimpleCache = count_cache,
+    ttl: Optional[int] = None,
+    tags: Optional[Iterable[str]] = None
+) -> int:
+    """
+    统计查询总数并缓存
+
+    Args:
+        query: 筛选后的查询
+        key: 缓存键（需包含筛选条件）
+        cache: 缓存实例，默认为进程内的 count_cache（按 TTL 过期）
+        ttl: 缓存时间（秒）
+        tags: 缓存标签，使用可按标签失效的缓存时传入
+    """
+    return cache.get_or_load(f"count:{key}", query.order_by(None).count, ttl, tags=tags)
+
+
+def cursor_pagination(page_size: int, next_cursor: Optional[str], total: Optional[int] = None) -> Dict[str, Any]:
+    """游标分页响应中的分页信息（total 仅在请求时返回）"""
+    return {
+        "page_size": page_size,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+        "total": total
+    }
+
+
+def paginate(
+    query: Query,
+    paginator: KeysetPaginator,
+    cursor: Optional[str],
+    page: int,
+    page_size: int,
+    with_total: bool = False,
+    count_key: Optional[str] = None
+) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    按请求参数选择偏移分页或游标分页
+
+    - cursor 为 None：原有的偏移分页，总是返回 total / total_pages
+    - cursor 为字符串（第一页为空字符串）：游标分页，with_total 时返回缓存的总数
+
+    Args:
+        query: 已带筛选条件的查询
+        paginator: 列表对应的游标分页器（偏移分页也使用其排序）
+        cursor: 游标
+        page: 页码（偏移分页）
+        page_size: 每页数量
+        with_total: 游标分页时是否返回总数
+        count_key: 总数缓存键，需包含筛选条件，默认为分页器名称
+
+    Returns:
+        (记录列表, 分页信息)
+
+    Raises:
+        InvalidCursorError: 游标无效
+    """
+    if cursor is None:
+        total = query.count()
+        items = paginator.order_by(query).offset((page - 1) * page_size).limit(page_size).all()
+        return items, {
+            "page": page,
+            "page_size": page_size,
+            "total": total,
+            "total_pages": (total + page_size - 1) // page_size
+        }
+
+    items, next_cursor = paginator.page(query, cursor, page_size)
+    total = cached_count(query, count_key or paginator.name) if with_total else None
+    return items, cursor_pagination(page_size, next_cursor, total)
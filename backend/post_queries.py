@@ -0,0 +1,209 @@
+"""
+文章列表查询工具
+统一构建文章列表查询，并预加载分类和标签，避免逐篇懒加载产生的 N+1 查询；
+按响应字段只加载需要的列（正文、密码和自动保存内容不进入列表查询）
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Query, Session, joinedload, load_only, selectinload, undefer
+
+import models
+from pagination import KeysetPaginator
+
+# 公开文章列表排序键 (列, 是否降序)：置顶优先、置顶排序（数字小的在前）、发布时间倒序，
+# 最后以 id 保证顺序稳定
+POST_LIST_KEYS = (
+    (models.Post.pinned, True),
+    (models.Post.pin_order, False),
+    (models.Post.published_at, True),
+    (models.Post.id, True)
+)
+POST_LIST_ORDER = tuple(column.desc() if descending else column.asc() for column, descending in POST_LIST_KEYS)
+
+# 文章列表游标分页
+POST_PAGINATOR = KeysetPaginator("posts", POST_LIST_KEYS)
+
+# 文章列表响应字段 -> 需要加载的 Post 列
+# category / tags 通过预加载取得；has_password / has_autosave 为 SQL 计算的标志位
+POST_LIST_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "id": ("id",),
+    "title": ("title",),
+    "slug": ("slug",),
+    "description": ("description",),
+    "content": ("content",),
+    "image": ("image",),
+    "published_at": ("published_at",),
+    "category": ("category_id",),
+    "tags": (),
+    "is_draft": ("is_draft",),
+    "pinned": ("pinned",),
+    "pin_order": ("pin_order",),
+    "has_password": ("has_password",),
+    "status": ("status", "is_draft"),
+    "scheduled_at": ("scheduled_at",),
+    "autosave_available": ("has_autosave",),
+    "deleted_at": ("deleted_at",)
+}
+
+# 列表视图：full 为完整字段（兼容旧接口），summary 不含正文
+POST_LIST_VIEWS: Dict[str, Tuple[str, ...]] = {
+    "full": tuple(POST_LIST_FIELDS),
+    "summary": tuple(field for field in POST_LIST_FIELDS if field != "content")
+}
+
+
+def resolve_post_fields(fields: Optional[str] = None, view: str = "full") -> Tuple[str, ...]:
+    """
+    解析文章列表需要返回的字段
+
+    Args:
+        fields: 逗号分隔的字段列表，优先于 view；id 总是返回
+        view: 列表视图名称（full / summary）
+
+    Returns:
+        按 POST_LIST_FIELDS 顺序排列的字段元组
+
+    Raises:
+        ValueError: 视图或字段名无效
+    """
+    if fields:
+        requested = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = sorted(requested - set(POST_LIST_FIELDS))
+        if unknown:
+            raise ValueError(f"无效的字段: {', '.join(unknown)}")
+        requested.add("id")
+        return tuple(field for field in POST_LIST_FIELDS if field in requested)
+    if view not in POST_LIST_VIEWS:
+        raise ValueError(f"无效的视图: {view}")
+    return POST_LIST_VIEWS[view]
+
+
+def with_post_columns(query: Query, fields: Iterable[str]) -> Query:
+    """
+    只加载响应字段所需的列
+
+    分类 ID（计算缓存标签）和排序键（生成游标）总是加载；
+    未列出的列（包括正文、密码、自动保存内容）不出现在 SELECT 中。
+    """
+    columns = {"category_id"} | {column.key for column, _ in POST_LIST_KEYS}
+    for field in fields:
+        columns.update(POST_LIST_FIELDS[field])
+    return query.options(load_only(*(getattr(models.Post, column) for column in sorted(columns))))
+
+
+def with_post_relations(query: Query, category: bool = True, tags: bool = True) -> Query:
+    """
+    为文章查询添加关联预加载
+
+    分类为多对一，使用 joinedload 在同一条 SQL 中取回；
+    标签为多对多，使用 selectinload 额外一条 IN 查询批量取回，
+    无论结果有多少篇文章，查询次数都是固定的。
+
+    Args:
+        query: 以 models.Post 为主体的查询
+        category: 是否预加载分类
+        tags: 是否预加载标签
+    """
+    options = []
+    if category:
+        options.append(joinedload(models.Post.category))
+    if tags:
+        options.append(selectinload(models.Post.tags))
+    return query.options(*options) if options else query
+
+
+def with_post_detail(query: Query) -> Query:
+    """为文章详情查询预加载关联，并加载默认延迟的正文和自动保存标志"""
+    return with_post_relations(query).options(
+        undefer(models.Post.content),
+        undefer(models.Post.has_autosave)
+    )
+
+
+def build_post_list_query(
+    db: Session,
+    include_deleted: bool = False,
+    deleted_only: bool = False,
+    order_by: Optional[tuple] = None
+) -> Query:
+    """
+    构建文章列表查询（不含预加载，便于先计算总数）
+
+    Args:
+        db: 数据库会话
+        include_deleted: 是否包含已软删除的文章
+        deleted_only: 只查询已软删除的文章（回收站）
+        order_by: 排序字段，默认为 POST_LIST_ORDER
+    """
+    query = db.query(models.Post)
+    if deleted_only:
+        query = query.filter(models.Post.deleted_at != None)
+    elif not include_deleted:
+        query = query.filter(models.Post.deleted_at == None)
+    return query.order_by(*(order_by or POST_LIST_ORDER))
+
+
+def fetch_post_page(
+    query: Query,
+    page: int,
+    page_size: int,
+    all: bool = False,
+    category: bool = True,
+    tags: bool = True,
+    fields: Optional[Iterable[str]] = None
+) -> Tuple[List[models.Post], int]:
+    """
+    分页获取文章并预加载关联
+
+    总数在添加预加载之前计算，避免 COUNT 子查询中带上 JOIN。
+
+    Args:
+        query: build_post_list_query 返回的查询
+        page: 页码，从 1 开始
+        page_size: 每页数量
+        all: 是否返回全部（不分页）
+        category: 是否预加载分类
+        tags: 是否预加载标签
+        fields: 响应字段，提供时只加载这些字段需要的列
+
+    Returns:
+        (文章列表, 总数)
+    """
+    total = query.count()
+    query = with_post_relations(query, category=category, tags=tags)
+    if fields is not None:
+        query = with_post_columns(query, fields)
+    if not all:
+        query = query.offset((page - 1) * page_size).limit(page_size)
+    return query.all(), total
+
+
+def fetch_post_cursor_page(
+    query: Query,
+    cursor: Optional[str],
+    page_size: int,
+    category: bool = True,
+    tags: bool = True,
+    fields: Optional[Iterable[str]] = None
+) -> Tuple[List[models.Post], Optional[str]]:
+    """
+    按 POST_LIST_KEYS 游标分页获取文章并预加载关联
+
+    Args:
+        query: build_post_list_query 返回的查询（排序会被替换为 POST_LIST_KEYS）
+        cursor: 上一页返回的游标，为空表示第一页
+        page_size: 每页数量
+        category: 是否预加载分类
+        tags: 是否预加载标签
+        fields: 响应字段，提供时只加载这些字段需要的列
+
+    Returns:
+        (文章列表, 下一页游标)
+
+    Raises:
+        InvalidCursorError: 游标无效
+    """
+    query = with_post_relations(query, category=category, tags=tags)
+    if fields is not None:
+        query = with_post_columns(query, fields)
+    return POST_PAGINATOR.page(query, cursor, page_size)
@@ -2,8 +2,21 @@
 响应格式工具
 统一返回结构：code/msg/data
 """
+import contextvars
+import json
 from typing import Any, Dict, Optional, Tuple
 
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+try:
+    # 可选依赖：安装后使用 orjson 序列化响应，速度明显快于标准库 json
+    import orjson
+except ImportError:
+    orjson = None
+
+_request_method_var = contextvars.ContextVar("request_method", default="GET")
+
 
 def is_standard_payload(payload: Any) -> bool:
     """判断是否已是标准响应结构"""
@@ -99,3 +112,41 @@ def normalize_payload(payload: Any, method: str, status_code: int) -> Dict[str,
         return payload
     msg, data = extract_message_and_data(payload, method, status_code)
     return build_response(status_code, msg, data)
+
+
+async def bind_request_method(request: Request) -> None:
+    """
+    记录当前请求方法（API 路由级依赖）
+
+    EnvelopeJSONResponse 序列化时据此生成默认 msg。
+    必须是 async 依赖，才能在路由所在的协程上下文中设置变量。
+    """
+    _request_method_var.set(request.method)
+
+
+def dumps_json(content: Any) -> bytes:
+    """序列化 JSON 响应体（输出与 Starlette JSONResponse 一致的紧凑 UTF-8）"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+class EnvelopeJSONResponse(JSONResponse):
+    """
+    API 默认响应类
+
+    在序列化时直接生成 code/msg/data 结构，响应体只编码一次，
+    不再由中间件解析后重新编码。
+    """
+
+    def render(self, content: Any) -> bytes:
+        if self.status_code in (204, 304):
+            return b""
+        payload = normalize_payload(content, _request_method_var.get(), self.status_code)
+        return dumps_json(payload)
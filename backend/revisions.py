@@ -0,0 +1,247 @@
+"""
+文章版本存储模块
+版本的摘要和正文以 zlib 压缩后存入 data 列：
+- key：关键帧，保存完整的摘要和正文
+- delta：相对基准版本（base_id，通常为上一版本）的按行差异
+每条差异链最多 REVISION_KEYFRAME_INTERVAL 层，还原任一版本最多读取这么多条记录。
+
+旧版本（storage 为 NULL 或 full）的摘要和正文仍在 description / content 列中，
+可直接读取，也可作为差异的基准；compact_revisions 将其转换为压缩格式。
+"""
+import difflib
+import json
+import os
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session, undefer
+
+import models
+
+# 每隔多少个版本保存一次关键帧
+REVISION_KEYFRAME_INTERVAL = int(os.getenv("REVISION_KEYFRAME_INTERVAL", "10"))
+if REVISION_KEYFRAME_INTERVAL < 1:
+    REVISION_KEYFRAME_INTERVAL = 1
+# zlib 压缩级别
+REVISION_COMPRESS_LEVEL = 6
+
+STORAGE_FULL = "full"
+STORAGE_KEY = "key"
+STORAGE_DELTA = "delta"
+
+# 版本文本：(摘要, 正文)
+RevisionText = Tuple[Optional[str], str]
+
+
+class RevisionChainError(Exception):
+    """差异链中的基准版本缺失，无法还原"""
+
+
+def _pack(payload: Dict[str, Any]) -> bytes:
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(raw, REVISION_COMPRESS_LEVEL)
+
+
+def _unpack(data: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(data).decode("utf-8"))
+
+
+def make_delta(base: str, target: str) -> List[Any]:
+    """
+    计算按行差异
+
+    Returns:
+        操作列表：[起始行, 结束行] 表示复制基准的行区间，字符串表示插入的文本
+    """
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    ops: List[Any] = []
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(target_lines[j1:j2]))
+    return ops
+
+
+def apply_delta(base: str, ops: List[Any]) -> str:
+    """把 make_delta 的结果应用到基准文本上"""
+    base_lines = base.splitlines(keepends=True)
+    parts: List[str] = []
+    for op in ops:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(base_lines[op[0]:op[1]])
+    return "".join(parts)
+
+
+def _is_compressed(revision: models.PostRevision) -> bool:
+    return revision.storage in (STORAGE_KEY, STORAGE_DELTA)
+
+
+def _load_chain(db: Session, revision: models.PostRevision) -> List[models.PostRevision]:
+    """读取从链首（关键帧或未压缩版本）到 revision 的差异链"""
+    # 基准版本一般就是紧邻的前几个版本，一次查询取回，缺失的再按 ID 补查
+    candidates = {
+        row.id: row
+        for row in db.query(models.PostRevision).options(undefer(models.PostRevision.data)).filter(
+            models.PostRevision.post_id == revision.post_id,
+            models.PostRevision.created_at <= revision.created_at
+        ).order_by(models.PostRevision.created_at.desc()).limit((revision.chain_depth or 0) + 1)
+    }
+    chain = [revision]
+    current = revision
+    while current.storage == STORAGE_DELTA:
+        base = candidates.get(current.base_id) or db.get(models.PostRevision, current.base_id)
+        if base is None or base in chain:
+            raise RevisionChainError(f"版本 {current.id} 的基准版本 {current.base_id} 不存在")
+        chain.append(base)
+        current = base
+    chain.reverse()
+    return chain
+
+
+def revision_text(db: Session, revision: models.PostRevision) -> RevisionText:
+    """
+    还原版本的摘要和正文
+
+    Raises:
+        RevisionChainError: 差异链损坏
+    """
+    if not _is_compressed(revision):
+        return revision.description, revision.content
+
+    description: Optional[str] = None
+    content = ""
+    for item in _load_chain(db, revision):
+        if not _is_compressed(item):
+            description, content = item.description, item.content
+            continue
+        payload = _unpack(item.data)
+        description = payload.get("d")
+        if item.storage == STORAGE_KEY:
+            content = payload["c"]
+        else:
+            content = apply_delta(content, payload["o"])
+    return description, content
+
+
+def _encode(
+    revision: models.PostRevision,
+    description: Optional[str],
+    content: str,
+    base: Optional[models.PostRevision] = None,
+    base_content: Optional[str] = None
+) -> None:
+    """
+    以压缩格式写入版本内容
+
+    提供基准版本且差异链未达到关键帧间隔、差异比关键帧更小时保存差异，否则保存关键帧。
+    """
+    key_data = _pack({"d": description, "c": content})
+    revision.storage = STORAGE_KEY
+    revision.base_id = None
+    revision.chain_depth = 0
+    revision.data = key_data
+    revision.description = None
+    revision.content = ""
+
+    if base is None or base_content is None:
+        return
+    depth = (base.chain_depth or 0) + 1 if base.storage == STORAGE_DELTA else 1
+    if depth >= REVISION_KEYFRAME_INTERVAL:
+        return
+    delta_data = _pack({"d": description, "o": make_delta(base_content, content)})
+    if len(delta_data) < len(key_data):
+        revision.storage = STORAGE_DELTA
+        revision.base_id = base.id
+        revision.chain_depth = depth
+        revision.data = delta_data
+
+
+def build_revision(
+    db: Session,
+    post: models.Post,
+    editor: Optional[str] = None
+) -> models.PostRevision:
+    """
+    生成文章当前内容的版本记录（以最新版本为基准压缩，调用方负责 add / commit）
+
+    基准版本无法还原时保存关键帧。
+    """
+    revision = models.PostRevision(
+        post_id=post.id,
+        title=post.title,
+        slug=post.slug,
+        editor=editor
+    )
+    latest = db.query(models.PostRevision).options(undefer(models.PostRevision.data)).filter(
+        models.PostRevision.post_id == post.id
+    ).order_by(models.PostRevision.created_at.desc()).first()
+
+    base_content = None
+    if latest is not None:
+        try:
+            base_content = revision_text(db, latest)[1]
+        except RevisionChainError:
+            latest = None
+    _encode(revision, post.description, post.content or "", latest, base_content)
+    return revision
+
+
+def detach_revision(db: Session, revision: models.PostRevision) -> int:
+    """
+    删除版本前调用：把以该版本为基准的差异版本改存为关键帧
+
+    Returns:
+        改写的版本数
+    """
+    dependents = db.query(models.PostRevision).options(undefer(models.PostRevision.data)).filter(
+        models.PostRevision.base_id == revision.id
+    ).all()
+    for dependent in dependents:
+        description, content = revision_text(db, dependent)
+        _encode(dependent, description, content)
+    return len(dependents)
+
+
+def _text_size(description: Optional[str], content: Optional[str]) -> int:
+    return len((description or "").encode("utf-8")) + len((content or "").encode("utf-8"))
+
+
+def compact_revisions(db: Session) -> Dict[str, Any]:
+    """
+    把未压缩的旧版本转换为关键帧 + 差异格式（按文章逐篇提交）
+
+    同一文章的旧版本按时间顺序串成差异链；已压缩的版本不变，
+    它们引用的旧版本内容不变，仍可正常还原。
+
+    Returns:
+        处理的文章数、版本数，以及正文占用的字节数（转换前 / 转换后 / 节省）
+    """
+    legacy = (models.PostRevision.storage == None) | (models.PostRevision.storage == STORAGE_FULL)
+    post_ids = [post_id for (post_id,) in db.query(models.PostRevision.post_id).filter(legacy).distinct()]
+
+    stats = {"posts": 0, "revisions": 0, "bytes_before": 0, "bytes_after": 0}
+    for post_id in post_ids:
+        revisions = db.query(models.PostRevision).filter(
+            models.PostRevision.post_id == post_id,
+            legacy
+        ).order_by(models.PostRevision.created_at.asc(), models.PostRevision.id.asc()).all()
+
+        base: Optional[models.PostRevision] = None
+        base_content: Optional[str] = None
+        for revision in revisions:
+            description, content = revision.description, revision.content
+            stats["bytes_before"] += _text_size(description, content)
+            _encode(revision, description, content, base, base_content)
+            stats["bytes_after"] += len(revision.data)
+            base, base_content = revision, content
+        db.commit()
+        stats["posts"] += 1
+        stats["revisions"] += len(revisions)
+
+    stats["bytes_saved"] = stats["bytes_before"] - stats["bytes_after"]
+    return stats
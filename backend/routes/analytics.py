@@ -12,7 +12,7 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy import func
 
 import models
-from database import get_db
+from database import get_db, get_read_db
 
 router = APIRouter(prefix="/analytics", tags=["访问统计"])
 
@@ -82,7 +82,7 @@ def record_post_view(
 @router.get("/summary", summary="访问统计概览")
 def analytics_summary(
     days: int = 7,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """返回访问信息概览"""
     if days < 1 or days > 30:
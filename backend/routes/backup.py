@@ -9,43 +9,29 @@ import os
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
-from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from jose import JWTError, jwt
+from sqlalchemy.orm import Session, undefer
 import io
 
 import models
+from auth import get_current_user
 from database import get_db, settings
+from cache import invalidate_all_cache, invalidate_cache_ttls
+from pagination import InvalidCursorError, KeysetPaginator, paginate
+from post_queries import with_post_relations
+from taxonomy import get_categories_by_name, get_tags_by_name
 
 router = APIRouter(prefix="/backup", tags=["数据备份"])
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
-
-
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """验证 JWT Token 并获取当前用户"""
-    credentials_exception = HTTPException(
-        status_code=401,
-        detail="无效的认证凭据",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-
-    user = db.query(models.Admin).filter(models.Admin.username == username).first()
-    if user is None:
-        raise credentials_exception
-    return user
+# 备份历史按创建时间倒序，id 保证顺序稳定
+BACKUP_PAGINATOR = KeysetPaginator("backups", [
+    (models.BackupRecord.created_at, True),
+    (models.BackupRecord.id, True)
+])
 
 
 def build_full_backup_payload(db: Session) -> Dict[str, Any]:
     """构建全量备份数据"""
-    posts = db.query(models.Post).all()
+    posts = with_post_relations(db.query(models.Post)).options(undefer(models.Post.content)).all()
     posts_data = [{
         "id": p.id,
         "title": p.title,
@@ -141,7 +127,7 @@ def build_full_backup_payload(db: Session) -> Dict[str, Any]:
 
 def build_posts_backup_payload(db: Session) -> Dict[str, Any]:
     """构建文章备份数据"""
-    posts = db.query(models.Post).all()
+    posts = with_post_relations(db.query(models.Post)).options(undefer(models.Post.content)).all()
     posts_data = [{
         "title": p.title,
         "slug": p.slug,
@@ -265,6 +251,11 @@ async def export_posts(
     )
 
 
+def import_post_tags(post_data: Dict[str, Any], tag_map: Dict[str, models.Tag]) -> List[models.Tag]:
+    """备份文章引用的标签（去重，忽略不存在的标签）"""
+    return [tag_map[name] for name in dict.fromkeys(post_data.get("tags", [])) if name in tag_map]
+
+
 @router.post("/import", summary="导入数据")
 async def import_data(
     file: UploadFile = File(...),
@@ -308,13 +299,14 @@ async def import_data(
 
     backup_data = data["data"]
 
-    # 导入分类
+    # 导入分类（一次查询取回所有已存在的同名分类）
     if "categories" in backup_data:
+        existing_categories = get_categories_by_name(
+            db, [cat_data.get("name") for cat_data in backup_data["categories"]]
+        )
         for cat_data in backup_data["categories"]:
             try:
-                existing = db.query(models.Category).filter(
-                    models.Category.name == cat_data["name"]
-                ).first()
+                existing = existing_categories.get(cat_data["name"])
 
                 if existing:
                     if merge:
@@ -339,18 +331,18 @@ async def import_data(
                         enabled=cat_data.get("enabled", True)
                     )
                     db.add(new_cat)
+                    existing_categories[new_cat.name] = new_cat
 
                 import_stats["categories"]["imported"] += 1
             except Exception as e:
                 import_stats["categories"]["errors"] += 1
 
-    # 导入标签
+    # 导入标签（一次查询取回所有已存在的同名标签）
     if "tags" in backup_data:
+        existing_tags = get_tags_by_name(db, [tag_data.get("name") for tag_data in backup_data["tags"]])
         for tag_data in backup_data["tags"]:
             try:
-                existing = db.query(models.Tag).filter(
-                    models.Tag.name == tag_data["name"]
-                ).first()
+                existing = existing_tags.get(tag_data["name"])
 
                 if existing:
                     if merge:
@@ -368,6 +360,7 @@ async def import_data(
                         enabled=tag_data.get("enabled", True)
                     )
                     db.add(new_tag)
+                    existing_tags[new_tag.name] = new_tag
 
                 import_stats["tags"]["imported"] += 1
             except Exception as e:
@@ -377,6 +370,13 @@ async def import_data(
 
     # 导入文章
     if "posts" in backup_data:
+        # 文章引用的分类和标签一次性批量查询（不存在的忽略）
+        category_map = get_categories_by_name(
+            db, [post_data.get("category_name") for post_data in backup_data["posts"]]
+        )
+        tag_map = get_tags_by_name(
+            db, [name for post_data in backup_data["posts"] for name in post_data.get("tags", [])]
+        )
         for post_data in backup_data["posts"]:
             try:
                 existing = db.query(models.Post).filter(
@@ -398,30 +398,16 @@ async def import_data(
                         existing.pin_order = post_data.get("pin_order", 0)
 
                         # 更新分类
-                        if post_data.get("category_name"):
-                            cat = db.query(models.Category).filter(
-                                models.Category.name == post_data["category_name"]
-                            ).first()
-                            if cat:
-                                existing.category_id = cat.id
+                        cat = category_map.get(post_data.get("category_name"))
+                        if cat:
+                            existing.category_id = cat.id
 
                         # 更新标签
-                        existing.tags = []
-                        for tag_name in post_data.get("tags", []):
-                            tag = db.query(models.Tag).filter(
-                                models.Tag.name == tag_name
-                            ).first()
-                            if tag:
-                                existing.tags.append(tag)
+                        existing.tags = import_post_tags(post_data, tag_map)
                 else:
                     # 获取分类
-                    category_id = None
-                    if post_data.get("category_name"):
-                        cat = db.query(models.Category).filter(
-                            models.Category.name == post_data["category_name"]
-                        ).first()
-                        if cat:
-                            category_id = cat.id
+                    cat = category_map.get(post_data.get("category_name"))
+                    category_id = cat.id if cat else None
 
                     new_post = models.Post(
                         title=post_data["title"],
@@ -432,17 +418,10 @@ async def import_data(
                         category_id=category_id,
                         is_draft=1 if post_data.get("is_draft") else 0,
                         pinned=post_data.get("pinned", False),
-                        pin_order=post_data.get("pin_order", 0)
+                        pin_order=post_data.get("pin_order", 0),
+                        tags=import_post_tags(post_data, tag_map)
                     )
 
-                    # 添加标签
-                    for tag_name in post_data.get("tags", []):
-                        tag = db.query(models.Tag).filter(
-                            models.Tag.name == tag_name
-                        ).first()
-                        if tag:
-                            new_post.tags.append(tag)
-
                     db.add(new_post)
 
                 import_stats["posts"]["imported"] += 1
@@ -515,6 +494,8 @@ async def import_data(
                 import_stats["settings"]["errors"] += 1
 
     db.commit()
+    invalidate_all_cache()
+    invalidate_cache_ttls()
 
     return {
         "message": "数据导入完成",
@@ -526,15 +507,17 @@ async def import_data(
 async def get_backup_history(
     page: int = 1,
     page_size: int = 10,
+    cursor: Optional[str] = None,
+    with_total: bool = False,
     db: Session = Depends(get_db),
     current_user: models.Admin = Depends(get_current_user)
 ):
-    """获取备份历史记录列表"""
+    """获取备份历史记录列表（提供 cursor 时使用游标分页，第一页传空字符串）"""
     query = db.query(models.BackupRecord)
-    total = query.count()
-    items = query.order_by(models.BackupRecord.created_at.desc()).offset(
-        (page - 1) * page_size
-    ).limit(page_size).all()
+    try:
+        items, pagination = paginate(query, BACKUP_PAGINATOR, cursor, page, page_size, with_total=with_total)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
     return {
         "items": [{
@@ -545,12 +528,7 @@ async def get_backup_history(
             "size": item.size,
             "created_at": item.created_at
         } for item in items],
-        "pagination": {
-            "page": page,
-            "page_size": page_size,
-            "total": total,
-            "total_pages": (total + page_size - 1) // page_size
-        }
+        "pagination": pagination
     }
 
 
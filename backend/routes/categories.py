@@ -5,13 +5,15 @@
 from typing import List, Optional
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 import models
-from database import get_db
+from database import get_db, get_read_db
+from cache import invalidate_category_posts_cache, invalidate_categories_cache
+from conditional import check_not_modified
 from routes.posts import get_current_user
 
 router = APIRouter(prefix="/categories", tags=["分类管理"])
@@ -62,10 +64,16 @@ class CategoryResponse(BaseModel):
 
 @router.get("", response_model=List[CategoryResponse], summary="获取分类列表")
 def get_categories(
+    request: Request,
+    response: Response,
     enabled_only: bool = False,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """获取所有分类列表"""
+    """获取所有分类列表（支持条件请求，文章数随文章变化）"""
+    not_modified = check_not_modified(request, response, "categories", "posts")
+    if not_modified:
+        return not_modified
+
     query = db.query(models.Category)
     if enabled_only:
         query = query.filter(models.Category.enabled == True)
@@ -95,7 +103,7 @@ def get_categories(
 
 
 @router.get("/{category_id}", response_model=CategoryResponse, summary="获取单个分类")
-def get_category(category_id: str, db: Session = Depends(get_db)):
+def get_category(category_id: str, db: Session = Depends(get_read_db)):
     """根据ID获取分类详情"""
     category = db.query(models.Category).filter(models.Category.id == category_id).first()
     if not category:
@@ -154,6 +162,7 @@ def create_category(
     db.add(db_category)
     db.commit()
     db.refresh(db_category)
+    invalidate_categories_cache()
 
     return {"message": "分类创建成功", "id": db_category.id}
 
@@ -196,6 +205,9 @@ def update_category(
         setattr(db_category, key, value)
 
     db.commit()
+    # 文章缓存中包含分类名称
+    invalidate_category_posts_cache(category_id)
+    invalidate_categories_cache()
     return {"message": "分类更新成功"}
 
 
@@ -224,4 +236,5 @@ def delete_category(
 
     db.delete(db_category)
     db.commit()
+    invalidate_categories_cache()
     return {"message": "分类删除成功"}
@@ -12,6 +12,7 @@ from sqlalchemy import func, extract
 
 import models
 from database import get_db
+from post_queries import with_post_relations
 
 router = APIRouter(prefix="/dashboard", tags=["仪表盘"])
 
@@ -58,7 +59,7 @@ def get_dashboard_stats(db: Session = Depends(get_db)) -> Dict[str, Any]:
     ).scalar()
 
     # 最近发布的5篇文章
-    latest_posts = db.query(models.Post).filter(
+    latest_posts = with_post_relations(db.query(models.Post), tags=False).filter(
         models.Post.is_draft == 0
     ).order_by(models.Post.published_at.desc()).limit(5).all()
 
@@ -10,7 +10,7 @@ from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 import models
-from database import get_db
+from database import get_db, get_read_db
 from routes.posts import get_current_user
 
 router = APIRouter(prefix="/friends", tags=["友情链接"])
@@ -62,7 +62,7 @@ class FriendLinkResponse(BaseModel):
 @router.get("", response_model=List[FriendLinkResponse], summary="获取友链列表")
 def get_friend_links(
     enabled_only: bool = False,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """获取所有友情链接列表"""
     query = db.query(models.FriendLink)
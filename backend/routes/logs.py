@@ -3,62 +3,24 @@
 提供访问日志的查询和管理 API 接口
 """
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 import models
-from database import get_db, settings
-from fastapi import APIRouter, Depends, HTTPException, status, Header, Query
-from jose import JWTError, jwt
+from auth import get_current_user
+from database import get_db
+from pagination import InvalidCursorError, KeysetPaginator, paginate
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
 
 # 创建路由器
 router = APIRouter(prefix="/logs", tags=["访问日志"])
 
-
-# ============== 认证依赖 ==============
-
-async def get_current_user(
-    authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
-):
-    """验证 JWT Token 并获取当前用户"""
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="未提供有效的认证信息",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-    token = authorization.split(" ")[1]
-
-    try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="无效的认证令牌"
-            )
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="认证令牌已过期或无效"
-        )
-
-    user = db.query(models.Admin).filter(models.Admin.username == username).first()
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="用户不存在"
-        )
-
-    return user
+# 日志列表按时间倒序，id 保证顺序稳定
+LOG_PAGINATOR = KeysetPaginator("logs", [
+    (models.AccessLog.created_at, True),
+    (models.AccessLog.id, True)
+])
 
 
 # ============== 响应模型 ==============
@@ -90,14 +52,22 @@ class LogStatsResponse(BaseModel):
     today_logs: int
 
 
+class LogCursorPageResponse(BaseModel):
+    """日志游标分页响应模型"""
+    items: List[LogResponse]
+    pagination: Dict[str, Any]
+
+
 # ============== API 端点 ==============
 
-@router.get("", response_model=List[LogResponse], summary="获取日志列表")
+@router.get("", response_model=Union[List[LogResponse], LogCursorPageResponse], summary="获取日志列表")
 async def get_logs(
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
     log_type: Optional[str] = Query(None, description="日志类型筛选"),
     username: Optional[str] = Query(None, description="用户名筛选"),
+    cursor: Optional[str] = Query(None, description="游标分页：第一页传空字符串，之后传 next_cursor"),
+    with_total: bool = Query(False, description="游标分页时是否返回总数"),
     db: Session = Depends(get_db),
     current_user: models.Admin = Depends(get_current_user)
 ):
@@ -106,6 +76,7 @@ async def get_logs(
 
     - 自动清理 30 天前的日志
     - 支持按日志类型和用户名筛选
+    - 提供 cursor 时使用游标分页，返回 {items, pagination}
     """
     # 自动清理 30 天前的日志
     cleanup_date = datetime.utcnow() - timedelta(days=30)
@@ -123,21 +94,21 @@ async def get_logs(
     if username:
         query = query.filter(models.AccessLog.username.like(f"%{username}%"))
 
-    # 按时间倒序排列
-    query = query.order_by(desc(models.AccessLog.created_at))
+    # 按时间倒序分页
+    try:
+        logs, pagination = paginate(
+            query, LOG_PAGINATOR, cursor, page, page_size,
+            with_total=with_total, count_key=f"logs:{log_type}:{username}"
+        )
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
 
-    # 分页
-    total = query.count()
-    logs = query.offset((page - 1) * page_size).limit(page_size).all()
+    if cursor is not None:
+        return {"items": logs, "pagination": pagination}
 
     # 添加分页信息到第一条记录
     if logs:
-        logs[0]._pagination = {
-            "total": total,
-            "page": page,
-            "page_size": page_size,
-            "total_pages": (total + page_size - 1) // page_size
-        }
+        logs[0]._pagination = pagination
 
     return logs
 
@@ -3,80 +3,72 @@
 提供文章的增删改查 API 接口（含置顶功能）
 """
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union
 import json
+import threading
 
 import models
 import auth
+from autosave import AUTOSAVE_TOMBSTONE, autosave_buffer, write_autosave_tombstone
 from media_usage import sync_post_media, refresh_media_usage_counts
-from database import get_db, settings
-from cache import posts_cache, make_cache_key, invalidate_posts_cache
-from fastapi import APIRouter, Depends, HTTPException, status, Header
-from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from auth import get_current_user
+from database import get_db, get_read_db
+from cache import (
+    posts_cache,
+    make_cache_key,
+    get_cache_ttl,
+    invalidate_post_cache,
+    invalidate_post_lists_cache,
+    invalidate_posts_by_ids,
+    POSTS_LIST_TAG,
+    post_cache_tag,
+    category_cache_tag,
+    tag_cache_tag
+)
+from conditional import check_not_modified
+from pagination import InvalidCursorError, KeysetPaginator, cached_count, cursor_pagination, paginate
+from post_queries import (
+    POST_LIST_VIEWS,
+    build_post_list_query,
+    fetch_post_cursor_page,
+    fetch_post_page,
+    resolve_post_fields,
+    with_post_detail
+)
+from revisions import RevisionChainError, build_revision, detach_revision, revision_text
+from scheduler import publish_scheduler
+from taxonomy import get_tags_by_name, resolve_category, resolve_tags
+from trash import purge_posts, purge_trash
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from pydantic import BaseModel, Field
+from sqlalchemy import and_, case, distinct, func
 from sqlalchemy.orm import Session
 
 # 创建路由器
 router = APIRouter(prefix="/posts", tags=["文章管理"])
 
-# OAuth2 密码模式
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 VALID_STATUSES = {"draft", "published", "scheduled"}
 
+# 批量操作：操作类型 -> 说明
+BULK_ACTIONS = {
+    "delete": "移入回收站",
+    "purge": "永久删除",
+    "restore": "从回收站恢复",
+    "pin": "置顶",
+    "unpin": "取消置顶",
+    "publish": "发布",
+    "draft": "转为草稿",
+    "move_category": "移动分类",
+    "add_tags": "添加标签",
+    "remove_tags": "移除标签"
+}
 
-# ============== 认证依赖 ==============
 
-async def get_current_user(
-        authorization: Optional[str] = Header(None),
-        db: Session = Depends(get_db)
-):
-    """
-    验证 JWT Token 并获取当前用户
-
-    Args:
-        authorization: HTTP Authorization 请求头
-        db: 数据库会话
-
-    Returns:
-        Admin: 当前登录的管理员对象
-
-    Raises:
-        HTTPException: 认证失败时抛出 401 错误
-    """
-    # 检查 Authorization 头
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="未提供有效的认证信息",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-    # 提取 token
-    token = authorization.split(" ")[1]
-
-    try:
-        # 解码 JWT
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(status_code=401, detail="无效的认证信息")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="认证信息已过期或无效")
-
-    # 查询用户
-    user = db.query(models.Admin).filter(
-        models.Admin.username == username
-    ).first()
-
-    if user is None:
-        raise HTTPException(status_code=401, detail="用户不存在")
-
-    return user
+# 定时发布队列按计划时间升序，id 保证顺序稳定
+SCHEDULED_QUEUE_PAGINATOR = KeysetPaginator("scheduled_queue", [
+    (models.Post.scheduled_at, False),
+    (models.Post.id, False)
+])
 
 
 def normalize_status(requested_status: Optional[str], is_draft: bool) -> str:
@@ -100,41 +92,13 @@ def normalize_datetime(value: Optional[datetime]) -> Optional[datetime]:
     return value
 
 
-def process_scheduled_posts(db: Session) -> None:
-    """检查定时文章并在到点后自动发布"""
-    now = datetime.utcnow()
-    scheduled_posts = db.query(models.Post).filter(
-        models.Post.status == "scheduled",
-        models.Post.scheduled_at != None,
-        models.Post.scheduled_at <= now
-    ).all()
-
-    if not scheduled_posts:
-        return
-
-    for post in scheduled_posts:
-        scheduled_time = post.scheduled_at
-        try:
-            post.status = "published"
-            post.is_draft = 0
-            post.published_at = scheduled_time or now
-            post.scheduled_at = None
-            db.add(models.ScheduledPublishLog(
-                post_id=post.id,
-                status="success",
-                message="发布成功",
-                scheduled_at=scheduled_time
-            ))
-            db.commit()
-        except Exception as exc:
-            db.rollback()
-            db.add(models.ScheduledPublishLog(
-                post_id=post.id,
-                status="failed",
-                message=str(exc)[:500],
-                scheduled_at=scheduled_time
-            ))
-            db.commit()
+def resolve_post_taxonomy(db: Session, post: "PostBase") -> Tuple[models.Category, List[models.Tag]]:
+    """获取或创建文章的分类和标签（不提交事务），名称无法写入时返回 400"""
+    try:
+        return resolve_category(db, post.category_name), resolve_tags(db, post.tags)
+    except ValueError as exc:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"分类或标签{exc}")
 
 
 def create_revision_snapshot(
@@ -142,19 +106,141 @@ def create_revision_snapshot(
     post_obj: models.Post,
     editor: Optional[models.Admin]
 ) -> None:
-    """保存文章历史版本"""
+    """保存文章历史版本（以上一版本为基准压缩存储，见 revisions.py）"""
     if not post_obj:
         return
-    revision = models.PostRevision(
-        post_id=post_obj.id,
-        title=post_obj.title,
-        slug=post_obj.slug,
-        description=post_obj.description,
-        content=post_obj.content,
-        editor=getattr(editor, "username", None)
-    )
-    db.add(revision)
+    db.add(build_revision(db, post_obj, getattr(editor, "username", None)))
     db.commit()
+    save_work_stats.record("revisions_created")
+
+
+def post_hashes(post_obj: models.Post) -> Tuple[str, str]:
+    """文章的 (内容哈希, 媒体哈希)，旧数据未保存哈希时按当前字段计算"""
+    content_hash = post_obj.content_hash or models.post_content_hash(
+        *(getattr(post_obj, field) for field in models.POST_CONTENT_FIELDS)
+    )
+    media_hash = post_obj.media_hash or models.post_media_hash(
+        *(getattr(post_obj, field) for field in models.POST_MEDIA_FIELDS)
+    )
+    return content_hash, media_hash
+
+
+class SaveWorkStats:
+    """保存文章时执行与跳过的版本快照、媒体引用同步次数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {
+            "revisions_created": 0,
+            "revisions_skipped": 0,
+            "media_syncs": 0,
+            "media_syncs_skipped": 0
+        }
+
+    def record(self, key: str) -> None:
+        with self._lock:
+            self.counts[key] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counts)
+
+
+# 全局保存统计
+save_work_stats = SaveWorkStats()
+
+
+def build_post_cache_tags(post_obj: models.Post) -> List[str]:
+    """计算文章缓存依赖的标签（文章本身、所属分类、关联标签）"""
+    tags = [post_cache_tag(post_obj.id)]
+    if post_obj.category_id:
+        tags.append(category_cache_tag(post_obj.category_id))
+    tags.extend(tag_cache_tag(t.id) for t in post_obj.tags)
+    return tags
+
+
+def apply_pending_autosaves(items: List[dict]) -> List[dict]:
+    """
+    补全 autosave_available：数据库中有自动保存，或共享缓冲中有尚未写入的自动保存
+
+    列表与详情共用这一规则；缓冲查询对整页只执行一次。
+    """
+    candidates = [item["id"] for item in items if item.get("autosave_available") is False]
+    if candidates:
+        pending = autosave_buffer.pending_ids(candidates)
+        for item in items:
+            if item["id"] in pending:
+                item["autosave_available"] = True
+    return items
+
+
+def clear_post_autosave(db: Session, post_id: str) -> bool:
+    """
+    清除文章的自动保存（共享缓冲与数据库），不提交事务
+
+    存在自动保存时写入清除标记，其他 worker 之后写入的更早的自动保存会被忽略。
+
+    Returns:
+        清除前是否存在自动保存（autosave_available 是否发生变化）
+    """
+    buffered = autosave_buffer.take(post_id)
+    stored = db.query(models.PostAutosave.post_id).filter(
+        models.PostAutosave.post_id == post_id,
+        models.PostAutosave.data != AUTOSAVE_TOMBSTONE
+    ).first()
+    if buffered is None and stored is None:
+        return False
+    write_autosave_tombstone(db, post_id)
+    return True
+
+
+def serialize_post_detail(p: models.Post) -> dict:
+    """文章详情响应数据"""
+    return apply_pending_autosaves([{
+        "id": p.id,
+        "title": p.title,
+        "slug": p.slug,
+        "description": p.description,
+        "content": p.content,
+        "image": p.image,
+        "published_at": p.published_at,
+        "category": p.category.name if p.category else None,
+        "tags": [t.name for t in p.tags],
+        "is_draft": p.is_draft == 1,
+        "pinned": p.pinned or False,
+        "pin_order": p.pin_order or 0,
+        "password": p.password,
+        "status": p.status or ("draft" if p.is_draft else "published"),
+        "scheduled_at": p.scheduled_at,
+        "autosave_available": bool(p.has_autosave)
+    }])[0]
+
+
+# 文章列表字段的取值方式（字段与所需的列见 post_queries.POST_LIST_FIELDS）
+POST_LIST_SERIALIZERS = {
+    "id": lambda p: p.id,
+    "title": lambda p: p.title,
+    "slug": lambda p: p.slug,
+    "description": lambda p: p.description,
+    "content": lambda p: p.content,
+    "image": lambda p: p.image,
+    "published_at": lambda p: p.published_at,
+    "category": lambda p: p.category.name if p.category else None,
+    "tags": lambda p: [t.name for t in p.tags],
+    "is_draft": lambda p: p.is_draft == 1,
+    "pinned": lambda p: p.pinned or False,
+    "pin_order": lambda p: p.pin_order or 0,
+    "has_password": lambda p: bool(p.has_password),
+    "status": lambda p: p.status or ("draft" if p.is_draft else "published"),
+    "scheduled_at": lambda p: p.scheduled_at,
+    "autosave_available": lambda p: bool(p.has_autosave),
+    "deleted_at": lambda p: p.deleted_at
+}
+
+
+def post_sort_key(post_obj: models.Post) -> tuple:
+    """文章列表排序相关字段，变化时需要清除所有列表缓存"""
+    return (bool(post_obj.pinned), post_obj.pin_order or 0, post_obj.published_at)
 
 
 # ============== 数据模型 ==============
@@ -225,6 +311,14 @@ class PostAutosaveRequest(BaseModel):
     pin_order: Optional[int] = Field(default=0, description="置顶排序")
 
 
+class PostBulkRequest(BaseModel):
+    """文章批量操作请求模型"""
+    ids: List[str] = Field(..., min_length=1, max_length=500, description="文章 ID 列表")
+    action: str = Field(..., description="操作类型，见 BULK_ACTIONS")
+    category_name: Optional[str] = Field(default=None, description="目标分类名称（move_category）")
+    tags: List[str] = Field(default=[], description="标签名称（add_tags / remove_tags）")
+
+
 class AutosaveResponse(BaseModel):
     """自动保存响应模型"""
     saved_at: Optional[datetime]
@@ -242,88 +336,156 @@ class RevisionResponse(BaseModel):
 
 # ============== API 接口 ==============
 
-@router.get("", response_model=List[dict], summary="获取文章列表")
+@router.get("", response_model=Union[List[dict], dict], summary="获取文章列表")
 def get_posts(
+    request: Request,
+    response: Response,
     page: int = 1,
     page_size: int = 10,
     all: bool = False,
     include_deleted: bool = False,
-    db: Session = Depends(get_db)
+    view: str = "full",
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    read_db: Session = Depends(get_read_db)
 ):
     """
     获取所有文章列表
 
     公开接口，无需认证。返回文章基本信息，不包含密码等敏感字段。
     文章按置顶优先、置顶排序、发布时间倒序排列。
+    支持 ETag / Last-Modified 条件请求，内容未变化时返回 304。
 
     Args:
         page: 页码，从1开始，默认为1
         page_size: 每页数量，默认为10
         all: 是否返回全部文章（不分页），默认为False
         include_deleted: 是否包含已删除的文章，默认为False
+        view: 列表视图，full 为完整字段（默认），summary 不返回正文
+        fields: 逗号分隔的返回字段（如 "title,slug,published_at"），优先于 view；
+            只查询这些字段需要的列
+        cursor: 游标分页，第一页传空字符串，之后传上一页返回的 next_cursor；
+            提供时忽略 page / all
+        with_total: 游标分页时是否返回总数（总数随列表缓存）
 
     Returns:
-        List[dict]: 文章列表，包含分页信息
+        偏移分页：List[dict]，每篇文章包含 _pagination；
+        游标分页：{"items": [...], "pagination": {page_size, next_cursor, has_more, total}}
     """
-    # 自动发布已到时间的定时文章
-    process_scheduled_posts(db)
-
-    # 按置顶优先、置顶排序（数字小的在前）、发布时间倒序排列
-    query = db.query(models.Post)
+    try:
+        list_fields = resolve_post_fields(fields, view)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    not_modified = check_not_modified(request, response, "posts")
+    if not_modified:
+        return not_modified
+
+    cache_tags = [POSTS_LIST_TAG]
+    if cursor is not None:
+        cache_key = f"cursor:{make_cache_key(cursor, page_size, include_deleted, list_fields, with_total)}"
+
+        def load_posts():
+            try:
+                return query_posts_cursor_page(
+                    read_db, cursor, page_size, include_deleted, cache_tags, list_fields, with_total
+                )
+            except InvalidCursorError as exc:
+                raise HTTPException(status_code=400, detail=str(exc))
+    else:
+        cache_key = f"list:{make_cache_key(page, page_size, all, include_deleted, list_fields)}"
 
-    # 默认不包含已删除的文章
-    if not include_deleted:
-        query = query.filter(models.Post.deleted_at == None)
+        def load_posts():
+            return query_posts_page(read_db, page, page_size, all, include_deleted, cache_tags, list_fields)
 
-    query = query.order_by(
-        models.Post.pinned.desc(),
-        models.Post.pin_order.asc(),
-        models.Post.published_at.desc()
+    # 并发未命中时只查询一次数据库
+    return posts_cache.get_or_load(
+        cache_key, load_posts, get_cache_ttl("posts"), tags=lambda _: cache_tags
     )
 
-    # 获取总数
-    total = query.count()
 
-    # 如果不是获取全部，则分页
-    if not all:
-        offset = (page - 1) * page_size
-        query = query.offset(offset).limit(page_size)
+def query_posts_page(
+    db: Session,
+    page: int,
+    page_size: int,
+    all: bool,
+    include_deleted: bool,
+    cache_tags: List[str],
+    fields: Optional[Tuple[str, ...]] = None
+) -> List[dict]:
+    """
+    查询文章列表，并把结果依赖的缓存标签追加到 cache_tags
 
-    posts = query.all()
+    fields 为 resolve_post_fields 的结果，默认返回完整字段；
+    只查询所需的列，密码和自动保存内容只以 SQL 计算的标志位参与查询
+    """
+    fields = fields or POST_LIST_VIEWS["full"]
+    # 默认不包含已删除的文章；分类和标签随列表一次性预加载
+    query = build_post_list_query(db, include_deleted=include_deleted)
+    posts, total = fetch_post_page(query, page, page_size, all, fields=fields)
+
+    pagination = {
+        "page": page if not all else 1,
+        "page_size": page_size if not all else total,
+        "total": total,
+        "total_pages": (total + page_size - 1) // page_size if not all else 1
+    }
+    result = []
+    for p in posts:
+        item = {field: POST_LIST_SERIALIZERS[field](p) for field in fields}
+        item["_pagination"] = dict(pagination)
+        result.append(item)
+    apply_pending_autosaves(result)
 
-    return [{
-        "id": p.id,
-        "title": p.title,
-        "slug": p.slug,
-        "description": p.description,
-        "content": p.content,
-        "image": p.image,
-        "published_at": p.published_at,
-        "category": p.category.name if p.category else None,
-        "tags": [t.name for t in p.tags],
-        "is_draft": p.is_draft == 1,
-        "pinned": p.pinned or False,
-        "pin_order": p.pin_order or 0,
-        "has_password": p.password is not None and p.password != "",
-        "status": p.status or ("draft" if p.is_draft else "published"),
-        "scheduled_at": p.scheduled_at,
-        "autosave_available": bool(p.autosave_data),
-        "deleted_at": p.deleted_at,
-        "_pagination": {
-            "page": page if not all else 1,
-            "page_size": page_size if not all else total,
-            "total": total,
-            "total_pages": (total + page_size - 1) // page_size if not all else 1
-        }
-    } for p in posts]
+    for p in posts:
+        cache_tags.extend(build_post_cache_tags(p))
+    return result
+
+
+def query_posts_cursor_page(
+    db: Session,
+    cursor: str,
+    page_size: int,
+    include_deleted: bool,
+    cache_tags: List[str],
+    fields: Tuple[str, ...],
+    with_total: bool = False
+) -> dict:
+    """
+    游标分页查询文章列表，并把结果依赖的缓存标签追加到 cache_tags
+
+    Raises:
+        InvalidCursorError: 游标无效
+    """
+    query = build_post_list_query(db, include_deleted=include_deleted)
+    total = None
+    if with_total:
+        total = cached_count(
+            query, f"posts:{include_deleted}", cache=posts_cache,
+            ttl=get_cache_ttl("posts"), tags=[POSTS_LIST_TAG]
+        )
+    posts, next_cursor = fetch_post_cursor_page(query, cursor, page_size, fields=fields)
+
+    for p in posts:
+        cache_tags.extend(build_post_cache_tags(p))
+    return {
+        "items": apply_pending_autosaves([{field: POST_LIST_SERIALIZERS[field](p) for field in fields} for p in posts]),
+        "pagination": cursor_pagination(page_size, next_cursor, total)
+    }
 
 
 @router.get("/{post_id}", response_model=dict, summary="获取单篇文章")
-def get_post(post_id: str, db: Session = Depends(get_db)):
+def get_post(
+    post_id: str,
+    request: Request,
+    response: Response,
+    read_db: Session = Depends(get_read_db)
+):
     """
     根据 ID 获取单篇文章详情
 
-    公开接口，无需认证。
+    公开接口，无需认证。支持条件请求。
 
     Args:
         post_id: 文章 UUID
@@ -334,37 +496,35 @@ def get_post(post_id: str, db: Session = Depends(get_db)):
     Raises:
         HTTPException: 文章不存在时返回 404
     """
-    process_scheduled_posts(db)
-    p = db.query(models.Post).filter(models.Post.id == post_id).first()
-    if not p:
-        raise HTTPException(status_code=404, detail="文章不存在")
+    not_modified = check_not_modified(request, response, "posts")
+    if not_modified:
+        return not_modified
 
-    return {
-        "id": p.id,
-        "title": p.title,
-        "slug": p.slug,
-        "description": p.description,
-        "content": p.content,
-        "image": p.image,
-        "published_at": p.published_at,
-        "category": p.category.name if p.category else None,
-        "tags": [t.name for t in p.tags],
-        "is_draft": p.is_draft == 1,
-        "pinned": p.pinned or False,
-        "pin_order": p.pin_order or 0,
-        "password": p.password,
-        "status": p.status or ("draft" if p.is_draft else "published"),
-        "scheduled_at": p.scheduled_at,
-        "autosave_available": bool(p.autosave_data)
-    }
+    cache_tags: List[str] = []
+
+    def load_post():
+        p = with_post_detail(read_db.query(models.Post)).filter(models.Post.id == post_id).first()
+        if not p:
+            raise HTTPException(status_code=404, detail="文章不存在")
+        cache_tags.extend(build_post_cache_tags(p))
+        return serialize_post_detail(p)
+
+    return posts_cache.get_or_load(
+        f"id:{post_id}", load_post, get_cache_ttl("posts"), tags=lambda _: cache_tags
+    )
 
 
 @router.get("/slug/{slug}", response_model=dict, summary="通过 Slug 获取文章")
-def get_post_by_slug(slug: str, db: Session = Depends(get_db)):
+def get_post_by_slug(
+    slug: str,
+    request: Request,
+    response: Response,
+    read_db: Session = Depends(get_read_db)
+):
     """
     根据 Slug 获取单篇文章详情
 
-    公开接口，无需认证。
+    公开接口，无需认证。支持条件请求。
 
     Args:
         slug: 文章 URL 别名
@@ -375,29 +535,22 @@ def get_post_by_slug(slug: str, db: Session = Depends(get_db)):
     Raises:
         HTTPException: 文章不存在时返回 404
     """
-    process_scheduled_posts(db)
-    p = db.query(models.Post).filter(models.Post.slug == slug).first()
-    if not p:
-        raise HTTPException(status_code=404, detail="文章不存在")
+    not_modified = check_not_modified(request, response, "posts")
+    if not_modified:
+        return not_modified
 
-    return {
-        "id": p.id,
-        "title": p.title,
-        "slug": p.slug,
-        "description": p.description,
-        "content": p.content,
-        "image": p.image,
-        "published_at": p.published_at,
-        "category": p.category.name if p.category else None,
-        "tags": [t.name for t in p.tags],
-        "is_draft": p.is_draft == 1,
-        "pinned": p.pinned or False,
-        "pin_order": p.pin_order or 0,
-        "password": p.password,
-        "status": p.status or ("draft" if p.is_draft else "published"),
-        "scheduled_at": p.scheduled_at,
-        "autosave_available": bool(p.autosave_data)
-    }
+    cache_tags: List[str] = []
+
+    def load_post():
+        p = with_post_detail(read_db.query(models.Post)).filter(models.Post.slug == slug).first()
+        if not p:
+            raise HTTPException(status_code=404, detail="文章不存在")
+        cache_tags.extend(build_post_cache_tags(p))
+        return serialize_post_detail(p)
+
+    return posts_cache.get_or_load(
+        f"slug:{slug}", load_post, get_cache_ttl("posts"), tags=lambda _: cache_tags
+    )
 
 
 @router.post("", status_code=status.HTTP_201_CREATED, summary="创建文章")
@@ -417,17 +570,6 @@ def create_post(
     Returns:
         dict: 包含成功消息和新文章 ID
     """
-    # 获取或创建分类
-    db_category = db.query(models.Category).filter(
-        models.Category.name == post.category_name
-    ).first()
-
-    if not db_category:
-        db_category = models.Category(name=post.category_name)
-        db.add(db_category)
-        db.commit()
-        db.refresh(db_category)
-
     status = normalize_status(post.status, post.is_draft)
     scheduled_at = normalize_datetime(post.scheduled_at)
     published_at = normalize_datetime(post.published_at)
@@ -449,6 +591,9 @@ def create_post(
     # 如果设置了密码，进行哈希处理
     hashed_password = auth.get_password_hash(post.password) if post.password else None
 
+    # 获取或创建分类和标签（批量查询，与文章在同一事务中提交）
+    db_category, db_tags = resolve_post_taxonomy(db, post)
+
     db_post = models.Post(
         title=post.title,
         slug=post.slug,
@@ -462,30 +607,20 @@ def create_post(
         scheduled_at=scheduled_at,
         published_at=published_at,
         pinned=post.pinned,
-        pin_order=post.pin_order
+        pin_order=post.pin_order,
+        tags=db_tags
     )
 
-    # 处理标签
-    for tag_name in post.tags:
-        db_tag = db.query(models.Tag).filter(
-            models.Tag.name == tag_name
-        ).first()
-
-        if not db_tag:
-            db_tag = models.Tag(name=tag_name)
-            db.add(db_tag)
-            db.commit()
-            db.refresh(db_tag)
-
-        db_post.tags.append(db_tag)
-
     # 保存文章
     db.add(db_post)
     db.commit()
     db.refresh(db_post)
     create_revision_snapshot(db, db_post, current_user)
     sync_post_media(db, db_post.id, db_post.content, db_post.image)
-    invalidate_posts_cache()
+    save_work_stats.record("media_syncs")
+    invalidate_post_lists_cache()
+    if db_post.status == "scheduled":
+        publish_scheduler.schedule(db_post.id, db_post.scheduled_at)
 
     return {"message": "文章创建成功", "id": db_post.id}
 
@@ -517,17 +652,6 @@ def update_post(
     if not db_post:
         raise HTTPException(status_code=404, detail="文章不存在")
 
-    # 获取或创建分类
-    db_category = db.query(models.Category).filter(
-        models.Category.name == post.category_name
-    ).first()
-
-    if not db_category:
-        db_category = models.Category(name=post.category_name)
-        db.add(db_category)
-        db.commit()
-        db.refresh(db_category)
-
     status = normalize_status(post.status, post.is_draft)
     scheduled_at = normalize_datetime(post.scheduled_at)
     published_at = normalize_datetime(post.published_at)
@@ -535,6 +659,12 @@ def update_post(
     if status == "scheduled" and not scheduled_at:
         raise HTTPException(status_code=400, detail="定时发布必须设置发布时间")
 
+    old_sort_key = post_sort_key(db_post)
+    old_content_hash, old_media_hash = post_hashes(db_post)
+
+    # 获取或创建分类和标签（批量查询，与文章在同一事务中提交）
+    db_category, db_tags = resolve_post_taxonomy(db, post)
+
     if status == "published" and not published_at:
         published_at = datetime.utcnow()
     elif status == "scheduled" and not published_at:
@@ -563,25 +693,28 @@ def update_post(
     elif db_post.published_at is None:
         db_post.published_at = datetime.utcnow()
 
-    # 更新标签（先清空再添加）
-    db_post.tags = []
-    for tag_name in post.tags:
-        db_tag = db.query(models.Tag).filter(
-            models.Tag.name == tag_name
-        ).first()
+    # 更新标签
+    db_post.tags = db_tags
 
-        if not db_tag:
-            db_tag = models.Tag(name=tag_name)
-            db.add(db_tag)
-            db.commit()
-            db.refresh(db_tag)
-
-        db_post.tags.append(db_tag)
+    # 显式保存取代此前的自动保存（包括其他 worker 缓冲中尚未写入的）
+    clear_post_autosave(db, post_id)
 
     db.commit()
-    create_revision_snapshot(db, db_post, current_user)
-    sync_post_media(db, db_post.id, db_post.content, db_post.image)
-    invalidate_posts_cache()
+    # 标题、摘要、正文等未变化时不保存版本快照；正文和封面未变化时不同步媒体引用
+    content_hash, media_hash = post_hashes(db_post)
+    if content_hash != old_content_hash:
+        create_revision_snapshot(db, db_post, current_user)
+    else:
+        save_work_stats.record("revisions_skipped")
+    if media_hash != old_media_hash:
+        sync_post_media(db, db_post.id, db_post.content, db_post.image)
+        save_work_stats.record("media_syncs")
+    else:
+        save_work_stats.record("media_syncs_skipped")
+    # 排序字段未变化时，只需清除包含该文章的缓存
+    invalidate_post_cache(post_id, include_lists=post_sort_key(db_post) != old_sort_key)
+    if db_post.status == "scheduled":
+        publish_scheduler.schedule(db_post.id, db_post.scheduled_at)
     return {"message": "文章更新成功"}
 
 
@@ -613,69 +746,203 @@ def delete_post(
         raise HTTPException(status_code=404, detail="文章不存在")
 
     if permanent:
-        # 永久删除
-        media_ids = [media.id for media in db_post.media_files]
-        db.query(models.PostMedia).filter(
-            models.PostMedia.post_id == post_id
-        ).delete(synchronize_session=False)
-        db.delete(db_post)
+        # 永久删除（集合删除子表记录）
+        media_ids = purge_posts(db, [post_id])
         db.commit()
         refresh_media_usage_counts(db, media_ids)
         db.commit()
-        invalidate_posts_cache()
+        invalidate_post_cache(post_id)
         return {"message": "文章已永久删除"}
     else:
         # 软删除
         db_post.deleted_at = datetime.utcnow()
         db.commit()
-        invalidate_posts_cache()
+        invalidate_post_cache(post_id)
         return {"message": "文章已移入回收站"}
 
 
+@router.post("/bulk", summary="批量操作文章")
+def bulk_update_posts(
+        request: PostBulkRequest,
+        db: Session = Depends(get_db),
+        current_user: models.Admin = Depends(get_current_user)
+):
+    """
+    批量操作文章
+
+    需要认证。所有修改以集合 UPDATE / DELETE 在同一事务中完成，
+    最后统一刷新一次媒体引用次数并清除一次缓存。
+
+    Args:
+        request: 文章 ID 列表与操作类型（见 BULK_ACTIONS）；
+            move_category 需提供 category_name，add_tags / remove_tags 需提供 tags
+
+    Returns:
+        dict: 成功消息、实际修改的文章数与不存在的文章 ID
+    """
+    action = request.action
+    if action not in BULK_ACTIONS:
+        raise HTTPException(status_code=400, detail="无效的批量操作类型")
+    if action == "move_category" and not request.category_name:
+        raise HTTPException(status_code=400, detail="移动分类必须指定分类名称")
+    if action in ("add_tags", "remove_tags") and not any(request.tags):
+        raise HTTPException(status_code=400, detail="必须指定标签")
+
+    requested_ids = list(dict.fromkeys(request.ids))
+    post_ids = [post_id for (post_id,) in db.query(models.Post.id).filter(
+        models.Post.id.in_(requested_ids)
+    )]
+    found = set(post_ids)
+    not_found = [post_id for post_id in requested_ids if post_id not in found]
+
+    now = datetime.utcnow()
+    query = db.query(models.Post).filter(models.Post.id.in_(post_ids))
+    media_ids: List[str] = []
+    try:
+        if not post_ids:
+            affected = 0
+        elif action == "delete":
+            affected = query.filter(models.Post.deleted_at == None).update(
+                {models.Post.deleted_at: now}, synchronize_session=False
+            )
+        elif action == "purge":
+            media_ids = purge_posts(db, post_ids)
+            affected = len(post_ids)
+        elif action == "restore":
+            affected = query.filter(models.Post.deleted_at != None).update(
+                {models.Post.deleted_at: None}, synchronize_session=False
+            )
+        elif action in ("pin", "unpin"):
+            affected = query.update({models.Post.pinned: action == "pin"}, synchronize_session=False)
+        elif action == "publish":
+            # 定时文章立即发布时以当前时间为发布时间
+            affected = query.filter(models.Post.status != "published").update({
+                models.Post.status: "published",
+                models.Post.is_draft: 0,
+                models.Post.scheduled_at: None,
+                models.Post.published_at: case(
+                    (models.Post.status == "scheduled", now),
+                    else_=func.coalesce(models.Post.published_at, now)
+                )
+            }, synchronize_session=False)
+        elif action == "draft":
+            affected = query.filter(models.Post.status != "draft").update({
+                models.Post.status: "draft",
+                models.Post.is_draft: 1,
+                models.Post.scheduled_at: None
+            }, synchronize_session=False)
+        elif action == "move_category":
+            category = resolve_category(db, request.category_name)
+            affected = query.update({models.Post.category_id: category.id}, synchronize_session=False)
+        elif action == "add_tags":
+            tag_ids = [tag.id for tag in resolve_tags(db, request.tags)]
+            existing = set(db.query(models.post_tags.c.post_id, models.post_tags.c.tag_id).filter(
+                models.post_tags.c.post_id.in_(post_ids),
+                models.post_tags.c.tag_id.in_(tag_ids)
+            ).all())
+            rows = [
+                {"post_id": post_id, "tag_id": tag_id}
+                for post_id in post_ids for tag_id in tag_ids
+                if (post_id, tag_id) not in existing
+            ]
+            if rows:
+                db.execute(models.post_tags.insert(), rows)
+            affected = len({row["post_id"] for row in rows})
+        else:
+            tag_ids = [tag.id for tag in get_tags_by_name(db, request.tags).values()]
+            affected = 0
+            if tag_ids:
+                condition = and_(
+                    models.post_tags.c.post_id.in_(post_ids),
+                    models.post_tags.c.tag_id.in_(tag_ids)
+                )
+                affected = db.query(func.count(distinct(models.post_tags.c.post_id))).filter(condition).scalar()
+                db.execute(models.post_tags.delete().where(condition))
+        if media_ids:
+            refresh_media_usage_counts(db, media_ids)
+        db.commit()
+    except ValueError as exc:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"分类或标签{exc}")
+    except Exception:
+        db.rollback()
+        raise
+
+    invalidate_posts_by_ids(post_ids)
+    return {
+        "message": f"已{BULK_ACTIONS[action]} {affected} 篇文章",
+        "action": action,
+        "affected": affected,
+        "not_found": not_found
+    }
+
+
+def scheduled_attempt_summaries(db: Session, post_ids: List[str]) -> dict:
+    """
+    批量获取文章的定时发布尝试摘要
+
+    按文章分组统计次数和最近时间，再与日志表连接取回最近一条的状态和说明，
+    一条 SQL 完成，查询次数与文章数量无关。
+
+    Returns:
+        {文章ID: (尝试次数, 最近状态, 最近说明, 最近时间)}，没有日志的文章不在结果中
+    """
+    if not post_ids:
+        return {}
+    log = models.ScheduledPublishLog
+    summary = db.query(
+        log.post_id.label("post_id"),
+        func.count(log.id).label("attempts"),
+        func.max(log.created_at).label("last_at")
+    ).filter(log.post_id.in_(post_ids)).group_by(log.post_id).subquery()
+
+    rows = db.query(
+        summary.c.post_id, summary.c.attempts, log.status, log.message, log.created_at
+    ).join(
+        log, and_(log.post_id == summary.c.post_id, log.created_at == summary.c.last_at)
+    ).order_by(log.id).all()
+
+    # 同一时间有多条日志时取其中一条
+    return {post_id: (attempts, status, message, created_at) for post_id, attempts, status, message, created_at in rows}
+
+
 @router.get("/scheduled/queue", summary="获取定时发布队列")
 def get_scheduled_queue(
     page: int = 1,
     page_size: int = 10,
+    cursor: Optional[str] = None,
+    with_total: bool = False,
     db: Session = Depends(get_db),
     current_user: models.Admin = Depends(get_current_user)
 ):
-    """获取待发布的定时文章列表"""
+    """获取待发布的定时文章列表（提供 cursor 时使用游标分页，第一页传空字符串）"""
     query = db.query(models.Post).filter(
         models.Post.status == "scheduled",
         models.Post.scheduled_at != None
-    ).order_by(models.Post.scheduled_at.asc())
-
-    total = query.count()
-    posts = query.offset((page - 1) * page_size).limit(page_size).all()
+    )
+    try:
+        posts, pagination = paginate(query, SCHEDULED_QUEUE_PAGINATOR, cursor, page, page_size, with_total=with_total)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
+    summaries = scheduled_attempt_summaries(db, [post.id for post in posts])
     items = []
     for post in posts:
-        attempts = db.query(models.ScheduledPublishLog).filter(
-            models.ScheduledPublishLog.post_id == post.id
-        ).count()
-        last_log = db.query(models.ScheduledPublishLog).filter(
-            models.ScheduledPublishLog.post_id == post.id
-        ).order_by(models.ScheduledPublishLog.created_at.desc()).first()
-
+        attempts, last_status, last_message, last_attempt_at = summaries.get(post.id, (0, None, None, None))
         items.append({
             "id": post.id,
             "title": post.title,
             "slug": post.slug,
             "scheduled_at": post.scheduled_at,
-            "status": "failed" if last_log and last_log.status == "failed" else "pending",
+            "status": "failed" if last_status == "failed" else "pending",
             "attempts": attempts,
-            "last_attempt_at": last_log.created_at if last_log else None,
-            "last_error": last_log.message if last_log and last_log.status == "failed" else None
+            "last_attempt_at": last_attempt_at,
+            "last_error": last_message if last_status == "failed" else None
         })
 
     return {
         "items": items,
-        "pagination": {
-            "page": page,
-            "page_size": page_size,
-            "total": total,
-            "total_pages": (total + page_size - 1) // page_size
-        }
+        "pagination": pagination
     }
 
 
@@ -730,6 +997,8 @@ def retry_scheduled_post(
     db_post.scheduled_at = datetime.utcnow()
     db_post.is_draft = 0
     db.commit()
+    invalidate_post_cache(post_id, include_lists=False)
+    publish_scheduler.schedule(db_post.id, db_post.scheduled_at)
     return {"message": "已加入发布队列"}
 
 
@@ -760,7 +1029,7 @@ def toggle_post_pin(
     # 切换置顶状态
     db_post.pinned = not (db_post.pinned or False)
     db.commit()
-    invalidate_posts_cache()
+    invalidate_post_cache(post_id)
 
     return {
         "message": "置顶" if db_post.pinned else "取消置顶" + "成功",
@@ -796,7 +1065,7 @@ def set_post_pin(
 
     db_post.pinned = pinned
     db.commit()
-    invalidate_posts_cache()
+    invalidate_post_cache(post_id)
 
     return {
         "message": "置顶状态更新成功",
@@ -854,17 +1123,22 @@ def autosave_post(
         db: Session = Depends(get_db),
         current_user: models.Admin = Depends(get_current_user)
 ):
-    """自动保存文章草稿，避免内容丢失"""
-    db_post = db.query(models.Post).filter(models.Post.id == post_id).first()
-    if not db_post:
+    """
+    自动保存文章草稿，避免内容丢失
+
+    内容先写入本机共享缓冲，由后台任务合并写入数据库（见 autosave.py）。
+    公开数据中只有 autosave_available 标志，只在它从无到有时清除文章缓存。
+    """
+    row = db.query(models.Post.id, models.Post.has_autosave).filter(models.Post.id == post_id).first()
+    if not row:
         raise HTTPException(status_code=404, detail="文章不存在")
 
-    db_post.autosave_data = json.dumps(autosave.model_dump(), ensure_ascii=False)
-    db_post.autosave_at = datetime.utcnow()
-    db.commit()
+    saved_at, was_pending = autosave_buffer.put(post_id, json.dumps(autosave.model_dump(), ensure_ascii=False))
+    if not row.has_autosave and not was_pending:
+        invalidate_post_cache(post_id, include_lists=False, content_changed=False)
     return {
         "message": "自动保存成功",
-        "saved_at": db_post.autosave_at
+        "saved_at": saved_at
     }
 
 
@@ -874,17 +1148,23 @@ def get_autosave_post(
         db: Session = Depends(get_db),
         current_user: models.Admin = Depends(get_current_user)
 ):
-    """获取文章的自动保存内容"""
-    db_post = db.query(models.Post).filter(models.Post.id == post_id).first()
-    if not db_post:
+    """获取文章的自动保存内容（优先读取尚未写入数据库的缓冲）"""
+    exists = db.query(models.Post.id).filter(models.Post.id == post_id).first()
+    if not exists:
         raise HTTPException(status_code=404, detail="文章不存在")
 
-    if not db_post.autosave_data:
+    buffered = autosave_buffer.get(post_id)
+    if buffered is not None:
+        data, saved_at = buffered
+        return {"saved_at": saved_at, "data": json.loads(data)}
+
+    autosave = db.get(models.PostAutosave, post_id)
+    if not autosave or autosave.data == AUTOSAVE_TOMBSTONE:
         return {"saved_at": None, "data": None}
 
     return {
-        "saved_at": db_post.autosave_at,
-        "data": json.loads(db_post.autosave_data)
+        "saved_at": autosave.saved_at,
+        "data": json.loads(autosave.data)
     }
 
 
@@ -895,13 +1175,13 @@ def delete_autosave_post(
         current_user: models.Admin = Depends(get_current_user)
 ):
     """清除文章的自动保存内容"""
-    db_post = db.query(models.Post).filter(models.Post.id == post_id).first()
-    if not db_post:
+    exists = db.query(models.Post.id).filter(models.Post.id == post_id).first()
+    if not exists:
         raise HTTPException(status_code=404, detail="文章不存在")
 
-    db_post.autosave_data = None
-    db_post.autosave_at = None
-    db.commit()
+    if clear_post_autosave(db, post_id):
+        db.commit()
+        invalidate_post_cache(post_id, include_lists=False, content_changed=False)
     return {"message": "自动保存内容已清除"}
 
 
@@ -948,14 +1228,19 @@ def restore_post_revision(
     if not revision:
         raise HTTPException(status_code=404, detail="版本不存在")
 
+    try:
+        description, content = revision_text(db, revision)
+    except RevisionChainError as exc:
+        raise HTTPException(status_code=500, detail=f"版本数据损坏: {exc}")
+
     db_post.title = revision.title
     db_post.slug = revision.slug
-    db_post.description = revision.description
-    db_post.content = revision.content
-    db_post.autosave_data = None
-    db_post.autosave_at = None
+    db_post.description = description
+    db_post.content = content
+    clear_post_autosave(db, post_id)
     db.commit()
     create_revision_snapshot(db, db_post, current_user)
+    invalidate_post_cache(post_id, include_lists=False)
     return {"message": "文章已恢复到指定版本"}
 
 
@@ -978,6 +1263,11 @@ def delete_post_revision(
     if not revision:
         raise HTTPException(status_code=404, detail="版本不存在")
 
+    # 以该版本为基准的差异版本先改存为关键帧
+    try:
+        detach_revision(db, revision)
+    except RevisionChainError as exc:
+        raise HTTPException(status_code=500, detail=f"版本数据损坏: {exc}")
     db.delete(revision)
     db.commit()
     return {"message": "版本已删除"}
@@ -1006,21 +1296,9 @@ def get_trash_posts(
     Returns:
         List[dict]: 回收站文章列表
     """
-    process_scheduled_posts(db)
     # 只查询已删除的文章，按删除时间倒序排列
-    query = db.query(models.Post).filter(
-        models.Post.deleted_at != None
-    ).order_by(models.Post.deleted_at.desc())
-
-    # 获取总数
-    total = query.count()
-
-    # 如果不是获取全部，则分页
-    if not all:
-        offset = (page - 1) * page_size
-        query = query.offset(offset).limit(page_size)
-
-    posts = query.all()
+    query = build_post_list_query(db, deleted_only=True, order_by=(models.Post.deleted_at.desc(),))
+    posts, total = fetch_post_page(query, page, page_size, all)
 
     return [{
         "id": p.id,
@@ -1074,7 +1352,7 @@ def restore_post(
     # 恢复文章
     db_post.deleted_at = None
     db.commit()
-    invalidate_posts_cache()
+    invalidate_post_cache(post_id)
 
     return {"message": "文章已恢复"}
 
@@ -1092,19 +1370,7 @@ def empty_trash(
     Returns:
         dict: 成功消息，包含删除的文章数量
     """
-    # 查询所有已删除的文章
-    deleted_posts = db.query(models.Post).filter(
-        models.Post.deleted_at != None
-    ).all()
-
-    count = len(deleted_posts)
-
-    # 永久删除
-    for post in deleted_posts:
-        db.delete(post)
-
-    db.commit()
-    invalidate_posts_cache()
-
-    return {"message": f"已永久删除 {count} 篇文章"}
+    # 分块集合删除，最后统一刷新媒体引用次数（见 trash.py）
+    result = purge_trash(db)
+    return {"message": f"已永久删除 {result['posts']} 篇文章"}
 
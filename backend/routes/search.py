@@ -2,10 +2,10 @@
 搜索 API 路由
 提供文章全文搜索功能
 """
-from fastapi import APIRouter, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Query, Request
+from sqlalchemy.orm import Session, undefer
 from sqlalchemy import or_
-from database import SessionLocal
+from database import get_read_session
 import models
 import re
 
@@ -75,6 +75,7 @@ def highlight_all_matches(text: str, keyword: str) -> str:
 
 @router.get("/", summary="搜索文章")
 async def search_posts(
+    request: Request,
     q: str = Query(..., min_length=1, max_length=100, description="搜索关键词"),
     limit: int = Query(10, ge=1, le=50, description="返回结果数量限制")
 ):
@@ -92,13 +93,13 @@ async def search_posts(
     - excerpt: 带高亮的摘要/描述
     - content: 带高亮的内容片段（如果内容中匹配）
     """
-    db = SessionLocal()
+    db = get_read_session(request)
     try:
         keyword = q.strip()
 
         # 使用 LIKE 进行模糊搜索
         # 搜索标题、描述和内容
-        posts = db.query(models.Post).filter(
+        posts = db.query(models.Post).options(undefer(models.Post.content)).filter(
             models.Post.is_draft == 0,  # 只搜索已发布的文章
             models.Post.password.is_(None),  # 排除加密文章
             or_(
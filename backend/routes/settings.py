@@ -2,17 +2,19 @@
 站点设置路由模块
 提供站点设置的增删改查 API 接口
 """
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable
 from datetime import datetime
 import json
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 import models
-from database import get_db
+from database import get_db, get_read_db
 from routes.posts import get_current_user
+from cache import invalidate_cache_ttls, invalidate_settings_cache
+from conditional import check_not_modified
 
 router = APIRouter(prefix="/settings", tags=["站点设置"])
 
@@ -61,6 +63,18 @@ class SettingBatchUpdate(BaseModel):
 
 # ============== 内部工具 ==============
 
+def on_settings_changed(keys: Iterable[str]) -> None:
+    """
+    设置写入后调用
+
+    清除设置缓存（同时更新公开配置的内容版本），
+    写入的设置包含缓存配置（cache_*）时刷新缓存 TTL 快照
+    """
+    invalidate_settings_cache()
+    if any(key and key.startswith("cache_") for key in keys):
+        invalidate_cache_ttls()
+
+
 def ensure_backup_settings(db: Session) -> None:
     """确保备份设置存在"""
     defaults = [
@@ -94,16 +108,21 @@ def ensure_backup_settings(db: Session) -> None:
             created = True
     if created:
         db.commit()
+        on_settings_changed(setting["key"] for setting in defaults)
 
 
 # ============== 公开 API 接口（无需认证） ==============
 
 @router.get("/public", summary="获取公开站点配置")
-def get_public_settings(db: Session = Depends(get_db)):
+def get_public_settings(request: Request, response: Response, db: Session = Depends(get_read_db)):
     """
     获取公开的站点配置（无需认证）
-    返回格式化的配置对象，方便前端直接使用
+    返回格式化的配置对象，方便前端直接使用，支持条件请求
     """
+    not_modified = check_not_modified(request, response, "settings")
+    if not_modified:
+        return not_modified
+
     settings = db.query(models.SiteSetting).all()
 
     # 转换为键值对格式
@@ -133,11 +152,15 @@ def get_public_settings(db: Session = Depends(get_db)):
 
 
 @router.get("/public/grouped", summary="获取分组的公开站点配置")
-def get_public_settings_grouped(db: Session = Depends(get_db)):
+def get_public_settings_grouped(request: Request, response: Response, db: Session = Depends(get_read_db)):
     """
     获取按分组组织的公开站点配置（无需认证）
-    返回按 group 分组的配置对象
+    返回按 group 分组的配置对象，支持条件请求
     """
+    not_modified = check_not_modified(request, response, "settings")
+    if not_modified:
+        return not_modified
+
     settings = db.query(models.SiteSetting).order_by(
         models.SiteSetting.group,
         models.SiteSetting.sort_order.desc()
@@ -179,10 +202,14 @@ def get_public_settings_grouped(db: Session = Depends(get_db)):
 
 
 @router.get("/public/by-group/{group}", summary="获取指定分组的公开配置")
-def get_public_settings_by_group(group: str, db: Session = Depends(get_db)):
+def get_public_settings_by_group(group: str, request: Request, response: Response, db: Session = Depends(get_read_db)):
     """
-    获取指定分组的公开站点配置（无需认证）
+    获取指定分组的公开站点配置（无需认证），支持条件请求
     """
+    not_modified = check_not_modified(request, response, "settings")
+    if not_modified:
+        return not_modified
+
     settings = db.query(models.SiteSetting).filter(
         models.SiteSetting.group == group
     ).order_by(models.SiteSetting.sort_order.desc()).all()
@@ -364,6 +391,7 @@ def update_announcement_config(
             created += 1
     
     db.commit()
+    invalidate_settings_cache()
     
     return {
         "message": "公告配置更新成功",
@@ -429,6 +457,7 @@ def create_setting(
     db.add(db_setting)
     db.commit()
     db.refresh(db_setting)
+    on_settings_changed([db_setting.key])
 
     return {"message": "设置创建成功", "id": db_setting.id}
 
@@ -453,6 +482,7 @@ def update_setting_by_key(
         setattr(db_setting, k, v)
 
     db.commit()
+    on_settings_changed([key])
     return {"message": "设置更新成功"}
 
 
@@ -476,6 +506,7 @@ def update_setting(
         setattr(db_setting, key, value)
 
     db.commit()
+    on_settings_changed([db_setting.key])
     return {"message": "设置更新成功"}
 
 
@@ -512,6 +543,7 @@ def batch_update_settings(
             created_count += 1
 
     db.commit()
+    on_settings_changed(data.settings.keys())
     return {
         "message": "批量更新成功",
         "updated": updated_count,
@@ -532,8 +564,10 @@ def delete_setting(
     if not db_setting:
         raise HTTPException(status_code=404, detail="设置不存在")
 
+    setting_key = db_setting.key
     db.delete(db_setting)
     db.commit()
+    on_settings_changed([setting_key])
     return {"message": "设置删除成功"}
 
 
@@ -604,6 +638,8 @@ def init_default_settings(
             created_count += 1
 
     db.commit()
+    if created_count:
+        on_settings_changed(setting["key"] for setting in default_settings)
     return {"message": f"初始化完成，创建了 {created_count} 个设置项"}
 
 
@@ -716,6 +752,7 @@ def update_announcement_config(
             created += 1
     
     db.commit()
+    invalidate_settings_cache()
     
     return {
         "message": "公告配置更新成功",
@@ -10,7 +10,7 @@ from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 import models
-from database import get_db
+from database import get_db, get_read_db
 from routes.posts import get_current_user
 
 router = APIRouter(prefix="/social-links", tags=["社交链接"])
@@ -58,7 +58,7 @@ class SocialLinkResponse(BaseModel):
 @router.get("", response_model=List[SocialLinkResponse], summary="获取社交链接列表")
 def get_social_links(
     enabled_only: bool = False,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """获取所有社交链接列表"""
     query = db.query(models.SocialLink)
@@ -0,0 +1,62 @@
+"""
+系统状态路由模块
+提供数据库连接池、缓存与访问日志队列等运行状态（仅管理员可见）
+"""
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+
+import models
+from access_log import access_log_writer
+from auth import get_current_user, token_cache
+from autosave import autosave_buffer
+from cache import get_all_cache_stats, get_cache_ttl_stats, get_shared_cache_stats
+from database import engine, read_engine
+from db_pool import get_pool_stats
+from leader import leader_elector
+from routes.posts import save_work_stats
+from scheduler import publish_scheduler
+from trash import trash_retention_stats
+
+router = APIRouter(prefix="/system", tags=["系统"])
+
+
+@router.get("/db-pool", summary="获取数据库连接池状态")
+async def get_db_pool_status(
+    current_user: models.Admin = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    获取数据库连接池状态
+
+    - 配置：size / max_overflow / timeout / recycle / pre_ping
+    - 当前占用：in_use / idle / overflow
+    - 累计统计：checkouts / waits / timeouts、获取连接耗时分位数（毫秒）、peak_in_use
+    """
+    return get_pool_stats(engine)
+
+
+@router.get("/stats", summary="获取系统运行状态")
+async def get_system_stats(
+    current_user: models.Admin = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """获取连接池、缓存、认证缓存、访问日志队列、自动保存缓冲、定时发布调度、主节点选举、文章保存跳过与回收站自动清理统计的运行状态"""
+    return {
+        "database": {
+            "pool": get_pool_stats(engine),
+            "read_pool": get_pool_stats(read_engine) if read_engine is not engine else None
+        },
+        "cache": {
+            "instances": get_all_cache_stats(),
+            "shared": get_shared_cache_stats(),
+            "ttl": get_cache_ttl_stats()
+        },
+        "auth": {
+            "token_cache": token_cache.stats()
+        },
+        "access_log": access_log_writer.stats(),
+        "autosave": autosave_buffer.stats(),
+        "scheduled_publish": publish_scheduler.stats(),
+        "leader": leader_elector.stats(),
+        "post_saves": save_work_stats.stats(),
+        "trash_retention": trash_retention_stats.stats()
+    }
@@ -5,13 +5,15 @@
 from typing import List, Optional
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 import models
-from database import get_db
+from database import get_db, get_read_db
+from cache import invalidate_tag_posts_cache, invalidate_tags_cache
+from conditional import check_not_modified
 from routes.posts import get_current_user
 
 router = APIRouter(prefix="/tags", tags=["标签管理"])
@@ -53,10 +55,16 @@ class TagResponse(BaseModel):
 
 @router.get("", response_model=List[TagResponse], summary="获取标签列表")
 def get_tags(
+    request: Request,
+    response: Response,
     enabled_only: bool = False,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """获取所有标签列表"""
+    """获取所有标签列表（支持条件请求，文章数随文章变化）"""
+    not_modified = check_not_modified(request, response, "tags", "posts")
+    if not_modified:
+        return not_modified
+
     query = db.query(models.Tag)
     if enabled_only:
         query = query.filter(models.Tag.enabled == True)
@@ -83,7 +91,7 @@ def get_tags(
 
 
 @router.get("/{tag_id}", response_model=TagResponse, summary="获取单个标签")
-def get_tag(tag_id: str, db: Session = Depends(get_db)):
+def get_tag(tag_id: str, db: Session = Depends(get_read_db)):
     """根据ID获取标签详情"""
     tag = db.query(models.Tag).filter(models.Tag.id == tag_id).first()
     if not tag:
@@ -132,6 +140,7 @@ def create_tag(
     db.add(db_tag)
     db.commit()
     db.refresh(db_tag)
+    invalidate_tags_cache()
 
     return {"message": "标签创建成功", "id": db_tag.id}
 
@@ -172,6 +181,9 @@ def update_tag(
         setattr(db_tag, key, value)
 
     db.commit()
+    # 文章缓存中包含标签名称
+    invalidate_tag_posts_cache(tag_id)
+    invalidate_tags_cache()
     return {"message": "标签更新成功"}
 
 
@@ -198,4 +210,5 @@ def delete_tag(
 
     db.delete(db_tag)
     db.commit()
+    invalidate_tags_cache()
     return {"message": "标签删除成功"}
@@ -15,7 +15,7 @@ import json
 
 from database import get_db
 from routes.auth import get_current_user
-from auth import get_password_hash, verify_password
+from auth import get_password_hash, verify_password, invalidate_admin_cache
 import models
 
 router = APIRouter(prefix="/totp", tags=["两步验证"])
@@ -186,6 +186,7 @@ async def setup_totp(
     current_user.totp_secret = secret
     current_user.totp_verified = False
     db.commit()
+    invalidate_admin_cache(current_user.username)
 
     return TOTPSetupResponse(
         secret=secret,
@@ -239,6 +240,7 @@ async def verify_totp(
     current_user.recovery_codes = json.dumps(hashed_codes)
     current_user.last_totp_used = None
     db.commit()
+    invalidate_admin_cache(current_user.username)
 
     return {
         "message": "2FA 已成功启用",
@@ -291,6 +293,7 @@ async def disable_totp(
     current_user.totp_enabled_at = None
     current_user.last_totp_used = None
     db.commit()
+    invalidate_admin_cache(current_user.username)
 
     return {"message": "2FA 已禁用"}
 
@@ -327,6 +330,7 @@ async def regenerate_recovery_codes(
     hashed_codes = hash_recovery_codes(recovery_codes)
     current_user.recovery_codes = json.dumps(hashed_codes)
     db.commit()
+    invalidate_admin_cache(current_user.username)
 
     return {
         "message": "恢复码已重新生成",
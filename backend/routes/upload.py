@@ -2,11 +2,9 @@
 文件上传路由
 提供图片和文件上传功能
 """
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Header, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request
 from fastapi.responses import JSONResponse
-from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from jose import JWTError, jwt
 from datetime import datetime
 import os
 import uuid
@@ -17,13 +15,19 @@ from sqlalchemy import func, or_
 
 from database import get_db, settings
 import models
+from auth import get_current_user
 from response_utils import build_error
 from media_usage import rebuild_media_usage
 from rate_limiter import limiter, rate_limit_settings
+from pagination import InvalidCursorError, KeysetPaginator, paginate
 
 router = APIRouter(prefix="/upload", tags=["文件上传"])
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+# 媒体列表按上传时间倒序，id 保证顺序稳定
+MEDIA_PAGINATOR = KeysetPaginator("media", [
+    (models.MediaFile.created_at, True),
+    (models.MediaFile.id, True)
+])
 
 # 允许的图片类型
 ALLOWED_IMAGE_TYPES = {
@@ -44,35 +48,6 @@ ALLOWED_FILE_TYPES = {
 }
 
 
-async def get_current_user(
-    authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
-):
-    """验证 JWT Token 并获取当前用户"""
-    credentials_exception = HTTPException(
-        status_code=401,
-        detail="无效的认证凭据",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-
-    if not authorization or not authorization.startswith("Bearer "):
-        raise credentials_exception
-
-    token = authorization.split(" ")[1]
-
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-
-    user = db.query(models.Admin).filter(models.Admin.username == username).first()
-    if user is None:
-        raise credentials_exception
-    return user
-
 
 def generate_unique_filename(original_filename: str, extension: str) -> str:
     """生成唯一文件名"""
@@ -393,10 +368,12 @@ async def get_media_files(
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
     keyword: Optional[str] = Query(None, description="搜索关键字"),
+    cursor: Optional[str] = Query(None, description="游标分页：第一页传空字符串，之后传 next_cursor"),
+    with_total: bool = Query(False, description="游标分页时是否返回总数"),
     db: Session = Depends(get_db),
     current_user: models.Admin = Depends(get_current_user)
 ):
-    """分页列出媒体文件"""
+    """分页列出媒体文件（提供 cursor 时使用游标分页）"""
     query = db.query(models.MediaFile)
     if keyword:
         like_pattern = f"%{keyword}%"
@@ -408,8 +385,13 @@ async def get_media_files(
             )
         )
 
-    total = query.count()
-    files = query.order_by(models.MediaFile.created_at.desc()).offset((page - 1) * page_size).limit(page_size).all()
+    try:
+        files, pagination = paginate(
+            query, MEDIA_PAGINATOR, cursor, page, page_size,
+            with_total=with_total, count_key=f"media:{keyword}"
+        )
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
     return {
         "items": [{
@@ -426,12 +408,7 @@ async def get_media_files(
             "usage_count": media.usage_count,
             "created_at": media.created_at
         } for media in files],
-        "pagination": {
-            "page": page,
-            "page_size": page_size,
-            "total": total,
-            "total_pages": (total + page_size - 1) // page_size
-        }
+        "pagination": pagination
     }
 
 
@@ -0,0 +1,265 @@
+"""
+定时发布调度模块
+用内存最小堆按 scheduled_at 记录待发布文章，后台任务休眠到最近一篇的发布时间再执行发布，
+读接口不再检查定时文章。
+
+堆只决定何时唤醒，发布时仍以数据库为准（status 为 scheduled 且已到时间的文章），
+因此堆中过期或重复的条目不会造成错误发布；启动时和每隔 SCHEDULED_PUBLISH_INTERVAL 秒
+从数据库重建一次堆，覆盖备份恢复等未经过 schedule() 的修改。
+
+多 worker 部署时调度任务只在主节点运行（见 leader.py），其他 worker 上的 schedule()
+更新共享目录中提示文件的修改时间；主节点每隔 SCHEDULED_PUBLISH_WATCH_INTERVAL 秒
+检查一次提示文件（启用缓存失效广播时还检查其他 worker 的内容变化），有变化即重建堆。
+"""
+import asyncio
+import heapq
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+import models
+from cache import CACHE_SHARED_DIR, get_invalidation_bus, get_last_content_change, invalidate_post_cache
+from database import SessionLocal
+
+logger = logging.getLogger("firefly")
+
+# 从数据库重建调度堆的间隔（秒）
+SCHEDULED_PUBLISH_INTERVAL = int(os.getenv("SCHEDULED_PUBLISH_INTERVAL", "60"))
+if SCHEDULED_PUBLISH_INTERVAL < 10:
+    SCHEDULED_PUBLISH_INTERVAL = 10
+# 主节点检查其他 worker 登记的定时文章的间隔（秒）
+SCHEDULED_PUBLISH_WATCH_INTERVAL = float(os.getenv("SCHEDULED_PUBLISH_WATCH_INTERVAL", "1"))
+if SCHEDULED_PUBLISH_WATCH_INTERVAL < 0.2:
+    SCHEDULED_PUBLISH_WATCH_INTERVAL = 0.2
+# 非主节点登记定时文章时更新的提示文件，同一主机上的所有 worker 需指向同一文件
+SCHEDULED_PUBLISH_HINT_FILE = os.getenv(
+    "SCHEDULED_PUBLISH_HINT_FILE", os.path.join(CACHE_SHARED_DIR, "schedule.hint")
+)
+
+
+def publish_due_posts(db: Session) -> int:
+    """发布所有已到时间的定时文章，返回处理的文章数"""
+    now = datetime.utcnow()
+    scheduled_posts = db.query(models.Post).filter(
+        models.Post.status == "scheduled",
+        models.Post.scheduled_at != None,
+        models.Post.scheduled_at <= now
+    ).all()
+
+    if not scheduled_posts:
+        return 0
+
+    for post in scheduled_posts:
+        scheduled_time = post.scheduled_at
+        try:
+            post.status = "published"
+            post.is_draft = 0
+            post.published_at = scheduled_time or now
+            post.scheduled_at = None
+            db.add(models.ScheduledPublishLog(
+                post_id=post.id,
+                status="success",
+                message="发布成功",
+                scheduled_at=scheduled_time
+            ))
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            db.add(models.ScheduledPublishLog(
+                post_id=post.id,
+                status="failed",
+                message=str(exc)[:500],
+                scheduled_at=scheduled_time
+            ))
+            db.commit()
+        invalidate_post_cache(post.id)
+    return len(scheduled_posts)
+
+
+class PublishScheduler:
+    """
+    定时发布调度器
+
+    schedule 可在线程池中调用（创建/更新文章的同步路由），只做一次加锁的堆插入，
+    发布时间早于当前最近时间时唤醒后台任务重新计算休眠时长；后台任务不在本进程运行时
+    （非主节点）通过提示文件通知主节点。run 为后台任务。
+    """
+
+    def __init__(
+        self,
+        resync_interval: int = SCHEDULED_PUBLISH_INTERVAL,
+        watch_interval: float = SCHEDULED_PUBLISH_WATCH_INTERVAL,
+        hint_path: str = SCHEDULED_PUBLISH_HINT_FILE
+    ):
+        self.resync_interval = resync_interval
+        self.watch_interval = watch_interval
+        self.hint_path = hint_path
+        self._heap: List[Tuple[datetime, str]] = []
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.published = 0
+        self.runs = 0
+        self.last_run_at: Optional[datetime] = None
+
+    def schedule(self, post_id: str, scheduled_at: Optional[datetime]) -> None:
+        """
+        登记一篇定时文章（scheduled_at 为 UTC 时间）
+
+        文章改期或取消定时无需移除旧条目：到点时以数据库状态为准。
+        """
+        if scheduled_at is None:
+            return
+        with self._lock:
+            earliest = self._heap[0][0] if self._heap else None
+            heapq.heappush(self._heap, (scheduled_at, post_id))
+            wake = earliest is None or scheduled_at < earliest
+
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None:
+            self._notify_leader()
+        elif wake:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass
+
+    def _notify_leader(self) -> None:
+        """更新提示文件的修改时间，通知主节点重建调度堆"""
+        try:
+            directory = os.path.dirname(self.hint_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.hint_path, "a"):
+                pass
+            os.utime(self.hint_path)
+        except OSError as exc:
+            logger.warning(f"通知主节点定时文章失败，将在下次重建时发布: {exc}")
+
+    def _hint_mtime(self) -> int:
+        """提示文件的修改时间（纳秒），不存在时为 0"""
+        try:
+            return os.stat(self.hint_path).st_mtime_ns
+        except OSError:
+            return 0
+
+    def rebuild(self, db: Session) -> int:
+        """从数据库重建调度堆，返回待发布文章数"""
+        rows = db.query(models.Post.scheduled_at, models.Post.id).filter(
+            models.Post.status == "scheduled",
+            models.Post.scheduled_at != None
+        ).all()
+        heap = [(scheduled_at, post_id) for scheduled_at, post_id in rows]
+        heapq.heapify(heap)
+        with self._lock:
+            self._heap = heap
+        return len(heap)
+
+    def next_due(self) -> Optional[datetime]:
+        """最近一篇待发布文章的时间"""
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def _pop_due(self, now: datetime) -> int:
+        """移除已到时间的条目"""
+        count = 0
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                heapq.heappop(self._heap)
+                count += 1
+        return count
+
+    def _run_once(self, resync: bool) -> int:
+        """发布已到时间的文章，必要时从数据库重建堆"""
+        db = SessionLocal()
+        try:
+            if resync:
+                self.rebuild(db)
+            self._pop_due(datetime.utcnow())
+            published = publish_due_posts(db)
+        finally:
+            db.close()
+        self.runs += 1
+        self.published += published
+        self.last_run_at = datetime.utcnow()
+        return published
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        """后台循环：休眠到最近的发布时间（最长 resync_interval 秒）后发布并重建堆"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        # 启用失效广播时还可感知其他 worker 的内容写入
+        watch_bus = get_invalidation_bus() is not None
+        logger.info(
+            "定时发布调度任务启动，重建间隔=%ss，检查间隔=%ss，失效广播=%s",
+            self.resync_interval, self.watch_interval, watch_bus
+        )
+        loop = self._loop
+        next_resync = 0.0
+        seen_change = 0.0
+        seen_hint = self._hint_mtime()
+        try:
+            while not stop_event.is_set():
+                resync = loop.time() >= next_resync
+                hint = self._hint_mtime()
+                if hint != seen_hint:
+                    seen_hint = hint
+                    resync = True
+                if watch_bus:
+                    changed_at = get_last_content_change()
+                    if changed_at > seen_change:
+                        seen_change = changed_at
+                        resync = True
+                due = self.next_due()
+                # 只在重建或有文章到期时访问数据库
+                if resync or (due is not None and due <= datetime.utcnow()):
+                    try:
+                        published = await asyncio.to_thread(self._run_once, resync)
+                        if published:
+                            logger.info("定时发布 %d 篇文章", published)
+                    except Exception as exc:
+                        logger.error("定时发布处理失败: %s", exc)
+                if resync:
+                    next_resync = loop.time() + self.resync_interval
+
+                timeout = min(max(0.0, next_resync - loop.time()), self.watch_interval)
+                due = self.next_due()
+                if due is not None:
+                    timeout = min(timeout, max(0.0, (due - datetime.utcnow()).total_seconds()))
+
+                waiters = [
+                    asyncio.ensure_future(self._wakeup.wait()),
+                    asyncio.ensure_future(stop_event.wait())
+                ]
+                try:
+                    await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    for waiter in waiters:
+                        waiter.cancel()
+                self._wakeup.clear()
+        finally:
+            self._wakeup = None
+            self._loop = None
+
+    def stats(self) -> Dict[str, Any]:
+        """获取调度统计"""
+        with self._lock:
+            pending = len(self._heap)
+        next_due = self.next_due()
+        return {
+            "pending": pending,
+            "next_due": next_due.isoformat() if next_due else None,
+            "resync_interval": self.resync_interval,
+            "watch_interval": self.watch_interval,
+            "runs": self.runs,
+            "published": self.published,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None
+        }
+
+
+# 全局定时发布调度器
+publish_scheduler = PublishScheduler()
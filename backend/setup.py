@@ -7,6 +7,7 @@ Firefly CMS 数据库初始化脚本
     python setup.py --demo           # 基础初始化 + 演示数据（分类、标签、示例文章）
     python setup.py --full           # 完整初始化（基础 + 演示数据 + 前端配置导入）
     python setup.py --import-posts   # 导入静态 Markdown 文章到数据库
+    python setup.py --compact-revisions  # 把旧的文章历史版本转换为压缩差异格式并统计节省的空间
     python setup.py --reset          # 重置数据库（危险：删除所有数据后重新初始化）
 """
 import sys
@@ -16,6 +17,9 @@ from pathlib import Path
 from database import engine, Base, SessionLocal
 import models
 from auth import get_password_hash
+from migrations import migrate_schema
+from revisions import compact_revisions
+from taxonomy import resolve_category, resolve_tags
 
 # 尝试导入 yaml（用于静态文章导入）
 try:
@@ -271,6 +275,9 @@ def create_tables(drop_existing: bool = False):
 
     print("[INFO] 创建数据库表...")
     Base.metadata.create_all(bind=engine)
+    added = migrate_schema(engine)
+    if added:
+        print(f"[OK] 已为已有表添加列: {', '.join(added)}")
     print("[OK] 数据库表创建完成")
 
 
@@ -554,13 +561,16 @@ def import_static_posts(db):
         if isinstance(category_name, list):
             category_name = category_name[0] if category_name else "未分类"
 
-        db_category = db.query(models.Category).filter(models.Category.name == category_name).first()
-        if not db_category:
-            db_category = models.Category(name=category_name)
-            db.add(db_category)
-            db.commit()
-            db.refresh(db_category)
-            print(f"  创建分类: {category_name}")
+        # 分类和标签批量获取或创建，与文章在同一事务中提交
+        tags = frontmatter.get("tags", [])
+        try:
+            db_category = resolve_category(db, category_name)
+            db_tags = resolve_tags(db, tags if isinstance(tags, list) else [])
+        except ValueError as exc:
+            db.rollback()
+            print(f"  [SKIP] 分类或标签{exc}")
+            skipped_count += 1
+            continue
 
         # 处理发布时间
         published = frontmatter.get("published")
@@ -584,21 +594,10 @@ def import_static_posts(db):
             category_id=db_category.id,
             is_draft=1 if frontmatter.get("draft", False) else 0,
             pinned=frontmatter.get("pinned", False),
-            published_at=published_at
+            published_at=published_at,
+            tags=db_tags
         )
 
-        # 处理标签
-        tags = frontmatter.get("tags", [])
-        if isinstance(tags, list):
-            for tag_name in tags:
-                db_tag = db.query(models.Tag).filter(models.Tag.name == tag_name).first()
-                if not db_tag:
-                    db_tag = models.Tag(name=tag_name)
-                    db.add(db_tag)
-                    db.commit()
-                    db.refresh(db_tag)
-                db_post.tags.append(db_tag)
-
         db.add(db_post)
         db.commit()
 
@@ -611,6 +610,15 @@ def import_static_posts(db):
     print(f"  跳过: {skipped_count} 篇")
 
 
+def compact_post_revisions(db):
+    """把未压缩的文章历史版本转换为关键帧 + 差异格式"""
+    stats = compact_revisions(db)
+    before, after = stats["bytes_before"], stats["bytes_after"]
+    ratio = (1 - after / before) * 100 if before else 0
+    print(f"  处理文章: {stats['posts']} 篇，版本: {stats['revisions']} 条")
+    print(f"  正文占用: {before / 1024:.1f} KB -> {after / 1024:.1f} KB，节省 {stats['bytes_saved'] / 1024:.1f} KB ({ratio:.1f}%)")
+
+
 # ============================================================================
 # 主函数
 # ============================================================================
@@ -623,6 +631,7 @@ def main():
     demo_mode = "--demo" in args
     full_mode = "--full" in args
     import_posts_mode = "--import-posts" in args
+    compact_revisions_mode = "--compact-revisions" in args
 
     print("=" * 60)
     print("Firefly CMS 数据库初始化")
@@ -663,6 +672,11 @@ def main():
             print("\n[INFO] 导入静态 Markdown 文章...")
             import_static_posts(db)
 
+        # 压缩历史版本模式
+        if compact_revisions_mode:
+            print("\n[INFO] 压缩文章历史版本...")
+            compact_post_revisions(db)
+
         # 打印统计信息
         print_statistics(db)
 
@@ -0,0 +1,98 @@
+"""
+分类与标签批量解析模块
+按名称批量获取分类 / 标签，不存在的在同一条 INSERT 中创建：
+- 一次 IN 查询取回已存在的记录
+- 缺失的名称一条多行 INSERT 写入，唯一约束冲突（其他请求同时创建）时忽略
+- 再用一次 IN 查询取回新建的记录
+全程不提交事务，由调用方与文章一起提交
+"""
+from typing import Dict, Iterable, List, Optional, Type
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+import models
+
+# 单条 IN 查询携带的名称数量上限（导入大量数据时分批）
+NAME_BATCH_SIZE = 500
+
+
+def _unique_names(names: Iterable[Optional[str]]) -> List[str]:
+    """去重并保持顺序，忽略空名称"""
+    seen = {}
+    for name in names:
+        if name and name not in seen:
+            seen[name] = True
+    return list(seen)
+
+
+def _load_by_names(db: Session, model: Type, names: List[str]) -> Dict[str, object]:
+    """按名称批量查询，返回 {名称: 记录}"""
+    found: Dict[str, object] = {}
+    for start in range(0, len(names), NAME_BATCH_SIZE):
+        batch = names[start:start + NAME_BATCH_SIZE]
+        for obj in db.query(model).filter(model.name.in_(batch)).all():
+            found[obj.name] = obj
+    return found
+
+
+def _resolve_by_names(db: Session, model: Type, names: Iterable[Optional[str]]) -> Dict[str, object]:
+    """
+    按名称获取记录，缺失的批量创建
+
+    Raises:
+        ValueError: 名称无法写入（如超出字段长度被数据库截断）
+    """
+    names = _unique_names(names)
+    if not names:
+        return {}
+    found = _load_by_names(db, model, names)
+    missing = [name for name in names if name not in found]
+    if missing:
+        # 并发创建同名记录时忽略唯一约束冲突，随后重新查询取回对方创建的记录
+        stmt = insert(model).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite")
+        db.execute(stmt, [{"name": name} for name in missing])
+        found.update(_load_by_names(db, model, missing))
+        unresolved = [name for name in missing if name not in found]
+        if unresolved:
+            raise ValueError(f"无法创建: {', '.join(unresolved)}")
+    return found
+
+
+def get_categories_by_name(db: Session, names: Iterable[Optional[str]]) -> Dict[str, models.Category]:
+    """批量查询已存在的分类，返回 {名称: 分类}"""
+    return _load_by_names(db, models.Category, _unique_names(names))
+
+
+def get_tags_by_name(db: Session, names: Iterable[Optional[str]]) -> Dict[str, models.Tag]:
+    """批量查询已存在的标签，返回 {名称: 标签}"""
+    return _load_by_names(db, models.Tag, _unique_names(names))
+
+
+def resolve_category(db: Session, name: str) -> models.Category:
+    """
+    获取分类，不存在时创建（不提交事务）
+
+    Raises:
+        ValueError: 分类名称无法写入
+    """
+    return _resolve_by_names(db, models.Category, [name])[name]
+
+
+def resolve_tags(db: Session, names: Iterable[Optional[str]]) -> List[models.Tag]:
+    """
+    获取一组标签，不存在的批量创建（不提交事务）
+
+    Args:
+        db: 数据库会话
+        names: 标签名称，重复和空名称会被忽略
+
+    Returns:
+        按名称首次出现顺序排列的标签列表
+
+    Raises:
+        ValueError: 标签名称无法写入
+    """
+    names = _unique_names(names)
+    found = _resolve_by_names(db, models.Tag, names)
+    return [found[name] for name in names]
@@ -0,0 +1,96 @@
+"""
+测试公共配置
+
+导入后端模块前设置环境变量：主库与只读副本分别使用临时目录中的两个 SQLite 文件，
+共享缓存目录也放在临时目录中；MySQL 专用类型按 SQLite 类型建表。
+
+在 backend 目录下执行：
+    python -m pytest -q tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+_TMP_DIR = tempfile.mkdtemp(prefix="firefly-tests-")
+os.environ["SECRET_KEY"] = "firefly-tests-" + "x" * 32
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP_DIR, 'primary.db')}"
+os.environ["READ_DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP_DIR, 'replica.db')}"
+os.environ["CACHE_SHARED_DIR"] = os.path.join(_TMP_DIR, "cache_shared")
+os.environ["UPLOAD_DIR"] = os.path.join(_TMP_DIR, "uploads")
+os.environ["BACKUP_DIR"] = os.path.join(_TMP_DIR, "backups")
+os.environ["LOG_DIR"] = os.path.join(_TMP_DIR, "logs")
+os.environ["AUTO_BACKUP_ENABLED"] = "false"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.dialects.mysql import LONGBLOB, LONGTEXT  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+
+
+@compiles(LONGTEXT, "sqlite")
+def compile_longtext(type_, compiler, **kw):
+    """SQLite 没有 LONGTEXT，按 TEXT 建表"""
+    return "TEXT"
+
+
+@compiles(LONGBLOB, "sqlite")
+def compile_longblob(type_, compiler, **kw):
+    """SQLite 没有 LONGBLOB，按 BLOB 建表"""
+    return "BLOB"
+
+
+import auth  # noqa: E402
+import cache  # noqa: E402
+import main  # noqa: E402
+import models  # noqa: E402
+from database import Base, SessionLocal, engine, read_engine  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+# 副本与主库使用相同的表结构
+Base.metadata.create_all(bind=read_engine)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """删除临时目录（数据库文件、共享缓存等）"""
+    shutil.rmtree(_TMP_DIR, ignore_errors=True)
+
+
+def _clear_tables(bind) -> None:
+    with bind.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    """每个测试前清空两个数据库、所有缓存和内容写入记录"""
+    _clear_tables(engine)
+    _clear_tables(read_engine)
+    for instance in cache._registry:
+        instance._apply("clear", None)
+    with cache._content_lock:
+        cache._content_versions.clear()
+        cache._content_modified.clear()
+        cache._content_written.clear()
+        cache._content_loaded = False
+    yield
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def admin_headers():
+    """创建管理员并返回带 Token 的请求头"""
+    db = SessionLocal()
+    try:
+        db.add(models.Admin(username="admin", hashed_password=auth.get_password_hash("admin123")))
+        db.commit()
+    finally:
+        db.close()
+    return {"Authorization": f"Bearer {auth.create_access_token({'sub': 'admin'})}"}
@@ -0,0 +1,54 @@
+"""自动保存共享缓冲测试（见 autosave.py）"""
+import os
+import sqlite3
+
+from autosave import AUTOSAVE_FILENAME, AutosaveBuffer, _PendingStore
+
+
+def _scan(conn):
+    entries, total = conn.execute("SELECT COUNT(*), TOTAL(LENGTH(data)) FROM pending_autosaves").fetchone()
+    return entries, int(total)
+
+
+def test_totals_follow_pending_rows(tmp_path):
+    # 旧版缓冲文件：已有条目，没有合计表
+    conn = sqlite3.connect(os.path.join(tmp_path, AUTOSAVE_FILENAME))
+    conn.execute(
+        "CREATE TABLE pending_autosaves (post_id TEXT PRIMARY KEY, data TEXT NOT NULL, saved_at TEXT NOT NULL, "
+        "first_at REAL NOT NULL, last_at REAL NOT NULL, claimed_at REAL)"
+    )
+    conn.execute("INSERT INTO pending_autosaves VALUES ('old', '旧内容', '2024-01-01T00:00:00', 0, 0, NULL)")
+    conn.commit()
+    conn.close()
+
+    conn = _PendingStore(str(tmp_path)).connection()
+    assert AutosaveBuffer._totals(conn) == _scan(conn) == (1, 3)
+
+    conn.execute(
+        "INSERT INTO pending_autosaves (post_id, data, saved_at, first_at, last_at) VALUES ('a', 'xx', 't', 0, 0)"
+    )
+    conn.execute(
+        "INSERT INTO pending_autosaves (post_id, data, saved_at, first_at, last_at) VALUES ('a', 'yyyy', 't', 0, 0) "
+        "ON CONFLICT(post_id) DO UPDATE SET data = excluded.data"
+    )
+    conn.execute("UPDATE pending_autosaves SET claimed_at = 1 WHERE post_id = 'a'")
+    conn.execute("DELETE FROM pending_autosaves WHERE post_id = 'old'")
+    assert AutosaveBuffer._totals(conn) == _scan(conn) == (1, 4)
+
+    # 重新打开不会重复初始化合计
+    _PendingStore(str(tmp_path))
+    assert AutosaveBuffer._totals(conn) == (1, 4)
+
+
+def test_claim_all_when_over_max_bytes(tmp_path):
+    buffer = AutosaveBuffer(directory=str(tmp_path), mode="shared", max_bytes=10)
+    conn = buffer._connection()
+    conn.execute(
+        "INSERT INTO pending_autosaves (post_id, data, saved_at, first_at, last_at) "
+        "VALUES ('a', 'x', '2024-01-01T00:00:00', 9e12, 9e12)"
+    )
+    assert buffer._claim_due(conn, False) == []
+
+    conn.execute("UPDATE pending_autosaves SET data = ?, claimed_at = NULL", ("y" * 20,))
+    assert [row["b_id"] for row in buffer._claim_due(conn, False)] == ["a"]
+    assert buffer.stats()["buffered_bytes"] == 20
@@ -0,0 +1,92 @@
+"""共享缓存存储与失效广播测试（见 cache_shared.py 与 cache.SimpleCache）"""
+import threading
+import time
+from datetime import date, datetime
+
+from cache import SimpleCache
+from cache_shared import FLUSH_NAMESPACE, InvalidationBus, _SQLiteStore, open_shared_cache
+
+
+def test_values_round_trip_as_json(tmp_path):
+    backend, _ = open_shared_cache(str(tmp_path), with_backend=True)
+    value = {
+        "items": [{"id": "1", "published_at": datetime(2024, 1, 2, 3, 4, 5, 6), "tags": ("a", "b")}],
+        "day": date(2024, 1, 2),
+        "total": 1
+    }
+    backend.set("posts", "k", value, ["posts:list"], time.time() + 60, time.time() + 120)
+
+    raw = backend._store.connection().execute("SELECT value FROM cache_entries WHERE key = 'k'").fetchone()[0]
+    assert bytes(raw).startswith(b"{")
+    entry = backend.get("posts", "k")
+    assert entry["value"] == {
+        "items": [{"id": "1", "published_at": datetime(2024, 1, 2, 3, 4, 5, 6), "tags": ["a", "b"]}],
+        "day": date(2024, 1, 2),
+        "total": 1
+    }
+
+
+def test_values_with_password_are_not_shared(tmp_path):
+    backend, _ = open_shared_cache(str(tmp_path), with_backend=True)
+    expires = time.time() + 60
+    backend.set("posts", "open", {"id": "1", "password": None}, [], expires, expires)
+    backend.set("posts", "locked", {"id": "2", "password": "secret"}, [], expires, expires)
+    assert backend.get("posts", "open") is not None
+    assert backend.get("posts", "locked") is None
+
+    # 已共享的值改为带密码后，旧的共享值被删除
+    backend.set("posts", "open", {"id": "1", "password": "secret"}, [], expires, expires)
+    assert backend.get("posts", "open") is None
+    assert backend.skipped_sensitive == 2
+
+
+def test_lagging_process_gets_flush_event(tmp_path):
+    publisher = InvalidationBus(_SQLiteStore(str(tmp_path)))
+    subscriber = InvalidationBus(_SQLiteStore(str(tmp_path)))
+    for i in range(3):
+        publisher.publish("posts", "delete", f"k{i}")
+    # 模拟其他进程发布的事件；订阅者尚未拉取时事件被清理（只保留每种操作最近的一条）
+    publisher._store.connection().execute("UPDATE cache_events SET pid = 0")
+    publisher.prune(retention=-1)
+
+    events = subscriber.poll()
+    assert [event[2] for event in events] == [FLUSH_NAMESPACE, "posts"]
+    assert events[-1][4] == "k2"
+    assert subscriber.poll() == []
+
+    # 未落后的进程不会收到全量失效事件
+    publisher.publish("posts", "delete", "k3")
+    publisher._store.connection().execute("UPDATE cache_events SET pid = 0")
+    assert [event[2] for event in subscriber.poll()] == ["posts"]
+
+
+class _SlowBackend:
+    """读取时执行回调的共享存储，用于检查读取期间的加锁与失效"""
+
+    def __init__(self, on_get):
+        self.on_get = on_get
+
+    def get(self, namespace, key):
+        self.on_get()
+        expires = time.time() + 60
+        return {"value": {"id": key}, "expires_at": expires, "stale_until": expires, "tags": []}
+
+
+def test_shared_read_does_not_hold_cache_lock():
+    def on_get():
+        # 其他线程在读取共享存储期间仍能访问本进程缓存
+        thread = threading.Thread(target=cache.set, args=("other", 1))
+        thread.start()
+        thread.join(timeout=1)
+        assert not thread.is_alive()
+
+    cache = SimpleCache(name="test_lookup_lock", backend=_SlowBackend(on_get), shared=False)
+    assert cache.get("k") == {"id": "k"}
+    assert cache.get("other") == 1
+
+
+def test_invalidation_during_shared_read_is_not_cached():
+    cache = SimpleCache(name="test_lookup_invalidate", backend=None, shared=False)
+    cache._backend = _SlowBackend(lambda: cache.delete("k"))
+    assert cache.get("k") is None
+    assert "k" not in cache._cache
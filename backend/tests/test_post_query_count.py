@@ -0,0 +1,77 @@
+"""
+文章列表查询数测试
+
+分类、标签通过预加载取得（见 post_queries.py），列表接口的 SQL 语句数与文章数量无关。
+分别在 10 篇和 100 篇文章（回收站中各有同样数量）下统计主库与副本上执行的语句数，两者必须相同。
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+import models
+from cache import posts_cache
+from database import SessionLocal, engine, read_engine
+from pagination import count_cache
+
+PATHS = [
+    "/api/posts?all=true",
+    "/api/posts/trash/list?all=true",
+    "/api/backup/export",
+]
+
+
+def seed_posts(start: int, stop: int) -> None:
+    """写入编号 [start, stop) 的文章，每篇使用独立的分类和两个标签，奇数编号在回收站中"""
+    db = SessionLocal()
+    try:
+        now = datetime(2024, 1, 1)
+        for i in range(start, stop):
+            db.add(models.Post(
+                title=f"文章 {i}",
+                slug=f"post-{i}",
+                content=f"正文 {i}",
+                status="published",
+                published_at=now - timedelta(hours=i),
+                category=models.Category(name=f"分类 {i}", slug=f"category-{i}"),
+                tags=[
+                    models.Tag(name=f"标签 {i}-a", slug=f"tag-{i}-a"),
+                    models.Tag(name=f"标签 {i}-b", slug=f"tag-{i}-b")
+                ],
+                deleted_at=now if i % 2 else None
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def count_queries(client, path: str, headers: dict) -> int:
+    """清除列表缓存后请求一次，返回执行的 SQL 语句数"""
+    posts_cache._apply("clear", None)
+    count_cache._apply("clear", None)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for bind in {engine, read_engine}:
+        event.listen(bind, "before_cursor_execute", record)
+    try:
+        response = client.get(path, headers=headers)
+    finally:
+        for bind in {engine, read_engine}:
+            event.remove(bind, "before_cursor_execute", record)
+    assert response.status_code == 200, response.text
+    return len(statements)
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_query_count_independent_of_post_count(client, admin_headers, path):
+    # 预热管理员缓存等与文章数量无关的一次性查询
+    client.get(path, headers=admin_headers)
+
+    seed_posts(0, 20)
+    small = count_queries(client, path, admin_headers)
+    seed_posts(20, 200)
+    large = count_queries(client, path, admin_headers)
+    assert small == large
@@ -0,0 +1,101 @@
+"""
+只读副本路由测试
+
+主库与副本是两个独立的 SQLite 文件（见 conftest.py），同一篇文章在两边的标题不同，
+通过公开接口返回的标题判断请求读的是哪个库。
+"""
+import time
+from datetime import datetime
+
+import pytest
+
+import database
+import models
+from cache import posts_cache
+from database import ReadSessionLocal, SessionLocal
+
+READ_AFTER_WRITE_SECONDS = 0.2
+
+POST_DATA = {"title": "主库标题", "slug": "replica-test", "content": "正文", "category_name": "默认", "tags": []}
+
+
+@pytest.fixture(autouse=True)
+def short_read_after_write(monkeypatch):
+    monkeypatch.setattr(database.settings, "READ_AFTER_WRITE_SECONDS", READ_AFTER_WRITE_SECONDS)
+
+
+@pytest.fixture
+def post_id(client, admin_headers):
+    """在主库创建文章，并在副本写入同 ID、不同标题的副本数据"""
+    response = client.post("/api/posts", json=POST_DATA, headers=admin_headers)
+    assert response.status_code == 201
+    post_id = response.json()["data"]["id"]
+
+    db = SessionLocal()
+    read_db = ReadSessionLocal()
+    try:
+        post = db.get(models.Post, post_id)
+        read_db.add(models.Post(
+            id=post.id,
+            title="副本标题",
+            slug=post.slug,
+            content=post.content,
+            published_at=post.published_at or datetime.utcnow()
+        ))
+        read_db.commit()
+    finally:
+        db.close()
+        read_db.close()
+    return post_id
+
+
+def public_titles(client, headers=None):
+    """清除本进程的文章缓存后读取公开列表的标题"""
+    posts_cache._apply("clear", None)
+    response = client.get("/api/posts", headers=headers or {})
+    assert response.status_code == 200
+    return [item["title"] for item in response.json()["data"]]
+
+
+def wait_read_after_write():
+    time.sleep(READ_AFTER_WRITE_SECONDS + 0.05)
+
+
+def test_reads_use_primary_right_after_write(client, post_id):
+    assert public_titles(client) == ["主库标题"]
+
+
+def test_anonymous_reads_use_replica(client, post_id):
+    wait_read_after_write()
+    assert public_titles(client) == ["副本标题"]
+
+
+def test_admin_reads_use_primary(client, admin_headers, post_id):
+    wait_read_after_write()
+    assert public_titles(client, admin_headers) == ["主库标题"]
+
+
+def test_autosave_does_not_route_to_primary(client, admin_headers, post_id):
+    wait_read_after_write()
+    for i in range(3):
+        response = client.post(f"/api/posts/{post_id}/autosave", json={"content": f"草稿 {i}"}, headers=admin_headers)
+        assert response.status_code == 200
+    assert public_titles(client) == ["副本标题"]
+
+
+def test_autosave_changes_etag(client, admin_headers, post_id):
+    etag = client.get("/api/posts").headers["ETag"]
+    response = client.post(f"/api/posts/{post_id}/autosave", json={"content": "草稿"}, headers=admin_headers)
+    assert response.status_code == 200
+    response = client.get("/api/posts", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_post_update_routes_to_primary(client, admin_headers, post_id):
+    wait_read_after_write()
+    response = client.put(f"/api/posts/{post_id}", json={**POST_DATA, "title": "主库新标题"}, headers=admin_headers)
+    assert response.status_code == 200
+    assert public_titles(client) == ["主库新标题"]
+    wait_read_after_write()
+    assert public_titles(client) == ["副本标题"]
@@ -0,0 +1,175 @@
+"""
+回收站清理模块
+永久删除文章时按主键分块，每块用集合 DELETE 删除子表记录和文章，并按块提交，
+单个事务的大小与回收站中的文章数量无关；全部删除后统一刷新一次媒体引用次数。
+
+配置 TRASH_RETENTION_DAYS 后，主节点（见 leader.py）定期清理在回收站中超过该天数的文章。
+"""
+import asyncio
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+import models
+from cache import invalidate_post_lists_cache, invalidate_posts_by_ids
+from database import SessionLocal
+from media_usage import refresh_media_usage_counts
+
+logger = logging.getLogger("firefly")
+
+# 每块永久删除的文章数
+TRASH_PURGE_CHUNK_SIZE = int(os.getenv("TRASH_PURGE_CHUNK_SIZE", "200"))
+if TRASH_PURGE_CHUNK_SIZE < 1:
+    TRASH_PURGE_CHUNK_SIZE = 1
+# 回收站保留天数，超过后自动永久删除，0 表示不自动清理
+TRASH_RETENTION_DAYS = int(os.getenv("TRASH_RETENTION_DAYS", "0"))
+if TRASH_RETENTION_DAYS < 0:
+    TRASH_RETENTION_DAYS = 0
+# 自动清理的检查间隔（秒）
+TRASH_RETENTION_INTERVAL = int(os.getenv("TRASH_RETENTION_INTERVAL", "3600"))
+if TRASH_RETENTION_INTERVAL < 60:
+    TRASH_RETENTION_INTERVAL = 60
+
+# 以 post_id 关联文章的子表，永久删除文章前逐表集合删除
+POST_CHILD_TABLES = (
+    models.post_tags,
+    models.PostMedia.__table__,
+    models.PostRevision.__table__,
+    models.ScheduledPublishLog.__table__,
+    models.PostViewStat.__table__,
+    models.PostViewClient.__table__,
+    models.PostAutosave.__table__
+)
+
+
+def purge_posts(db: Session, post_ids: List[str]) -> List[str]:
+    """
+    以集合 DELETE 永久删除文章及其子表记录（不提交事务）
+
+    Returns:
+        受影响的媒体 ID（调用方需刷新引用次数）
+    """
+    if not post_ids:
+        return []
+    media_ids = [media_id for (media_id,) in db.query(models.PostMedia.media_id).filter(
+        models.PostMedia.post_id.in_(post_ids)
+    ).distinct()]
+    for table in POST_CHILD_TABLES:
+        db.execute(table.delete().where(table.c.post_id.in_(post_ids)))
+    db.query(models.Post).filter(models.Post.id.in_(post_ids)).delete(synchronize_session=False)
+    return media_ids
+
+
+def purge_trash(
+    db: Session,
+    older_than: Optional[datetime] = None,
+    chunk_size: int = TRASH_PURGE_CHUNK_SIZE
+) -> Dict[str, int]:
+    """
+    分块永久删除回收站中的文章，每块提交一次
+
+    Args:
+        db: 数据库会话
+        older_than: 只删除软删除时间早于该时间（UTC）的文章，为空时清空回收站
+        chunk_size: 每块文章数
+
+    Returns:
+        删除的文章数、块数和刷新引用次数的媒体数
+    """
+    query = db.query(models.Post.id).filter(models.Post.deleted_at != None)
+    if older_than is not None:
+        query = query.filter(models.Post.deleted_at <= older_than)
+    query = query.order_by(models.Post.deleted_at.asc(), models.Post.id.asc()).limit(chunk_size)
+
+    purged = 0
+    chunks = 0
+    media_ids = set()
+    while True:
+        post_ids = [post_id for (post_id,) in query.all()]
+        if not post_ids:
+            break
+        media_ids.update(purge_posts(db, post_ids))
+        db.commit()
+        invalidate_posts_by_ids(post_ids, include_lists=False)
+        purged += len(post_ids)
+        chunks += 1
+        if len(post_ids) < chunk_size:
+            break
+
+    if media_ids:
+        refresh_media_usage_counts(db, media_ids)
+        db.commit()
+    if purged:
+        invalidate_post_lists_cache()
+    return {"posts": purged, "chunks": chunks, "media": len(media_ids)}
+
+
+class TrashRetentionStats:
+    """回收站自动清理统计"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.purged = 0
+        self.failed = 0
+        self.last_run_at: Optional[datetime] = None
+
+    def record(self, purged: int, failed: bool = False) -> None:
+        with self._lock:
+            self.runs += 1
+            self.purged += purged
+            if failed:
+                self.failed += 1
+            self.last_run_at = datetime.utcnow()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "retention_days": TRASH_RETENTION_DAYS,
+                "interval": TRASH_RETENTION_INTERVAL,
+                "chunk_size": TRASH_PURGE_CHUNK_SIZE,
+                "runs": self.runs,
+                "purged": self.purged,
+                "failed": self.failed,
+                "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None
+            }
+
+
+# 全局回收站自动清理统计
+trash_retention_stats = TrashRetentionStats()
+
+
+def purge_expired_trash() -> int:
+    """永久删除在回收站中超过保留天数的文章，返回删除数"""
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=TRASH_RETENTION_DAYS)
+        return purge_trash(db, older_than=cutoff)["posts"]
+    finally:
+        db.close()
+
+
+async def trash_retention_worker(stop_event: asyncio.Event) -> None:
+    """后台循环：每隔 TRASH_RETENTION_INTERVAL 秒清理过期的回收站文章"""
+    logger.info(
+        "回收站自动清理任务启动，保留=%s 天，间隔=%ss",
+        TRASH_RETENTION_DAYS, TRASH_RETENTION_INTERVAL
+    )
+    while not stop_event.is_set():
+        try:
+            purged = await asyncio.to_thread(purge_expired_trash)
+            trash_retention_stats.record(purged)
+            if purged:
+                logger.info("回收站自动清理 %d 篇文章", purged)
+        except Exception as exc:
+            trash_retention_stats.record(0, failed=True)
+            logger.error("回收站自动清理失败: %s", exc)
+
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=TRASH_RETENTION_INTERVAL)
+        except asyncio.TimeoutError:
+            continue
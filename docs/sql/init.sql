@@ -37,7 +37,9 @@ CREATE TABLE `access_logs`  (
   INDEX `ix_access_logs_created_at`(`created_at` ASC) USING BTREE,
   INDEX `ix_access_logs_log_type`(`log_type` ASC) USING BTREE,
   INDEX `ix_access_logs_username`(`username` ASC) USING BTREE,
-  INDEX `ix_access_logs_id`(`id` ASC) USING BTREE
+  INDEX `ix_access_logs_id`(`id` ASC) USING BTREE,
+  INDEX `ix_access_logs_created_id`(`created_at` ASC, `id` ASC) USING BTREE,
+  INDEX `ix_access_logs_type_created_id`(`log_type` ASC, `created_at` ASC, `id` ASC) USING BTREE
 ) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_general_ci COMMENT = '访问日志表' ROW_FORMAT = Dynamic;
 
 -- ----------------------------
@@ -185,10 +187,10 @@ CREATE TABLE `posts`  (
   `password` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NULL DEFAULT NULL COMMENT '文章访问密码(明文,可选)',
   `status` varchar(20) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL DEFAULT 'draft' COMMENT '发布状态(draft/published/scheduled)',
   `scheduled_at` datetime NULL DEFAULT NULL COMMENT '定时发布时间',
-  `autosave_data` longtext CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NULL COMMENT '自动保存内容(JSON)',
-  `autosave_at` datetime NULL DEFAULT NULL COMMENT '自动保存时间',
   `updated_at` datetime NULL DEFAULT NULL COMMENT '最后更新时间',
   `deleted_at` datetime NULL DEFAULT NULL COMMENT '软删除时间(NULL表示未删除)',
+  `content_hash` varchar(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NULL DEFAULT NULL COMMENT '标题/Slug/摘要/正文哈希(SHA-256)',
+  `media_hash` varchar(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NULL DEFAULT NULL COMMENT '正文/封面哈希(SHA-256)',
   PRIMARY KEY (`id`) USING BTREE,
   UNIQUE INDEX `ix_posts_slug`(`slug` ASC) USING BTREE,
   INDEX `category_id`(`category_id` ASC) USING BTREE,
@@ -199,6 +201,8 @@ CREATE TABLE `posts`  (
   INDEX `ix_posts_status`(`status` ASC) USING BTREE,
   INDEX `ix_posts_scheduled_at`(`scheduled_at` ASC) USING BTREE,
   INDEX `ix_posts_deleted_at`(`deleted_at` ASC) USING BTREE,
+  INDEX `ix_posts_status_scheduled`(`status` ASC, `scheduled_at` ASC, `id` ASC) USING BTREE,
+  INDEX `ix_posts_list_order`(`pinned` DESC, `pin_order` ASC, `published_at` DESC, `id` DESC) USING BTREE,
   CONSTRAINT `posts_ibfk_1` FOREIGN KEY (`category_id`) REFERENCES `categories` (`id`) ON DELETE RESTRICT ON UPDATE RESTRICT
 ) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_general_ci COMMENT = '文章表' ROW_FORMAT = Dynamic;
 
@@ -225,15 +229,31 @@ CREATE TABLE `post_revisions`  (
   `post_id` varchar(36) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL COMMENT '文章ID',
   `title` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL COMMENT '版本标题',
   `slug` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL COMMENT '版本Slug',
-  `description` text CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NULL COMMENT '版本摘要',
-  `content` longtext CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL COMMENT '版本内容',
+  `description` text CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NULL COMMENT '版本摘要(仅未压缩版本)',
+  `content` longtext CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL COMMENT '版本内容(仅未压缩版本，压缩版本为空字符串)',
   `editor` varchar(50) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NULL DEFAULT NULL COMMENT '编辑者用户名',
   `created_at` datetime NULL DEFAULT NULL COMMENT '版本创建时间',
+  `storage` varchar(10) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NULL DEFAULT NULL COMMENT '存储方式(full/key/delta)',
+  `base_id` varchar(36) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NULL DEFAULT NULL COMMENT '差异版本的基准版本ID',
+  `chain_depth` int NULL DEFAULT NULL COMMENT '距最近关键帧的差异层数',
+  `data` longblob NULL COMMENT '压缩后的摘要和正文(关键帧)或差异(delta)',
   PRIMARY KEY (`id`) USING BTREE,
   INDEX `ix_post_revisions_post_id`(`post_id` ASC) USING BTREE,
   CONSTRAINT `post_revisions_ibfk_1` FOREIGN KEY (`post_id`) REFERENCES `posts` (`id`) ON DELETE CASCADE ON UPDATE RESTRICT
 ) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_general_ci COMMENT = '文章版本历史' ROW_FORMAT = Dynamic;
 
+-- ----------------------------
+-- Table structure for post_autosaves
+-- ----------------------------
+DROP TABLE IF EXISTS `post_autosaves`;
+CREATE TABLE `post_autosaves`  (
+  `post_id` varchar(36) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL COMMENT '文章ID',
+  `data` longtext CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL COMMENT '自动保存内容(JSON)',
+  `saved_at` datetime NOT NULL COMMENT '自动保存时间',
+  PRIMARY KEY (`post_id`) USING BTREE,
+  CONSTRAINT `post_autosaves_ibfk_1` FOREIGN KEY (`post_id`) REFERENCES `posts` (`id`) ON DELETE CASCADE ON UPDATE RESTRICT
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_general_ci COMMENT = '文章自动保存' ROW_FORMAT = Dynamic;
+
 -- ----------------------------
 -- Table structure for media_files
 -- ----------------------------
@@ -253,7 +273,8 @@ CREATE TABLE `media_files`  (
   `created_at` datetime NULL DEFAULT NULL COMMENT '上传时间',
   PRIMARY KEY (`id`) USING BTREE,
   INDEX `ix_media_files_filename`(`filename` ASC) USING BTREE,
-  INDEX `ix_media_files_created_at`(`created_at` ASC) USING BTREE
+  INDEX `ix_media_files_created_at`(`created_at` ASC) USING BTREE,
+  INDEX `ix_media_files_created_id`(`created_at` ASC, `id` ASC) USING BTREE
 ) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_general_ci COMMENT = '媒体文件元数据' ROW_FORMAT = Dynamic;
 
 -- ----------------------------
@@ -475,7 +496,8 @@ CREATE TABLE `backup_records`  (
   `created_at` datetime NULL DEFAULT NULL COMMENT '创建时间',
   PRIMARY KEY (`id`) USING BTREE,
   INDEX `ix_backup_records_id`(`id` ASC) USING BTREE,
-  INDEX `ix_backup_records_created_at`(`created_at` ASC) USING BTREE
+  INDEX `ix_backup_records_created_at`(`created_at` ASC) USING BTREE,
+  INDEX `ix_backup_records_created_id`(`created_at` ASC, `id` ASC) USING BTREE
 ) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_general_ci COMMENT = '数据备份记录' ROW_FORMAT = Dynamic;
 
 -- ----------------------------